@@ -1,30 +1,81 @@
+import argparse
+import base64
+import cProfile
 import csv
+import gzip
+import hashlib
+import hmac
 import io
 import json
+import math
+import mimetypes
+import multiprocessing
 import os
+import pstats
+import random
 import re
+import secrets
+import signal
 import sqlite3
+import tempfile
+import threading
+import zlib
+from collections import OrderedDict, deque
+from collections.abc import Mapping
+from concurrent.futures import ProcessPoolExecutor
+from contextvars import ContextVar
 from copy import deepcopy
-from datetime import datetime
+from datetime import datetime, timedelta
+from itertools import islice
 from pathlib import Path
+from time import perf_counter, sleep
+
+try:
+    from gunicorn.app.base import BaseApplication as GunicornBaseApplication
+except ImportError:  # gunicorn is POSIX-only; `serve` falls back to waitress.
+    GunicornBaseApplication = None
+
+try:
+    from waitress import serve as waitress_serve
+except ImportError:
+    waitress_serve = None
+
+try:
+    import pyarrow
+    import pyarrow.parquet as pyarrow_parquet
+except ImportError:  # Without pyarrow only the NDJSON export is offered.
+    pyarrow = None
+    pyarrow_parquet = None
+
+from markupsafe import Markup
+from werkzeug.http import parse_accept_header
+from werkzeug.middleware.proxy_fix import ProxyFix
+
+from flask import (
+    Flask,
+    Response,
+    g,
+    get_template_attribute,
+    has_app_context,
+    jsonify,
+    make_response,
+    redirect,
+    render_template,
+    request,
+    send_file,
+    stream_with_context,
+    url_for,
+)
 
-from reportlab.lib.pagesizes import A4
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.cidfonts import UnicodeCIDFont
-from reportlab.pdfgen import canvas
-
-from flask import Flask, jsonify, make_response, redirect, render_template, request, url_for
-
+from pdf_report import ReportPdfWriter, compress_page, iter_record_pages
 from survey_config import (
-    CLOSED_MESSAGE_BODY,
-    CLOSED_MESSAGE_TITLE,
-    FORM_DEFINITION,
-    OPEN_END_AT,
-    OPEN_START_AT,
-    SUCCESS_MESSAGE,
     SURVEY_SLUG,
     SURVEY_TITLE,
+    get_survey_source_mtime,
+    list_survey_slugs,
+    load_survey_source,
 )
+from ui_catalog import list_catalog_langs, load_catalog
 
 BASE_DIR = Path(__file__).parent
 DB_PATH = BASE_DIR / "survey.db"
@@ -34,14 +85,122 @@ LANG_COOKIE_NAME = "survey_lang"
 REPORT_AUTH_COOKIE_NAME = "survey_report_auth"
 GUEST_USERNAME_ENV = "SURVEY_GUEST_USERNAME"
 GUEST_PASSWORD_ENV = "SURVEY_GUEST_PASSWORD"
+API_BATCH_MAX_ITEMS = 5000
+API_BATCH_TRANSACTION_SIZE = 500
+API_IDEMPOTENCY_TTL_HOURS = 24
+API_IDEMPOTENCY_KEY_PATTERN = re.compile(r"^[A-Za-z0-9_.:-]{1,128}$")
 ADMIN_USERNAME_ENV = "SURVEY_ADMIN_USERNAME"
 ADMIN_PASSWORD_ENV = "SURVEY_ADMIN_PASSWORD"
+AUTH_SECRET_ENV = "SURVEY_AUTH_SECRET"
+REPORT_ROLES = {"guest", "admin"}
 REPORT_SESSION_TIMEOUT_SECONDS = 60 * 10
 DEFAULT_LANG = "zh-TW"
-SUPPORTED_LANGS = {"zh-TW", "en"}
+SUPPORTED_LANGS = set(list_catalog_langs()) | {DEFAULT_LANG}
+SWITCHER_LANGS = [DEFAULT_LANG, *sorted(SUPPORTED_LANGS - {DEFAULT_LANG})]
+STATIC_DIR = BASE_DIR / "static"
+STATIC_ASSET_CACHE_CONTROL = "public, max-age=31536000, immutable"
+STATIC_ASSET_GZIP_MIN_BYTES = 512
+COMPRESS_LEVEL_ENV = "SURVEY_COMPRESS_LEVEL"
+COMPRESS_MIN_BYTES_ENV = "SURVEY_COMPRESS_MIN_BYTES"
+COMPRESSIBLE_MIMETYPES = {
+    "application/javascript",
+    "application/json",
+    "application/x-ndjson",
+    "image/svg+xml",
+    "text/css",
+    "text/csv",
+    "text/html",
+    "text/javascript",
+    "text/plain",
+}
+SQLITE_BUSY_TIMEOUT_SECONDS = 10
+EXPORT_FETCH_SIZE = 1000
+EXPORT_EPOCH = datetime(1970, 1, 1)
+PARQUET_ROW_GROUP_ROWS = 20000
+PDF_SPOOL_MAX_MEMORY_BYTES = 8 * 1024 * 1024
+PDF_STREAM_CHUNK_BYTES = 64 * 1024
+PDF_RENDER_WORKERS_ENV = "SURVEY_PDF_WORKERS"
+PDF_RENDER_RANGE_RECORDS = 2000
+REPORT_EVENT_RETRY_MS = 3000
+REPORT_EVENT_POLL_SECONDS = 1.0
+REPORT_EVENT_CLIENT_BUFFER = 200
+REPORT_EVENT_RETENTION = 2000
+COMPILED_SURVEY_CACHE_SIZE_ENV = "SURVEY_DEFINITION_CACHE_SIZE"
+SURVEY_RELOAD_INTERVAL_ENV = "SURVEY_CONFIG_RELOAD_SECONDS"
+SUBMIT_RATE_PER_MINUTE_ENV = "SURVEY_SUBMIT_RATE_PER_MINUTE"
+SUBMIT_BURST_ENV = "SURVEY_SUBMIT_BURST"
+SUBMIT_CONCURRENCY_ENV = "SURVEY_SUBMIT_CONCURRENCY"
+SUBMIT_MAX_QUEUE_MS_ENV = "SURVEY_SUBMIT_MAX_QUEUE_MS"
+TRUSTED_PROXY_HOPS_ENV = "SURVEY_TRUSTED_PROXY_HOPS"
+SUBMIT_TRACKED_CLIENTS = 10000
+HISTORY_KEEP_VERSIONS_ENV = "SURVEY_HISTORY_KEEP_VERSIONS"
+HISTORY_COMPACT_INTERVAL_ENV = "SURVEY_HISTORY_COMPACT_SECONDS"
+DRAFT_COOKIE_NAME = "survey_draft"
+DRAFT_TTL_HOURS_ENV = "SURVEY_DRAFT_TTL_HOURS"
+DRAFT_MAX_BYTES = 64 * 1024
+DRAFT_RATE_PER_MINUTE_ENV = "SURVEY_DRAFT_RATE_PER_MINUTE"
+DRAFT_MAX_PER_CLIENT = 200
+DRAFT_PURGE_INTERVAL_SECONDS = 3600
+DRAFT_KEY_PATTERN = re.compile(r"^[A-Za-z0-9_-]{22,64}$")
+SUBMIT_QUEUE_SAMPLES = 1000
+SURVEY_SCOPED_ENDPOINTS = {
+    "admin_report",
+    "admin_report_events",
+    "admin_report_record_fragment",
+    "admin_report_record_history",
+    "admin_report_trend",
+    "admin_report_export_csv",
+    "admin_report_export_ndjson",
+    "admin_report_export_parquet",
+    "admin_report_export_pdf",
+    "admin_report_import_csv",
+    "admin_report_delete_one",
+    "api_responses_batch",
+}
+RECORD_FRAGMENT_CACHE_ENTRIES_ENV = "SURVEY_FRAGMENT_CACHE_ENTRIES"
+RECORD_FRAGMENT_CACHE_MAX_BYTES = 32 * 1024 * 1024
+SERVE_HOST_ENV = "SURVEY_HOST"
+SERVE_PORT_ENV = "SURVEY_PORT"
+SERVE_WORKERS_ENV = "SURVEY_WORKERS"
+SERVE_THREADS_ENV = "SURVEY_THREADS"
+SERVE_KEEPALIVE_ENV = "SURVEY_KEEPALIVE_SECONDS"
+SERVE_GRACEFUL_TIMEOUT_ENV = "SURVEY_GRACEFUL_TIMEOUT_SECONDS"
+SERVE_REQUEST_TIMEOUT_SECONDS = 60
+PROFILE_DIR = BASE_DIR / "profiles"
+BACKUP_DIR = BASE_DIR / "backups"
+BACKUP_MAX_FILES = 10
+BACKUP_PAGES_PER_STEP = 256
+BACKUP_STEP_PAUSE_SECONDS = 0.01
+MIGRATION_BATCH_SIZE = 200
+MIGRATION_BATCH_PAUSE_SECONDS = 0.01
+TREND_MAX_BUCKETS = 24 * 14
+REPORT_FACETS = ("department_name", "main_system", "main_role")
+REPORT_DATE_FACET_CHIPS = 20
+REPORT_SNAPSHOT_INTERVAL_ENV = "SURVEY_REPORT_SNAPSHOT_SECONDS"
+PROFILE_QUERY_PARAM = "_profile"
+PROFILE_HEADER_NAME = "X-Survey-Profile"
+PROFILE_SAMPLE_RATE_ENV = "SURVEY_PROFILE_SAMPLE_RATE"
+PROFILE_MAX_FILES = 200
+PROFILE_TOP_FUNCTIONS = 40
+PROFILE_ID_PATTERN = re.compile(r"^\d{8}-\d{6}-[0-9a-f]{8}$")
 
 app = Flask(__name__)
 INDEX_PATTERN = re.compile(r"^(?P<main>\d+)(?:-(?P<sub>\d+))?\.")
+CJK_RUN_PATTERN = re.compile(r"[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff]+")
+SEARCH_WORD_PATTERN = re.compile(r"\w+")
+SEARCH_TEXT_FIELDS = ["department_name", "person_name", "main_system", "main_role", "notes"]
+
+
+def detect_fts5_support() -> bool:
+    try:
+        with sqlite3.connect(":memory:") as conn:
+            conn.execute("CREATE VIRTUAL TABLE fts5_probe USING fts5(content)")
+        return True
+    except sqlite3.OperationalError:
+        return False
+
+
+FTS5_AVAILABLE = detect_fts5_support()
 
 
 def ensure_env_file(env_path: Path, example_path: Path) -> bool:
@@ -67,119 +226,44 @@ def load_env_file(path: Path) -> None:
             os.environ[key] = value
 
 
+def parse_sample_rate(raw_value: str | None) -> float:
+    try:
+        parsed = float(str(raw_value))
+    except (TypeError, ValueError):
+        return 0.0
+    return min(max(parsed, 0.0), 1.0)
+
+
 ENV_FILE_AUTO_CREATED = ensure_env_file(ENV_FILE_PATH, ENV_EXAMPLE_FILE_PATH)
 load_env_file(ENV_FILE_PATH)
+PROFILE_SAMPLE_RATE = parse_sample_rate(os.getenv(PROFILE_SAMPLE_RATE_ENV))
 
-EN_TRANSLATIONS = {
-    "自動化測試導入 PoC 需求訪談表": "Automation Testing Adoption PoC Needs Interview Form",
-    "問卷填寫時間已結束": "Survey Submission Window Closed",
-    "本問卷已超過填寫期限，系統已停止收件。若您仍需補填或更新內容，請聯繫問卷管理者協助重新開放。": "This survey is past its submission deadline and is no longer accepting responses. If you still need to submit or update your response, please contact the survey administrator to reopen it.",
-    "已成功儲存。若您再次開啟同一連結並提交，系統會覆寫您先前的內容。": "Saved successfully.",
-    "已成功儲存。系統會依照部門與訪談人員判斷為更新或新增。": "Saved successfully. The system decides whether to update or create based on Department and Interviewee.",
-    "找不到問卷": "Survey not found",
-    "訪談部門/人員": "Interview Department / Interviewee",
-    "訪談部門": "Department",
-    "例如：研發部": "e.g. Engineering Department",
-    "訪談人員": "Interviewee",
-    "例如：王小明": "e.g. Alex Wang",
-    "主測系統/角色": "Primary System / Role",
-    "主測系統": "Primary System",
-    "例如：ERP": "e.g. ERP",
-    "主測角色": "Primary Role",
-    "例如：審核者": "e.g. Reviewer",
-    "1. 自動化核心流程": "1. Automation Core Flows",
-    "登入→主功能操作→送出": "Login → Main Action → Submit",
-    "查詢→檢視→匯出": "Search → View → Export",
-    "新增→送審→審核完成": "Create → Submit for Approval → Approved",
-    "編輯→儲存→結果確認": "Edit → Save → Verify Result",
-    "2. 測試類型需求": "2. Required Test Types",
-    "Web UI 黑箱流程測試（End-to-End）": "Web UI Black-box Flow Testing (End-to-End)",
-    "多角色權限測試（Admin/User）": "Multi-role Permission Testing (Admin/User)",
-    "API 測試（非 UI）": "API Testing (Non-UI)",
-    "效能測試（壓力/負載）": "Performance Testing (Stress/Load)",
-    "安全測試（弱掃/登入防護）": "Security Testing (Vulnerability Scan/Login Protection)",
-    "3. 操作情境需求": "3. Required Operation Scenarios",
-    "驗證碼（Captcha）": "Captcha",
-    "OTP/簡訊驗證": "OTP / SMS Verification",
-    "SSO/第三方登入": "SSO / Third-party Login",
-    "多步驟表單": "Multi-step Form",
-    "彈跳視窗": "Pop-up Dialog",
-    "多頁籤操作": "Multi-tab Operations",
-    "檔案上傳": "File Upload",
-    "Excel/PDF 匯出": "Excel/PDF Export",
-    "4-1. 測試執行頻率": "4-1. Test Execution Frequency",
-    "改版前": "Before Release",
-    "每日定期跑": "Run Daily on Schedule",
-    "手動觸發即可": "Manual Trigger is Enough",
-    "需可指定 tag 版本驗證": "Need Validation by Specific Tag Version",
-    "4-2. 測試執行環境": "4-2. Test Execution Environment",
-    "測試環境（Demo）": "Testing Environment (Demo)",
-    "驗收環境（UAT）": "User Acceptance Environment (UAT)",
-    "正式環境（Prod）": "Production Environment (Prod)",
-    "本機即可": "Local Machine is Enough",
-    "5-1. 瀏覽器需求": "5-1. Browser Requirements",
-    "Chrome": "Chrome",
-    "Edge": "Edge",
-    "Firefox": "Firefox",
-    "Safari": "Safari",
-    "5-2. 裝置需求": "5-2. Device Requirements",
-    "PC Web": "PC Web",
-    "Mobile Web/APP": "Mobile Web/APP",
-    "需跨解析度測試": "Need Cross-resolution Testing",
-    "6-1. 測試角色需求": "6-1. Test Role Requirements",
-    "一般使用者": "General User",
-    "管理者 Admin": "Administrator (Admin)",
-    "審核者 Reviewer": "Reviewer",
-    "多部門角色切換": "Multi-department Role Switching",
-    "6-2. 帳號方式": "6-2. Account Setup",
-    "使用系統內建帳號": "Use Built-in System Accounts",
-    "提供固定測試帳號": "Provide Fixed Test Accounts",
-    "測試工具需自動建立帳號": "Testing Tool Must Auto-create Accounts",
-    "7. 報告與管理需求": "7. Reporting & Management Needs",
-    "自動測試報告（Pass/Fail）": "Automated Test Report (Pass/Fail)",
-    "測試截圖紀錄": "Test Screenshot Records",
-    "測試影片錄製": "Test Video Recording",
-    "回歸測試覆蓋清單": "Regression Coverage Checklist",
-    "管理者摘要報表": "Manager Summary Report",
-    "8. 整合需求": "8. Integration Needs",
-    "Github": "GitHub",
-    "Email 通知": "Email Notifications",
-    "API": "API",
-    "9-1. PoC 規模選擇": "9-1. PoC Scope Selection",
-    "單一流程驗證（1 條流程即可）": "Single Flow Verification (1 flow)",
-    "小型流程組合（2–3 條核心流程）": "Small Flow Set (2–3 core flows)",
-    "單一模組回歸測試（5–10 條案例）": "Single Module Regression (5–10 cases)",
-    "跨模組整合流程（包含多部門操作）": "Cross-module Integrated Flows (multi-department)",
-    "全系統自動化（不建議 PoC）": "Full-system Automation (Not Recommended for PoC)",
-    "9-2. PoC 驗收標準": "9-2. PoC Acceptance Criteria",
-    "核心流程可穩定重複執行": "Core flows can run repeatedly and stably",
-    "改版後可快速回歸驗證": "Fast regression validation after each release",
-    "測試結果可產出報告": "Test results can generate reports",
-    "團隊可自行維護腳本": "Team can maintain scripts independently",
-    "可作為後續擴大導入基礎": "Can serve as a foundation for scaled adoption",
-    "補充說明": "Additional Notes",
-    "可填寫其他需求、限制或補充背景": "You can add other requirements, constraints, or background details",
-    "其他：請填寫": "Other: please specify",
-    "其他：": "Other:",
-    "提交時間": "Submitted",
-    "部門": "Department",
-    "訪談人員": "Interviewee",
-    "主測系統": "Primary System",
-    "主測角色": "Primary Role",
-}
+
+def load_auth_signing_key() -> bytes:
+    secret = os.getenv(AUTH_SECRET_ENV, "").strip()
+    # Without a configured secret sessions only survive until the next restart.
+    secret_bytes = secret.encode("utf-8") if secret else secrets.token_bytes(32)
+    credentials = "|".join(
+        os.getenv(name, "").strip()
+        for name in (GUEST_USERNAME_ENV, GUEST_PASSWORD_ENV, ADMIN_USERNAME_ENV, ADMIN_PASSWORD_ENV)
+    )
+    # Mixing in the credentials invalidates issued tokens when a password changes.
+    return hmac.new(secret_bytes, credentials.encode("utf-8"), hashlib.sha256).digest()
 
 
+AUTH_SIGNING_KEY = load_auth_signing_key()
+
 def tr(text: str, lang: str) -> str:
-    if lang == "en":
-        return EN_TRANSLATIONS.get(text, text)
-    return text
+    return load_catalog(lang)["messages"].get(text, text)
 
 
 def normalize_lang(raw_lang: str | None) -> str:
     if not raw_lang:
         return DEFAULT_LANG
-    if raw_lang.lower().startswith("en"):
-        return "en"
+    lowered = raw_lang.lower()
+    for lang in sorted(SUPPORTED_LANGS):
+        if lang != DEFAULT_LANG and lowered.startswith(lang.split("-")[0].lower()):
+            return lang
     return DEFAULT_LANG
 
 
@@ -200,141 +284,25 @@ def get_lang() -> str:
 
 
 def get_html_lang(lang: str) -> str:
-    return "en" if lang == "en" else "zh-Hant"
-
-
-def build_ui_texts(lang: str) -> dict:
-    if lang == "en":
-        return {
-            "basic_title": "Basic Information",
-            "questionnaire_title": "Questionnaire Fields",
-            "open_time_label": "Open Window",
-            "record_update_hint": "The system updates records based on the two-column mapping of Department and Interviewee to prevent duplicate entries.",
-            "other_placeholder": tr("其他：請填寫", lang),
-            "submit_button": "Submit / Update",
-            "back_to_form": "Back to Survey",
-            "survey_label": "Survey",
-            "lang_zh": "中文",
-            "lang_en": "EN",
-            "footer_provider": "Provided by: Charles",
-            "footer_contact": "If you have any requirements, please feel free to contact me.",
-        }
+    return load_catalog(lang)["html_lang"]
 
-    return {
-        "basic_title": "基本資料",
-        "questionnaire_title": "問卷欄位",
-        "open_time_label": "開放時間",
-        "record_update_hint": "系統會依照部門、訪談人員的雙欄位對應來更新資料，避免重複新增",
-        "other_placeholder": "其他：請填寫",
-        "submit_button": "送出/更新",
-        "back_to_form": "回到問卷頁",
-        "survey_label": "問卷",
-        "lang_zh": "中文",
-        "lang_en": "EN",
-        "footer_provider": "提供者: Charles",
-        "footer_contact": "若有任何需求，請不吝與我聯繫",
-    }
 
+def build_lang_urls(endpoint: str, **values) -> dict[str, str]:
+    # The switcher lists the default language first, then every other
+    # catalog file; templates label each link from lang_labels.
+    return {lang: url_for(endpoint, lang=lang, **values) for lang in SWITCHER_LANGS}
 
-def build_admin_ui_texts(lang: str) -> dict:
-    if lang == "en":
-        return {
-            "page_title": "Admin Report",
-            "total_submissions": "Total Submissions",
-            "department_count": "Departments",
-            "latest_submitted_at": "Latest Submitted At",
-            "basic_section": "Basic Information",
-            "questionnaire_section": "Questionnaire Details",
-            "empty_text": "No submissions yet. Please submit the survey first.",
-            "tag_submitted": "Submitted",
-            "tag_department": "Department",
-            "tag_person": "Interviewee",
-            "tag_system": "Primary System",
-            "tag_role": "Primary Role",
-            "filter_date_label": "Filter by Date",
-            "filter_apply": "Apply",
-            "filter_reset": "Reset",
-            "filter_selected_date": "Selected Date",
-            "filter_no_match": "No records for the selected date.",
-            "detail_panel_title": "Detailed Questionnaire",
-            "detail_panel_hint": "Click a compact card above to view details here.",
-            "compact_panel_title": "Compact Questionnaire List",
-            "compact_panel_toggle": "Collapse list",
-            "detail_panel_toggle": "Collapse details",
-            "per_page_label": "Rows per page",
-            "page_label": "Page",
-            "prev_page": "Prev",
-            "next_page": "Next",
-            "data_export_csv": "CSV",
-            "data_export_pdf": "PDF",
-            "data_export": "Export",
-            "data_import": "Import",
-            "admin_login": "Login",
-            "admin_logout": "Logout",
-            "reset_timer": "Reset Timer",
-            "countdown_prefix": "Auto logout in",
-            "username_label": "Username",
-            "password_label": "Password",
-            "login_error": "Invalid username or password.",
-            "delete_aria": "Delete this record",
-            "delete_confirm_template": "Are you sure you want to delete the data for Department {department}, Interviewee {person}?",
-            "unknown_text": "Unknown",
-            "lang_zh": "中文",
-            "lang_en": "EN",
-            "footer_provider": "Provided by: Charles",
-            "footer_contact": "If you have any requirements, please feel free to contact me.",
-        }
 
-    return {
-        "page_title": "管理者報表",
-        "total_submissions": "提交總筆數",
-        "department_count": "部門數",
-        "latest_submitted_at": "最新提交時間",
-        "basic_section": "基本資料",
-        "questionnaire_section": "問卷內容",
-        "empty_text": "目前沒有提交資料，可先填寫問卷後再查看此頁。",
-        "tag_submitted": "提交時間",
-        "tag_department": "部門",
-        "tag_person": "訪談人員",
-        "tag_system": "主測系統",
-        "tag_role": "主測角色",
-        "filter_date_label": "依日期篩選",
-        "filter_apply": "套用",
-        "filter_reset": "清除",
-        "filter_selected_date": "已選日期",
-        "filter_no_match": "所選日期目前沒有資料。",
-        "detail_panel_title": "詳細問卷內容",
-        "detail_panel_hint": "請點選上方簡要卡片以查看詳細資料。",
-        "compact_panel_title": "簡要問卷列表",
-        "compact_panel_toggle": "收合列表",
-        "detail_panel_toggle": "收合內容",
-        "per_page_label": "每頁筆數",
-        "page_label": "頁次",
-        "prev_page": "上一頁",
-        "next_page": "下一頁",
-        "data_export_csv": "CSV",
-        "data_export_pdf": "PDF",
-        "data_export": "匯出",
-        "data_import": "匯入",
-        "admin_login": "登入",
-        "admin_logout": "登出",
-        "reset_timer": "重製計時",
-        "countdown_prefix": "自動登出倒數",
-        "username_label": "帳號",
-        "password_label": "密碼",
-        "login_error": "帳號或密碼錯誤。",
-        "delete_aria": "刪除此筆資料",
-        "delete_confirm_template": "確認要刪除此 {department} 部門 {person} 人員的資料嗎?",
-        "unknown_text": "未知",
-        "lang_zh": "中文",
-        "lang_en": "EN",
-        "footer_provider": "提供者: Charles",
-        "footer_contact": "若有任何需求，請不吝與我聯繫",
-    }
+def build_ui_texts(lang: str) -> Mapping[str, str]:
+    return load_catalog(lang)["ui"]
+
+
+def build_admin_ui_texts(lang: str) -> Mapping[str, str]:
+    return load_catalog(lang)["admin_ui"]
 
 
-def localize_form_definition(lang: str) -> list[dict]:
-    localized = deepcopy(FORM_DEFINITION)
+def localize_form_definition(lang: str, form_definition: list[dict]) -> list[dict]:
+    localized = deepcopy(form_definition)
     for field in localized:
         if "label" in field:
             field["label"] = tr(field["label"], lang)
@@ -354,9 +322,7 @@ def localize_form_definition(lang: str) -> list[dict]:
 
 
 def format_date_by_lang(value: datetime, lang: str) -> str:
-    if lang == "en":
-        return value.strftime("%b %d, %Y")
-    return value.strftime("%Y/%m/%d")
+    return value.strftime(load_catalog(lang)["date_format"])
 
 
 def format_time(value: datetime) -> str:
@@ -364,17 +330,18 @@ def format_time(value: datetime) -> str:
 
 
 def build_open_window_parts(lang: str) -> dict:
+    survey = get_active_survey()
     return {
-        "start_date": format_date_by_lang(OPEN_START_AT, lang),
-        "start_time": format_time(OPEN_START_AT),
-        "end_date": format_date_by_lang(OPEN_END_AT, lang),
-        "end_time": format_time(OPEN_END_AT),
+        "start_date": format_date_by_lang(survey["open_start_at"], lang),
+        "start_time": format_time(survey["open_start_at"]),
+        "end_date": format_date_by_lang(survey["open_end_at"], lang),
+        "end_time": format_time(survey["open_end_at"]),
     }
 
 
-def build_report_definition() -> list[dict]:
+def build_report_definition(form_definition: list[dict]) -> list[dict]:
     definition = []
-    for field in FORM_DEFINITION:
+    for field in form_definition:
         section = field.get("section", "questionnaire")
         field_type = field["type"]
 
@@ -411,7 +378,161 @@ def build_report_definition() -> list[dict]:
     return definition
 
 
-REPORT_DEFINITION = build_report_definition()
+def compute_report_definition_hash(form_definition: list[dict]) -> str:
+    # Pre-rendered report payloads depend only on the form definition and
+    # the translations; any change to either invalidates them.
+    messages = {lang: dict(load_catalog(lang)["messages"]) for lang in sorted(SUPPORTED_LANGS)}
+    source = json.dumps([form_definition, messages], ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(source.encode("utf-8")).hexdigest()[:16]
+
+
+def compile_survey(source: dict, source_mtime: int | None = None) -> dict:
+    """Build everything the routes need from one survey definition, once."""
+    form_definition = source["form_definition"]
+    report_definition = build_report_definition(form_definition)
+    localized_forms = {}
+    report_labels = {}
+    for lang in SUPPORTED_LANGS:
+        localized_fields = localize_form_definition(lang, form_definition)
+        localized_forms[lang] = {
+            "fields": localized_fields,
+            "basic_fields": [field for field in localized_fields if field.get("section") == "basic"],
+            "questionnaire_rows": build_questionnaire_rows(
+                [field for field in localized_fields if field.get("section") != "basic"]
+            ),
+        }
+        report_labels[lang] = []
+        for entry in report_definition:
+            label = tr(entry["label"], lang)
+            report_labels[lang].append((entry["section"], label, *split_question_index_and_text(label)))
+
+    return {
+        **source,
+        "source_mtime": source_mtime,
+        "report_definition": report_definition,
+        "definition_hash": compute_report_definition_hash(form_definition),
+        "localized_forms": localized_forms,
+        "report_labels": report_labels,
+        "option_sets": {
+            field["name"]: set(field["options"]) for field in form_definition if field["type"] == "multiselect"
+        },
+    }
+
+
+def get_survey(slug: str) -> dict | None:
+    with COMPILED_SURVEYS_LOCK:
+        survey = COMPILED_SURVEYS.get(slug)
+        if survey is not None:
+            COMPILED_SURVEYS.move_to_end(slug)
+            return survey
+        if slug in MISSING_SURVEYS:
+            MISSING_SURVEYS.move_to_end(slug)
+            return None
+
+    # Stat before reading, so an edit landing in between is seen as newer
+    # by the next reload pass.
+    source_mtime = get_survey_source_mtime(slug)
+    try:
+        source = load_survey_source(slug)
+        survey = compile_survey(source, source_mtime) if source is not None else None
+    except Exception as error:
+        print(f"survey {slug} is invalid: {error}")
+        survey = None
+    if survey is None:
+        # Unknown and invalid slugs are remembered too, so repeated 404s do
+        # not reopen the file; the watcher forgets them once it changes.
+        with COMPILED_SURVEYS_LOCK:
+            MISSING_SURVEYS[slug] = source_mtime
+            MISSING_SURVEYS.move_to_end(slug)
+            while len(MISSING_SURVEYS) > MISSING_SURVEY_CACHE_SIZE:
+                MISSING_SURVEYS.popitem(last=False)
+        return None
+    with COMPILED_SURVEYS_LOCK:
+        COMPILED_SURVEYS[slug] = survey
+        COMPILED_SURVEYS.move_to_end(slug)
+        while len(COMPILED_SURVEYS) > COMPILED_SURVEY_CACHE_SIZE:
+            COMPILED_SURVEYS.popitem(last=False)
+    return survey
+
+
+def reload_changed_surveys() -> list[str]:
+    """Recompile cached surveys whose source file changed and swap them in.
+
+    Runs on the watcher thread: requests only ever read COMPILED_SURVEYS, so
+    they see either the old or the new compiled survey, never a mix. Stored
+    report renders are left alone: rows whose definition_hash no longer
+    matches are rendered live until the next startup refreshes them, rather
+    than every worker rewriting them at once.
+    """
+    with COMPILED_SURVEYS_LOCK:
+        cached = list(COMPILED_SURVEYS.items())
+        missing = list(MISSING_SURVEYS.items())
+
+    for slug, previous_mtime in missing:
+        if get_survey_source_mtime(slug) != previous_mtime:
+            with COMPILED_SURVEYS_LOCK:
+                MISSING_SURVEYS.pop(slug, None)
+
+    reloaded = []
+    for slug, previous in cached:
+        source_mtime = get_survey_source_mtime(slug)
+        if source_mtime == previous["source_mtime"]:
+            continue
+        try:
+            source = load_survey_source(slug)
+            survey = compile_survey(source, source_mtime) if source is not None else None
+        except Exception as error:
+            # A half-written or broken edit keeps the last good survey live;
+            # recording the new mtime retries only after the next edit.
+            print(f"survey config reload of {slug} failed, keeping the previous definition: {error}")
+            survey = {**previous, "source_mtime": source_mtime}
+            with COMPILED_SURVEYS_LOCK:
+                if slug in COMPILED_SURVEYS:
+                    COMPILED_SURVEYS[slug] = survey
+            continue
+        with COMPILED_SURVEYS_LOCK:
+            if survey is None:
+                COMPILED_SURVEYS.pop(slug, None)
+            elif slug in COMPILED_SURVEYS:
+                COMPILED_SURVEYS[slug] = survey
+        reloaded.append(slug)
+    return reloaded
+
+
+def run_survey_config_watcher(stop_event: threading.Event) -> None:
+    while not stop_event.wait(SURVEY_RELOAD_INTERVAL_SECONDS):
+        try:
+            reloaded = reload_changed_surveys()
+        except Exception as error:
+            print(f"survey config reload failed: {error}")
+            continue
+        if reloaded:
+            print(f"survey config reloaded: {', '.join(reloaded)}")
+
+
+def start_survey_config_watcher() -> threading.Event:
+    stop_event = threading.Event()
+    threading.Thread(
+        target=run_survey_config_watcher,
+        args=(stop_event,),
+        name="survey-config-watcher",
+        daemon=True,
+    ).start()
+    return stop_event
+
+
+def get_active_survey() -> dict:
+    # Requests bind the slug on g (see bind_active_survey), which bodies sent
+    # through stream_with_context still see; code outside a request, such as
+    # PDF worker processes, sets ACTIVE_SURVEY_SLUG instead.
+    slug = g.get("survey_slug") if has_app_context() else None
+    return get_survey(slug or ACTIVE_SURVEY_SLUG.get()) or get_survey(SURVEY_SLUG)
+
+
+COMPILED_SURVEYS: OrderedDict[str, dict] = OrderedDict()
+MISSING_SURVEYS: OrderedDict[str, int | None] = OrderedDict()
+COMPILED_SURVEYS_LOCK = threading.Lock()
+ACTIVE_SURVEY_SLUG: ContextVar[str] = ContextVar("active_survey_slug", default=SURVEY_SLUG)
 
 
 def format_report_datetime(value: str, lang: str = "zh-TW") -> str:
@@ -485,104 +606,399 @@ def split_question_index_and_text(label: str) -> tuple[str, str]:
     return matched.group("idx"), matched.group("text")
 
 
-def get_report_records(lang: str = "zh-TW") -> list[dict]:
-    with sqlite3.connect(DB_PATH) as conn:
+def segment_search_text(text: str) -> str:
+    # unicode61 keeps a whole CJK run as one token, so index overlapping
+    # bigrams plus the run's last character to make substrings matchable.
+    def expand_cjk_run(matched: re.Match) -> str:
+        run = matched.group(0)
+        grams = [run[idx : idx + 2] for idx in range(len(run) - 1)] + [run[-1]]
+        return f" {' '.join(grams)} "
+
+    return CJK_RUN_PATTERN.sub(expand_cjk_run, str(text))
+
+
+def build_search_document(answers: dict) -> list[str]:
+    values = [str(answers.get(name, "")).strip() for name in SEARCH_TEXT_FIELDS]
+    other_texts = [
+        str(value).strip()
+        for key, value in answers.items()
+        if key.endswith("_other") and str(value).strip()
+    ]
+    values.append(" ".join(other_texts))
+    return [segment_search_text(value) for value in values]
+
+
+def build_search_match_query(raw_query: str) -> str:
+    terms = []
+    for token in str(raw_query).split():
+        cursor = 0
+        for matched in CJK_RUN_PATTERN.finditer(token):
+            terms.extend(f'"{word}"*' for word in SEARCH_WORD_PATTERN.findall(token[cursor : matched.start()]))
+            run = matched.group(0)
+            if len(run) == 1:
+                terms.append(f'"{run}"*')
+            else:
+                terms.append('"' + " ".join(run[idx : idx + 2] for idx in range(len(run) - 1)) + '"')
+            cursor = matched.end()
+        terms.extend(f'"{word}"*' for word in SEARCH_WORD_PATTERN.findall(token[cursor:]))
+    return " AND ".join(terms)
+
+
+def write_search_document(conn: sqlite3.Connection, record_id: int, answers: dict) -> None:
+    if not FTS5_AVAILABLE:
+        return
+    conn.execute("DELETE FROM response_search WHERE rowid = ?", (record_id,))
+    conn.execute(
+        """
+        INSERT INTO response_search (rowid, department_name, person_name, main_system, main_role, notes, other_text)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        """,
+        (record_id, *build_search_document(answers)),
+    )
+
+
+def delete_search_document(conn: sqlite3.Connection, record_id: int) -> None:
+    if FTS5_AVAILABLE:
+        conn.execute("DELETE FROM response_search WHERE rowid = ?", (record_id,))
+
+
+def rebuild_search_index(conn: sqlite3.Connection) -> None:
+    conn.execute("DELETE FROM response_search")
+    for record_id, answers_json in conn.execute("SELECT id, answers_json FROM responses"):
+        try:
+            answers = json.loads(answers_json)
+        except json.JSONDecodeError:
+            answers = {}
+        write_search_document(conn, record_id, answers)
+
+
+def build_search_filter(search_query: str) -> tuple[str, list]:
+    if not search_query.strip():
+        return "", []
+
+    if FTS5_AVAILABLE:
+        match_query = build_search_match_query(search_query)
+        if not match_query:
+            return "", []
+        return " AND id IN (SELECT rowid FROM response_search WHERE response_search MATCH ?)", [match_query]
+
+    terms = search_query.split()
+    clause = "".join(" AND answers_json LIKE ?" for _ in terms)
+    return clause, [f"%{term}%" for term in terms]
+
+
+def build_date_range_filter(date_from: str, date_to: str) -> tuple[str, list]:
+    # submitted_at is stored as ISO text, so whole-day bounds compare as plain
+    # strings and stay on the (survey_slug, ...) scan without any per-row parsing.
+    # Each bound is parsed on its own: a malformed one is ignored and the
+    # other still applies.
+    clause = ""
+    params: list = []
+    for value, operator, extra_days in ((date_from, ">=", 0), (date_to, "<", 1)):
+        if not value:
+            continue
+        try:
+            bound = datetime.strptime(value, "%Y-%m-%d") + timedelta(days=extra_days)
+        except ValueError:
+            continue
+        clause += f" AND submitted_at {operator} ?"
+        params.append(bound.strftime("%Y-%m-%d"))
+    return clause, params
+
+
+def build_export_filter(
+    date_from: str = "",
+    date_to: str = "",
+    department: str = "",
+    search_query: str = "",
+    main_system: str = "",
+    main_role: str = "",
+) -> tuple[str, list]:
+    date_clause, date_params = build_date_range_filter(date_from, date_to)
+    search_clause, search_params = build_search_filter(search_query)
+    facet_clause = ""
+    facet_params = []
+    for column, value in (("department_name", department), ("main_system", main_system), ("main_role", main_role)):
+        if value:
+            facet_clause += f" AND {column} = ?"
+            facet_params.append(value)
+    return date_clause + facet_clause + search_clause, [*date_params, *facet_params, *search_params]
+
+
+# Correlated lookup of the pre-rendered payload; takes (lang, definition hash)
+# parameters ahead of the WHERE clause and yields NULL when it is stale.
+REPORT_RENDER_COLUMN = """(
+    SELECT payload_json FROM response_renders
+    WHERE response_id = responses.id AND lang = ? AND definition_hash = ?
+) AS render_json"""
+
+
+def get_report_records(
+    lang: str = "zh-TW",
+    search_query: str = "",
+    record_id: int | None = None,
+    date_from: str = "",
+    date_to: str = "",
+    department: str = "",
+    from_snapshot: bool = False,
+    main_system: str = "",
+    main_role: str = "",
+    limit: int | None = None,
+    offset: int = 0,
+) -> list[dict]:
+    survey = get_active_survey()
+    filter_clause, filter_params = build_export_filter(date_from, date_to, department, search_query, main_system, main_role)
+    if record_id is not None:
+        filter_clause += " AND id = ?"
+        filter_params.append(record_id)
+    page_clause = ""
+    if limit is not None:
+        page_clause = " LIMIT ? OFFSET ?"
+        filter_params.extend([limit, offset])
+    with (connect_report_db() if from_snapshot else connect_db()) as conn:
         rows = conn.execute(
-            """
-            SELECT id, answers_json, submitted_at
+            f"""
+            SELECT id, answers_json, submitted_at, {REPORT_RENDER_COLUMN}
             FROM responses
-            WHERE survey_slug = ?
-            ORDER BY submitted_at DESC
+            WHERE survey_slug = ?{filter_clause}
+            ORDER BY submitted_at DESC, id DESC{page_clause}
             """,
-            (SURVEY_SLUG,),
+            (lang, survey["definition_hash"], survey["slug"], *filter_params),
         ).fetchall()
 
-    records = []
-    for row in rows:
-        submitted_raw = str(row[2])
-        submitted_date = "—"
-        submitted_time = "—"
-        submitted_display = format_report_datetime(submitted_raw, lang)
-        try:
-            submitted_dt = datetime.fromisoformat(submitted_raw)
-            submitted_date = submitted_dt.strftime("%Y-%m-%d")
-            submitted_time = submitted_dt.strftime("%H:%M:%S")
-        except ValueError:
-            if " " in submitted_display:
-                date_part, time_part = submitted_display.split(" ", 1)
-                if len(date_part) == 10 and "-" in date_part:
-                    submitted_date = date_part
-                if len(time_part) >= 8:
-                    submitted_time = time_part[:8]
+    return [build_report_record(row, lang) for row in rows]
 
-        try:
-            answers = json.loads(row[1])
-        except json.JSONDecodeError:
-            answers = {}
 
-        basic_items = []
-        questionnaire_items = []
-        for entry in REPORT_DEFINITION:
-            chips = build_report_value_parts(entry, answers, lang)
-            question_index, question_text = split_question_index_and_text(tr(entry["label"], lang))
-            item = {
-                "label": tr(entry["label"], lang),
-                "value": format_report_value(entry, answers, lang),
-                "chips": chips if chips else ["—"],
-                "question_index": question_index,
-                "question_text": question_text,
-            }
-            if entry["section"] == "basic":
-                basic_items.append(item)
-            else:
-                questionnaire_items.append(item)
+def split_submitted_at(submitted_raw: str, lang: str = "zh-TW") -> tuple[str, str, str]:
+    submitted_date = "—"
+    submitted_time = "—"
+    submitted_display = format_report_datetime(submitted_raw, lang)
+    try:
+        submitted_dt = datetime.fromisoformat(submitted_raw)
+        submitted_date = submitted_dt.strftime("%Y-%m-%d")
+        submitted_time = submitted_dt.strftime("%H:%M:%S")
+    except ValueError:
+        if " " in submitted_display:
+            date_part, time_part = submitted_display.split(" ", 1)
+            if len(date_part) == 10 and "-" in date_part:
+                submitted_date = date_part
+            if len(time_part) >= 8:
+                submitted_time = time_part[:8]
+    return submitted_display, submitted_date, submitted_time
 
-        records.append(
-            {
-                "id": row[0],
-                "submitted_at": submitted_display,
-                "submitted_date": submitted_date,
-                "submitted_time": submitted_time,
-                "department_name": str(answers.get("department_name", "")).strip() or "—",
-                "person_name": str(answers.get("person_name", "")).strip() or "—",
-                "main_system": str(answers.get("main_system", "")).strip() or "—",
-                "main_role": str(answers.get("main_role", "")).strip() or "—",
-                "basic_items": basic_items,
-                "questionnaire_items": questionnaire_items,
-                "answers": answers,
-            }
-        )
 
-    return records
+def build_report_record(row, lang: str = "zh-TW") -> dict:
+    submitted_display, submitted_date, submitted_time = split_submitted_at(str(row[2]), lang)
 
+    try:
+        answers = json.loads(row[1])
+    except json.JSONDecodeError:
+        answers = {}
 
-def build_report_summary(records: list[dict]) -> dict:
-    departments = {
-        record["department_name"]
-        for record in records
-        if record["department_name"] and record["department_name"] != "—"
-    }
+    # The write path stores each field's rendered value and chips per
+    # language; rebuild them only when the payload is missing or stale.
+    values = load_report_render(row[3]) if len(row) > 3 else None
+    if values is None or len(values) != len(get_active_survey()["report_definition"]):
+        values = build_report_values(answers, lang)
+    rendered = assemble_report_items(values, lang)
 
     return {
-        "total_submissions": len(records),
-        "department_count": len(departments),
-        "latest_submitted_at": records[0]["submitted_at"] if records else "—",
+        "id": row[0],
+        "submitted_at": submitted_display,
+        "submitted_date": submitted_date,
+        "submitted_time": submitted_time,
+        "department_name": str(answers.get("department_name", "")).strip() or "—",
+        "person_name": str(answers.get("person_name", "")).strip() or "—",
+        "main_system": str(answers.get("main_system", "")).strip() or "—",
+        "main_role": str(answers.get("main_role", "")).strip() or "—",
+        "basic_items": rendered["basic_items"],
+        "questionnaire_items": rendered["questionnaire_items"],
+        "answers": answers,
     }
 
 
-def filter_records_by_date(records: list[dict], selected_date: str) -> list[dict]:
-    if not selected_date:
-        return records
-    return [record for record in records if record.get("submitted_date") == selected_date]
+def build_report_values(answers: dict, lang: str, survey: dict | None = None) -> list[list]:
+    values = []
+    for entry in (survey or get_active_survey())["report_definition"]:
+        chips = build_report_value_parts(entry, answers, lang)
+        values.append([format_report_value(entry, answers, lang), chips if chips else ["—"]])
+    return values
+
+
+def assemble_report_items(values: list[list], lang: str) -> dict:
+    basic_items = []
+    questionnaire_items = []
+    labels = get_active_survey()["report_labels"][lang]
+    for (section, label, question_index, question_text), (value, chips) in zip(labels, values):
+        item = {
+            "label": label,
+            "value": value,
+            "chips": chips,
+            "question_index": question_index,
+            "question_text": question_text,
+        }
+        if section == "basic":
+            basic_items.append(item)
+        else:
+            questionnaire_items.append(item)
+
+    return {"basic_items": basic_items, "questionnaire_items": questionnaire_items}
 
 
-def build_available_dates(records: list[dict]) -> list[str]:
-    return sorted(
-        {record.get("submitted_date", "") for record in records if record.get("submitted_date") and record.get("submitted_date") != "—"},
-        reverse=True,
+def load_report_render(payload_json: str | None) -> list | None:
+    if not payload_json:
+        return None
+    try:
+        return json.loads(payload_json)
+    except json.JSONDecodeError:
+        return None
+
+
+def write_report_renders(conn: sqlite3.Connection, record_id: int, answers: dict, survey: dict | None = None) -> None:
+    survey = survey or get_active_survey()
+    conn.executemany(
+        """
+        INSERT INTO response_renders (response_id, lang, definition_hash, payload_json)
+        VALUES (?, ?, ?, ?)
+        ON CONFLICT(response_id, lang)
+        DO UPDATE SET definition_hash = excluded.definition_hash,
+                      payload_json = excluded.payload_json
+        """,
+        [
+            (
+                record_id,
+                lang,
+                survey["definition_hash"],
+                json.dumps(build_report_values(answers, lang, survey), ensure_ascii=False, separators=(",", ":")),
+            )
+            for lang in sorted(SUPPORTED_LANGS)
+        ],
     )
 
 
+def delete_report_renders(conn: sqlite3.Connection, record_id: int) -> None:
+    conn.execute("DELETE FROM response_renders WHERE response_id = ?", (record_id,))
+
+
+def refresh_stale_report_renders(conn: sqlite3.Connection, batch_size: int = MIGRATION_BATCH_SIZE) -> int:
+    """Re-render only the rows whose stored renders miss the current definition hash.
+
+    Stale rows are picked and rewritten ``batch_size`` at a time, each batch
+    in its own write transaction (unless the caller already holds one), so
+    a definition change never rewrites every row in one pass. Returns the
+    number of rows re-rendered.
+    """
+    refreshed = 0
+    survey_slugs = [row[0] for row in conn.execute("SELECT DISTINCT survey_slug FROM responses")]
+    for survey_slug in survey_slugs:
+        survey = get_survey(survey_slug)
+        if survey is None:
+            continue
+        last_id = 0
+        while True:
+            opened_transaction = not conn.in_transaction
+            if opened_transaction:
+                # Read the batch under the write lock so a concurrent submit
+                # cannot be overwritten with the answers read here.
+                conn.execute("BEGIN IMMEDIATE")
+            cursor = conn.execute(
+                """
+                SELECT id, answers_json FROM responses
+                WHERE survey_slug = ? AND id > ?
+                  AND (
+                      SELECT COUNT(*) FROM response_renders
+                      WHERE response_id = responses.id AND definition_hash = ?
+                  ) < ?
+                ORDER BY id
+                LIMIT ?
+                """,
+                (survey_slug, last_id, survey["definition_hash"], len(SUPPORTED_LANGS), batch_size),
+            )
+            processed = 0
+            for record_id, answers_json in cursor:
+                try:
+                    answers = json.loads(answers_json)
+                except json.JSONDecodeError:
+                    answers = {}
+                write_report_renders(conn, record_id, answers, survey)
+                last_id = record_id
+                processed += 1
+            if opened_transaction:
+                conn.commit()
+            refreshed += processed
+            if processed < batch_size:
+                break
+    return refreshed
+
+
+def get_report_facets(filters: dict) -> dict:
+    """Counts for every report facet under ``filters``, from one grouped query.
+
+    The survey's rows are grouped by day, department, system and role from
+    responses_survey_facets, which holds every grouped value (the planner
+    prefers the narrower submitted index without the hint), and the groups
+    are folded here. Each facet counts the rows that match every
+    other filter, so its options show what picking them would leave.
+    """
+    search_clause, search_params = build_search_filter(filters.get("search_query", ""))
+    with connect_db() as conn:
+        groups = conn.execute(
+            f"""
+            SELECT substr(submitted_at, 1, 10), department_name, main_system, main_role, COUNT(*), MAX(submitted_at)
+            FROM responses INDEXED BY responses_survey_facets
+            WHERE survey_slug = ?{search_clause}
+            GROUP BY 1, 2, 3, 4
+            """,
+            (get_active_survey()["slug"], *search_params),
+        ).fetchall()
+
+    try:
+        date_from = datetime.strptime(filters["date_from"], "%Y-%m-%d").strftime("%Y-%m-%d") if filters["date_from"] else ""
+        date_to = datetime.strptime(filters["date_to"], "%Y-%m-%d").strftime("%Y-%m-%d") if filters["date_to"] else ""
+    except ValueError:
+        date_from = date_to = ""
+    selected = {
+        "department_name": filters.get("department", ""),
+        "main_system": filters.get("main_system", ""),
+        "main_role": filters.get("main_role", ""),
+    }
+    facet_counts: dict[str, dict[str, int]] = {facet: {} for facet in REPORT_FACETS}
+    date_counts: dict[str, int] = {}
+    total = 0
+    departments = set()
+    latest = None
+    for day, department_name, main_system, main_role, count, latest_at in groups:
+        values = {"department_name": department_name, "main_system": main_system or "", "main_role": main_role or ""}
+        matches = {facet: not selected[facet] or values[facet] == selected[facet] for facet in REPORT_FACETS}
+        matches_all = all(matches.values())
+        if matches_all:
+            date_counts[day] = date_counts.get(day, 0) + count
+        if (date_from and day < date_from) or (date_to and day > date_to):
+            continue
+        for facet in REPORT_FACETS:
+            if all(matched for other, matched in matches.items() if other != facet):
+                facet_counts[facet][values[facet]] = facet_counts[facet].get(values[facet], 0) + count
+        if matches_all:
+            total += count
+            if department_name:
+                departments.add(department_name)
+            latest = max(latest or latest_at, latest_at)
+
+    facets = {}
+    for facet, counts in facet_counts.items():
+        options = sorted(((value, count) for value, count in counts.items() if value), key=lambda item: (-item[1], item[0]))
+        if selected[facet] and selected[facet] not in counts:
+            options.append((selected[facet], counts.get(selected[facet], 0)))
+        facets[facet] = [{"value": value, "count": count} for value, count in options]
+    return {
+        "total": total,
+        "department_count": len(departments),
+        "latest_submitted_at": latest,
+        "dates": [{"value": day, "count": count} for day, count in sorted(date_counts.items(), reverse=True)],
+        "facets": facets,
+    }
+
+
 def normalize_positive_int(raw_value: str | None, default_value: int) -> int:
     try:
         parsed = int(str(raw_value))
@@ -591,16 +1007,14 @@ def normalize_positive_int(raw_value: str | None, default_value: int) -> int:
         return default_value
 
 
-def paginate_records(records: list[dict], page: int, per_page: int) -> tuple[list[dict], int, int]:
-    total = len(records)
-    if total == 0:
-        return [], 1, 1
+COMPILED_SURVEY_CACHE_SIZE = normalize_positive_int(os.getenv(COMPILED_SURVEY_CACHE_SIZE_ENV), 32)
+SURVEY_RELOAD_INTERVAL_SECONDS = normalize_positive_int(os.getenv(SURVEY_RELOAD_INTERVAL_ENV), 2)
+MISSING_SURVEY_CACHE_SIZE = 256
+
 
-    total_pages = (total + per_page - 1) // per_page
-    current_page = min(max(page, 1), total_pages)
-    start = (current_page - 1) * per_page
-    end = start + per_page
-    return records[start:end], current_page, total_pages
+def paginate(total: int, page: int, per_page: int) -> tuple[int, int]:
+    total_pages = max((total + per_page - 1) // per_page, 1)
+    return min(max(page, 1), total_pages), total_pages
 
 
 def format_filter_date_value(selected_date: str, lang: str) -> str:
@@ -618,7 +1032,7 @@ def build_report_csv(records: list[dict]) -> str:
     excluded_basic_names = {"department_name", "person_name", "main_system", "main_role"}
     detail_entries = [
         entry
-        for entry in REPORT_DEFINITION
+        for entry in get_active_survey()["report_definition"]
         if entry["name"] not in excluded_basic_names
     ]
 
@@ -640,6 +1054,164 @@ def build_report_csv(records: list[dict]) -> str:
     return "\ufeff" + output.getvalue()
 
 
+def iter_export_rows(
+    export_filter: dict | None = None,
+    start_key: tuple[str, int] | None = None,
+    end_key: tuple[str, int] | None = None,
+    render_lang: str | None = None,
+):
+    # Rows come back newest first; start_key (inclusive) and end_key
+    # (exclusive) bound a contiguous (submitted_at, id) slice of that order.
+    filter_clause, filter_params = build_export_filter(**(export_filter or {}))
+    if start_key is not None:
+        filter_clause += " AND (submitted_at, id) <= (?, ?)"
+        filter_params.extend(start_key)
+    if end_key is not None:
+        filter_clause += " AND (submitted_at, id) > (?, ?)"
+        filter_params.extend(end_key)
+    survey = get_active_survey()
+    render_column, render_params = "", []
+    if render_lang is not None:
+        render_column, render_params = f", {REPORT_RENDER_COLUMN}", [render_lang, survey["definition_hash"]]
+    with connect_report_db() as conn:
+        cursor = conn.execute(
+            f"""
+            SELECT id, answers_json, submitted_at{render_column}
+            FROM responses
+            WHERE survey_slug = ?{filter_clause}
+            ORDER BY submitted_at DESC, id DESC
+            """,
+            (*render_params, survey["slug"], *filter_params),
+        )
+        while rows := cursor.fetchmany(EXPORT_FETCH_SIZE):
+            yield rows
+
+
+def iter_report_ndjson(export_filter: dict | None = None):
+    # answers_json is already canonical JSON written by persist_response, so it
+    # is spliced into each line as-is instead of being parsed and re-dumped.
+    for rows in iter_export_rows(export_filter):
+        yield "".join(
+            f'{{"id": {record_id}, "submitted_at": {json.dumps(submitted_at)}, "answers": {answers_json}}}\n'
+            for record_id, answers_json, submitted_at in rows
+        )
+
+
+def build_columnar_export_layout() -> tuple[list[dict], list[tuple]]:
+    """Column names and types of the columnar export, and how to fill each."""
+    columns = [
+        {"name": "id", "type": "int64"},
+        {"name": "submitted_at", "type": "timestamp_ms"},
+    ]
+    extractors = []
+    for field in get_active_survey()["form_definition"]:
+        if field["type"] == "text_pair":
+            text_names = [field["left"]["name"], field["right"]["name"]]
+        elif field["type"] == "multiselect":
+            for option in field["options"]:
+                columns.append({"name": f"{field['name']}.{option}", "type": "bool"})
+                extractors.append(("option", field, option))
+            text_names = [f"{field['name']}_other"] if field.get("allow_other") else []
+        else:
+            text_names = [field["name"]]
+        for name in text_names:
+            columns.append({"name": name, "type": "string"})
+            extractors.append(("text", name, None))
+    return columns, extractors
+
+
+def iter_columnar_export_batches(export_filter: dict | None = None, batch_rows: int = PARQUET_ROW_GROUP_ROWS):
+    """Yield the export as column lists holding at most ``batch_rows`` rows."""
+    layout, extractors = build_columnar_export_layout()
+    option_sets = get_active_survey()["option_sets"]
+    columns = None
+    for rows in iter_export_rows(export_filter):
+        for record_id, answers_json, submitted_at in rows:
+            if columns is None:
+                columns = [{**column, "values": []} for column in layout]
+                value_lists = [column["values"] for column in columns]
+            try:
+                answers = json.loads(answers_json)
+            except json.JSONDecodeError:
+                answers = {}
+            try:
+                submitted_ms = (datetime.fromisoformat(submitted_at) - EXPORT_EPOCH) // timedelta(milliseconds=1)
+            except ValueError:
+                submitted_ms = 0
+            value_lists[0].append(record_id)
+            value_lists[1].append(submitted_ms)
+
+            selected_cache: dict[str, set] = {}
+            for values, (kind, target, option) in zip(value_lists[2:], extractors):
+                if kind == "text":
+                    values.append(str(answers.get(target, "") or ""))
+                    continue
+                selected = selected_cache.get(target["name"])
+                if selected is None:
+                    raw_values = answers.get(target["name"], [])
+                    if not isinstance(raw_values, list):
+                        raw_values = [raw_values]
+                    selected = {
+                        value if value in option_sets[target["name"]] else canonicalize_selected_option(target, str(value))
+                        for value in raw_values
+                    }
+                    selected_cache[target["name"]] = selected
+                values.append(option in selected)
+
+            if len(value_lists[0]) >= batch_rows:
+                yield columns
+                columns = None
+    if columns is not None:
+        yield columns
+
+
+def build_arrow_table(columns: list[dict]):
+    arrow_types = {
+        "bool": pyarrow.bool_(),
+        "int64": pyarrow.int64(),
+        "string": pyarrow.string(),
+        "timestamp_ms": pyarrow.timestamp("ms"),
+    }
+    return pyarrow.table(
+        {column["name"]: pyarrow.array(column.get("values", []), type=arrow_types[column["type"]]) for column in columns}
+    )
+
+
+class ExportChunkSink(io.RawIOBase):
+    """Write-only file that collects what a writer emits until it is drained."""
+
+    def __init__(self):
+        super().__init__()
+        self.chunks: list[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+def iter_report_parquet(export_filter: dict | None = None):
+    # One row group per batch: each group is flushed to the response as soon
+    # as it is written, so memory stays at one batch whatever the row count.
+    sink = ExportChunkSink()
+    layout, _extractors = build_columnar_export_layout()
+    writer = pyarrow_parquet.ParquetWriter(sink, build_arrow_table(layout).schema, compression="zstd")
+    try:
+        for columns in iter_columnar_export_batches(export_filter, PARQUET_ROW_GROUP_ROWS):
+            writer.write_table(build_arrow_table(columns))
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
 def normalize_import_submitted_at(value: str) -> str:
     raw_value = str(value).strip()
     if not raw_value or raw_value == "—":
@@ -679,7 +1251,7 @@ def import_report_csv(csv_text: str) -> int:
         return 0
 
     import_count = 0
-    detail_entry_map = {entry["label"]: entry for entry in REPORT_DEFINITION}
+    detail_entry_map = {entry["label"]: entry for entry in get_active_survey()["report_definition"]}
 
     for row in reader:
         if not row:
@@ -713,57 +1285,229 @@ def import_report_csv(csv_text: str) -> int:
     return import_count
 
 
-def build_report_pdf(records: list[dict], summary: dict) -> bytes:
-    buffer = io.BytesIO()
-    pdf = canvas.Canvas(buffer, pagesize=A4)
-    pdfmetrics.registerFont(UnicodeCIDFont("STSong-Light"))
-    pdf.setFont("STSong-Light", 11)
-
-    page_width, page_height = A4
-    left = 40
-    y = page_height - 40
-
-    pdf.setFont("STSong-Light", 14)
-    pdf.drawString(left, y, f"管理者報表｜{SURVEY_TITLE}")
-    y -= 24
-
-    pdf.setFont("STSong-Light", 10)
-    pdf.drawString(left, y, f"提交總筆數：{summary['total_submissions']}")
-    y -= 16
-    pdf.drawString(left, y, f"部門數：{summary['department_count']}")
-    y -= 16
-    pdf.drawString(left, y, f"最新提交時間：{summary['latest_submitted_at']}")
-    y -= 24
-
-    for idx, record in enumerate(records, start=1):
-        lines = [
-            f"[{idx}] 提交時間：{record['submitted_at']}",
-            f"部門：{record['department_name']}｜訪談人員：{record['person_name']}",
-            f"主測系統：{record['main_system']}｜主測角色：{record['main_role']}",
-        ]
+def iter_report_records(
+    export_filter: dict | None = None,
+    lang: str = "zh-TW",
+    start_key: tuple[str, int] | None = None,
+    end_key: tuple[str, int] | None = None,
+):
+    for rows in iter_export_rows(export_filter, start_key, end_key, render_lang=lang):
+        for row in rows:
+            yield build_report_record(row, lang)
+
+
+def new_question_tallies() -> dict:
+    return {
+        entry["name"]: {"options": {option: 0 for option in entry.get("options", [])}, "other": 0, "answered": 0}
+        for entry in get_active_survey()["report_definition"]
+        if entry["section"] != "basic"
+    }
+
+
+def tally_report_answers(tallies: dict, answers: dict) -> None:
+    for entry in get_active_survey()["report_definition"]:
+        tally = tallies.get(entry["name"])
+        if tally is None:
+            continue
+        if entry["type"] != "multiselect":
+            tally["answered"] += bool(str(answers.get(entry["name"], "")).strip())
+            continue
+
+        selected = answers.get(entry["name"], [])
+        if not isinstance(selected, list):
+            selected = [selected]
+        canonical_values = {canonicalize_selected_option(entry, str(value).strip()) for value in selected if str(value).strip()}
+        for value in canonical_values:
+            if value in tally["options"]:
+                tally["options"][value] += 1
+        has_other = bool(str(answers.get(f"{entry['name']}_other", "")).strip())
+        tally["other"] += has_other
+        tally["answered"] += bool(canonical_values) or has_other
+
+
+def build_question_summaries(tallies: dict, total: int) -> list[dict]:
+    summaries = []
+    for entry in get_active_survey()["report_definition"]:
+        tally = tallies.get(entry["name"])
+        if tally is None:
+            continue
+        rows = list(tally["options"].items())
+        if entry.get("allow_other"):
+            rows.append(("其他", tally["other"]))
+        summaries.append({"label": entry["label"], "answered": tally["answered"], "total": total, "rows": rows})
+    return summaries
+
+
+def describe_export_filter(export_filter: dict | None) -> str:
+    export_filter = export_filter or {}
+    parts = []
+    if export_filter.get("date_from") or export_filter.get("date_to"):
+        parts.append(f"日期：{export_filter.get('date_from') or '…'} ~ {export_filter.get('date_to') or '…'}")
+    if export_filter.get("department"):
+        parts.append(f"部門：{export_filter['department']}")
+    if export_filter.get("main_system"):
+        parts.append(f"主測系統：{export_filter['main_system']}")
+    if export_filter.get("main_role"):
+        parts.append(f"主測角色：{export_filter['main_role']}")
+    if export_filter.get("search_query"):
+        parts.append(f"關鍵字：{export_filter['search_query']}")
+    return "；".join(parts) or "全部資料"
+
+
+PDF_RENDER_WORKERS = normalize_positive_int(os.getenv(PDF_RENDER_WORKERS_ENV), 1)
+
 
-        for item in record["questionnaire_items"]:
-            lines.append(f"- {item['label']}：{item['value']}")
+def new_pdf_stats() -> dict:
+    return {"total": 0, "departments": set(), "latest": None, "tallies": new_question_tallies()}
 
-        for line in lines:
-            if y < 45:
-                pdf.showPage()
-                pdf.setFont("STSong-Light", 10)
-                y = page_height - 40
-            pdf.drawString(left, y, line[:120])
-            y -= 14
 
-        y -= 6
+def track_pdf_records(stats: dict, records):
+    for record in records:
+        if stats["latest"] is None:
+            stats["latest"] = record["submitted_at"]
+        stats["total"] += 1
+        if record["department_name"] != "—":
+            stats["departments"].add(record["department_name"])
+        tally_report_answers(stats["tallies"], record["answers"])
+        yield record
+
+
+def merge_pdf_stats(stats: dict, other: dict) -> None:
+    if stats["latest"] is None:
+        stats["latest"] = other["latest"]
+    stats["total"] += other["total"]
+    stats["departments"] |= other["departments"]
+    for name, tally in other["tallies"].items():
+        merged = stats["tallies"][name]
+        merged["other"] += tally["other"]
+        merged["answered"] += tally["answered"]
+        for option, count in tally["options"].items():
+            merged["options"][option] += count
+
+
+def plan_pdf_render_ranges(export_filter: dict | None, range_size: int) -> list[dict]:
+    """Split the export order into contiguous keyset ranges of ``range_size`` rows."""
+    filter_clause, filter_params = build_export_filter(**(export_filter or {}))
+    with connect_report_db() as conn:
+        boundaries = conn.execute(
+            f"""
+            SELECT submitted_at, id, previous_submitted_at, row_number
+            FROM (
+                SELECT submitted_at,
+                       id,
+                       LAG(submitted_at) OVER export_order AS previous_submitted_at,
+                       ROW_NUMBER() OVER export_order AS row_number
+                FROM responses
+                WHERE survey_slug = ?{filter_clause}
+                WINDOW export_order AS (ORDER BY submitted_at DESC, id DESC)
+            )
+            WHERE (row_number - 1) % ? = 0
+            ORDER BY row_number
+            """,
+            (get_active_survey()["slug"], *filter_params, range_size),
+        ).fetchall()
+
+    ranges = []
+    for position, (submitted_at, record_id, previous_submitted_at, row_number) in enumerate(boundaries):
+        next_boundary = boundaries[position + 1] if position + 1 < len(boundaries) else None
+        ranges.append(
+            {
+                "start_key": (submitted_at, record_id),
+                "end_key": (next_boundary[0], next_boundary[1]) if next_boundary else None,
+                "first_index": row_number,
+                "survey_slug": get_active_survey()["slug"],
+                "current_section": split_submitted_at(previous_submitted_at)[1] if previous_submitted_at else None,
+            }
+        )
+    return ranges
+
+
+def init_pdf_render_worker(db_path: str) -> None:
+    global DB_PATH
+    DB_PATH = Path(db_path)
+
+
+def render_pdf_record_range(export_filter: dict | None, render_range: dict) -> tuple[list[tuple[bytes, list[str]]], dict]:
+    ACTIVE_SURVEY_SLUG.set(render_range["survey_slug"])
+    stats = new_pdf_stats()
+    records = track_pdf_records(
+        stats,
+        iter_report_records(export_filter, start_key=render_range["start_key"], end_key=render_range["end_key"]),
+    )
+    pages = [
+        (compress_page(content), sections)
+        for content, sections in iter_record_pages(records, render_range["first_index"], render_range["current_section"])
+    ]
+    return pages, stats
+
+
+def render_pdf_pages_in_parallel(writer: ReportPdfWriter, stats: dict, export_filter: dict | None, workers: int) -> None:
+    render_ranges = plan_pdf_render_ranges(export_filter, PDF_RENDER_RANGE_RECORDS)
+    # spawn rather than fork: the serving process may be multi-threaded.
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=init_pdf_render_worker,
+        initargs=(str(DB_PATH),),
+    ) as executor:
+        # Only a bounded window of ranges is in flight, so finished-but-not-yet
+        # written ranges cannot pile up in memory behind a slow one.
+        remaining = iter(render_ranges)
+        pending = deque(
+            executor.submit(render_pdf_record_range, export_filter, render_range)
+            for render_range in islice(remaining, workers * 2)
+        )
+        while pending:
+            pages, range_stats = pending.popleft().result()
+            next_range = next(remaining, None)
+            if next_range is not None:
+                pending.append(executor.submit(render_pdf_record_range, export_filter, next_range))
+            for content, sections in pages:
+                writer.add_record_page(content, sections)
+            merge_pdf_stats(stats, range_stats)
+
+
+def write_report_pdf(stream, export_filter: dict | None = None, workers: int | None = None) -> int:
+    """Render the filtered report into ``stream`` one page at a time; returns the page count.
+
+    With ``workers`` > 1 the records are laid out in contiguous ranges by a
+    process pool and the finished pages are appended in order.
+    """
+    workers = workers or PDF_RENDER_WORKERS
+    writer = ReportPdfWriter(stream, get_active_survey()["title"])
+    stats = new_pdf_stats()
+    if workers > 1:
+        render_pdf_pages_in_parallel(writer, stats, export_filter, workers)
+    else:
+        writer.add_records(track_pdf_records(stats, iter_report_records(export_filter)))
+
+    overview_lines = [
+        f"篩選條件：{describe_export_filter(export_filter)}",
+        f"提交總筆數：{stats['total']}",
+        f"部門數：{len(stats['departments'])}",
+        f"最新提交時間：{stats['latest'] or '—'}",
+        f"產生時間：{now():%Y-%m-%d %H:%M:%S}",
+    ]
+    return writer.finish(overview_lines, build_question_summaries(stats["tallies"], stats["total"]))
 
-    pdf.save()
-    return buffer.getvalue()
+
+def iter_spooled_file(spool, chunk_size: int = PDF_STREAM_CHUNK_BYTES):
+    try:
+        while chunk := spool.read(chunk_size):
+            yield chunk
+    finally:
+        spool.close()
 
 
-def print_startup_info() -> None:
+def print_startup_info(port: int = 5000) -> None:
     print("=" * 60)
-    print(f"問卷：{SURVEY_TITLE}")
-    print(f"開放時間：{OPEN_START_AT:%Y-%m-%d %H:%M} ~ {OPEN_END_AT:%Y-%m-%d %H:%M}")
-    print(f"短網址路徑：http://<你的內網IP>:5000/q/{SURVEY_SLUG}")
+    for slug in list_survey_slugs():
+        survey = get_survey(slug)
+        if survey is None:
+            continue
+        print(f"問卷：{survey['title']}")
+        print(f"開放時間：{survey['open_start_at']:%Y-%m-%d %H:%M} ~ {survey['open_end_at']:%Y-%m-%d %H:%M}")
+        print(f"短網址路徑：http://<你的內網IP>:{port}/q/{slug}")
     if ENV_FILE_AUTO_CREATED:
         print("已自動建立 .env（由 .env.example 複製），請依需求修改帳密。")
     print("=" * 60)
@@ -816,143 +1560,1838 @@ def build_questionnaire_rows(fields: list[dict]) -> list[list[dict]]:
     return rows
 
 
-def init_db() -> None:
-    with sqlite3.connect(DB_PATH) as conn:
-        existing_columns = conn.execute("PRAGMA table_info(responses)").fetchall()
-        if existing_columns:
-            expected_columns = {
-                "id",
-                "survey_slug",
-                "department_name",
-                "person_name",
-                "answers_json",
-                "submitted_at",
-            }
-            current_columns = {column[1] for column in existing_columns}
-            if current_columns != expected_columns:
-                conn.execute("DROP TABLE responses")
-
-        conn.execute(
-            """
-            CREATE TABLE IF NOT EXISTS responses (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                survey_slug TEXT NOT NULL,
-                department_name TEXT NOT NULL,
-                person_name TEXT NOT NULL,
-                answers_json TEXT NOT NULL,
-                submitted_at TEXT NOT NULL,
-                UNIQUE(survey_slug, department_name, person_name)
-            )
-            """
-        )
-        conn.commit()
+def connect_db() -> sqlite3.Connection:
+    return sqlite3.connect(DB_PATH, timeout=SQLITE_BUSY_TIMEOUT_SECONDS)
 
 
-def now() -> datetime:
-    return datetime.now()
+REPORT_SNAPSHOT_INTERVAL_SECONDS = normalize_positive_int(os.getenv(REPORT_SNAPSHOT_INTERVAL_ENV), 0)
 
 
-def is_survey_open() -> bool:
-    current = now()
-    return OPEN_START_AT <= current <= OPEN_END_AT
+def get_report_snapshot_path() -> Path:
+    return DB_PATH.with_name(f"{DB_PATH.stem}.report-snapshot.db")
 
 
-def collect_answers(fields: list[dict]) -> dict:
-    payload = {}
-    for field in fields:
-        field_type = field["type"]
-        name = field["name"]
+def connect_report_db() -> sqlite3.Connection:
+    # Exports read the periodically refreshed snapshot when it is enabled, so
+    # long scans never hold read transactions on the live database.
+    snapshot_path = get_report_snapshot_path()
+    if REPORT_SNAPSHOT_INTERVAL_SECONDS and snapshot_path.exists():
+        return sqlite3.connect(f"{snapshot_path.as_uri()}?mode=ro", uri=True, timeout=SQLITE_BUSY_TIMEOUT_SECONDS)
+    return connect_db()
 
-        if field_type == "multiselect":
-            payload[name] = request.form.getlist(name)
-            if field.get("allow_other"):
-                payload[f"{name}_other"] = request.form.get(f"{name}_other", "").strip()
-        elif field_type == "text_pair":
-            left_name = field["left"]["name"]
-            right_name = field["right"]["name"]
-            payload[left_name] = request.form.get(left_name, "").strip()
-            payload[right_name] = request.form.get(right_name, "").strip()
-        else:
-            payload[name] = request.form.get(name, "").strip()
 
-    return payload
+def backup_database(
+    target_path: Path,
+    pages_per_step: int = BACKUP_PAGES_PER_STEP,
+    pause_seconds: float = BACKUP_STEP_PAUSE_SECONDS,
+) -> dict:
+    """Copy the live database to ``target_path`` with the online backup API.
 
+    Pages are copied ``pages_per_step`` at a time (all at once when it is not
+    positive) with a pause in between so submissions keep flowing. The copy
+    is written next to the target under a name of its own, so concurrent
+    copies to the same target never share a file, and renamed into place.
+    """
+    target_path = Path(target_path)
+    target_path.parent.mkdir(parents=True, exist_ok=True)
+    partial_path = target_path.with_name(f"{target_path.name}.{secrets.token_hex(4)}.partial")
+    progress_state = {"steps": 0, "restarts": 0, "remaining": None, "pages": 0}
 
-def save_response_record(answers: dict, submitted_at: str | None = None) -> None:
-    department_name = str(answers.get("department_name", "")).strip()
-    person_name = str(answers.get("person_name", "")).strip()
-    persisted_at = submitted_at or now().isoformat(timespec="seconds")
+    def pace(status: int, remaining: int, total: int) -> None:
+        progress_state["steps"] += 1
+        progress_state["pages"] = total
+        if progress_state["remaining"] is not None and remaining > progress_state["remaining"]:
+            progress_state["restarts"] += 1
+        progress_state["remaining"] = remaining
+        if remaining and pause_seconds > 0:
+            sleep(pause_seconds)
 
-    with sqlite3.connect(DB_PATH) as conn:
-        conn.execute(
-            """
-            INSERT INTO responses (survey_slug, department_name, person_name, answers_json, submitted_at)
-            VALUES (?, ?, ?, ?, ?)
-            ON CONFLICT(survey_slug, department_name, person_name)
-            DO UPDATE SET answers_json = excluded.answers_json,
-                          submitted_at = excluded.submitted_at
-            """,
-            (SURVEY_SLUG, department_name, person_name, json.dumps(answers, ensure_ascii=False), persisted_at),
-        )
-        conn.commit()
+    started = perf_counter()
+    destination = sqlite3.connect(partial_path)
+    try:
+        try:
+            with connect_db() as source:
+                # Holding one read transaction across every step pins the WAL
+                # snapshot: submissions keep committing, but they no longer
+                # restart the copy, and the result is a single point in time.
+                source.execute("BEGIN")
+                source.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+                try:
+                    source.backup(destination, pages=pages_per_step, progress=pace)
+                finally:
+                    source.rollback()
+            # A standalone rollback-journal file can be opened read-only
+            # without the -wal/-shm companions a WAL database would need.
+            destination.execute("PRAGMA journal_mode=DELETE")
+        finally:
+            destination.close()
+        os.replace(partial_path, target_path)
+    except BaseException:
+        partial_path.unlink(missing_ok=True)
+        raise
 
+    return {
+        "path": str(target_path),
+        "bytes": target_path.stat().st_size,
+        "pages": progress_state["pages"],
+        "steps": progress_state["steps"],
+        "restarts": progress_state["restarts"],
+        "seconds": round(perf_counter() - started, 3),
+    }
 
-def upsert_response(answers: dict) -> None:
-    save_response_record(answers)
 
+def create_database_backup(pages_per_step: int = BACKUP_PAGES_PER_STEP, pause_seconds: float = BACKUP_STEP_PAUSE_SECONDS) -> dict:
+    target_path = BACKUP_DIR / f"{DB_PATH.stem}-{now():%Y%m%d-%H%M%S}-{secrets.token_hex(2)}.db"
+    result = backup_database(target_path, pages_per_step, pause_seconds)
+    backups = sorted(BACKUP_DIR.glob(f"{DB_PATH.stem}-*.db"))
+    for stale_path in backups[: max(len(backups) - BACKUP_MAX_FILES, 0)]:
+        stale_path.unlink(missing_ok=True)
+    return result
 
-def apply_common_cookies(response, lang: str):
-    response.set_cookie(LANG_COOKIE_NAME, lang, max_age=60 * 60 * 24 * 365)
-    return response
 
+def refresh_report_snapshot(force: bool = False) -> bool:
+    snapshot_path = get_report_snapshot_path()
+    if not force and snapshot_path.exists():
+        age_seconds = datetime.now().timestamp() - snapshot_path.stat().st_mtime
+        if age_seconds < REPORT_SNAPSHOT_INTERVAL_SECONDS:
+            return False
+    holder = claim_maintenance_lease("report-snapshot", max(REPORT_SNAPSHOT_INTERVAL_SECONDS, 60))
+    if holder is None:
+        return False
+    try:
+        backup_database(snapshot_path)
+    finally:
+        release_maintenance_lease("report-snapshot", holder)
+    return True
 
-def get_guest_credentials() -> tuple[str, str]:
-    username = os.getenv(GUEST_USERNAME_ENV, "guest").strip() or "guest"
-    password = os.getenv(GUEST_PASSWORD_ENV, "guest").strip() or "guest"
-    return username, password
 
+def run_report_snapshot_refresher(stop_event: threading.Event) -> None:
+    # Every serving process runs one of these; the mtime check above keeps
+    # them from refreshing the shared snapshot more than once per interval,
+    # and the lease lets only one of them copy at a time.
+    while not stop_event.is_set():
+        try:
+            refresh_report_snapshot()
+        except (sqlite3.Error, OSError) as error:
+            print(f"report snapshot refresh failed: {error}")
+        stop_event.wait(REPORT_SNAPSHOT_INTERVAL_SECONDS)
+
+
+def start_report_snapshot_refresher() -> threading.Event | None:
+    if not REPORT_SNAPSHOT_INTERVAL_SECONDS:
+        return None
+    stop_event = threading.Event()
+    threading.Thread(
+        target=run_report_snapshot_refresher,
+        args=(stop_event,),
+        name="report-snapshot",
+        daemon=True,
+    ).start()
+    return stop_event
+
+
+RESPONSES_BASE_COLUMNS = frozenset(
+    {"id", "survey_slug", "department_name", "person_name", "answers_json", "submitted_at"}
+)
 
-def get_admin_credentials() -> tuple[str, str]:
-    username = os.getenv(ADMIN_USERNAME_ENV, "admin").strip() or "admin"
-    password = os.getenv(ADMIN_PASSWORD_ENV, "admin").strip() or "admin"
-    return username, password
 
+def table_exists(conn: sqlite3.Connection, table: str) -> bool:
+    row = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)).fetchone()
+    return row is not None
+
+
+def add_column_if_missing(conn: sqlite3.Connection, table: str, column: str, definition: str) -> None:
+    # table_xinfo also lists generated columns, which table_info hides.
+    columns = {row[1] for row in conn.execute(f"PRAGMA table_xinfo({table})")}
+    if column not in columns:
+        conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+
+def migrate_create_responses(conn: sqlite3.Connection) -> None:
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(responses)")}
+    if columns and not RESPONSES_BASE_COLUMNS <= columns:
+        # Older layouts used to be dropped here; refuse instead so nothing is lost.
+        missing = ", ".join(sorted(RESPONSES_BASE_COLUMNS - columns))
+        raise RuntimeError(f"responses 資料表缺少欄位：{missing}，請先備份後手動轉換")
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS responses (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            survey_slug TEXT NOT NULL,
+            department_name TEXT NOT NULL,
+            person_name TEXT NOT NULL,
+            answers_json TEXT NOT NULL,
+            submitted_at TEXT NOT NULL,
+            UNIQUE(survey_slug, department_name, person_name)
+        )
+        """
+    )
 
-def build_auth_cookie_token(role: str) -> str:
-    if role == "admin":
-        _, password = get_admin_credentials()
-        return f"admin:{password}"
 
-    _, password = get_guest_credentials()
-    return f"guest:{password}"
+def migrate_create_responses_index(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS responses_survey_submitted ON responses (survey_slug, submitted_at, id)"
+    )
 
 
-def build_report_auth_cookie_value(role: str, expires_at: int) -> str:
-    return f"{build_auth_cookie_token(role)}|{expires_at}"
+def migrate_create_response_renders(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS response_renders (
+            response_id INTEGER NOT NULL,
+            lang TEXT NOT NULL,
+            definition_hash TEXT NOT NULL,
+            payload_json TEXT NOT NULL,
+            PRIMARY KEY (response_id, lang)
+        ) WITHOUT ROWID
+        """
+    )
 
 
-def set_report_auth_cookie(response, role: str, expires_at: int | None = None):
-    cookie_expires_at = expires_at if expires_at is not None else int(now().timestamp()) + REPORT_SESSION_TIMEOUT_SECONDS
-    response.set_cookie(
-        REPORT_AUTH_COOKIE_NAME,
-        build_report_auth_cookie_value(role, cookie_expires_at),
-        max_age=60 * 60 * 8,
-        httponly=True,
+def migrate_create_api_idempotency_keys(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS api_idempotency_keys (
+            idempotency_key TEXT PRIMARY KEY,
+            request_hash TEXT NOT NULL,
+            status_code INTEGER,
+            response_json TEXT,
+            created_at TEXT NOT NULL
+        )
+        """
     )
-    return response
 
 
-def clear_report_auth_cookie(response):
-    response.delete_cookie(REPORT_AUTH_COOKIE_NAME)
+def migrate_create_report_events(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS report_events (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            survey_slug TEXT NOT NULL,
+            kind TEXT NOT NULL,
+            record_id INTEGER NOT NULL,
+            created_at TEXT NOT NULL
+        )
+        """
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS report_events_survey ON report_events (survey_slug, id)")
+
+
+def migrate_add_answers_hash(conn: sqlite3.Connection) -> None:
+    add_column_if_missing(conn, "responses", "answers_hash", "TEXT")
+
+
+def backfill_answers_hash(conn: sqlite3.Connection, after_id: int, batch_size: int) -> tuple[int, int]:
+    rows = conn.execute(
+        "SELECT id, answers_json, answers_hash FROM responses WHERE id > ? ORDER BY id LIMIT ?",
+        (after_id, batch_size),
+    ).fetchall()
+    updates = []
+    for record_id, answers_json, answers_hash in rows:
+        if answers_hash is not None:
+            continue
+        try:
+            answers = json.loads(answers_json)
+        except json.JSONDecodeError:
+            continue
+        updates.append((compute_answers_hash(answers), record_id))
+    # A submission racing the batch already stored its own hash; leave it alone.
+    conn.executemany("UPDATE responses SET answers_hash = ? WHERE id = ? AND answers_hash IS NULL", updates)
+    return len(rows), rows[-1][0] if rows else after_id
+
+
+def migrate_create_response_versions(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS response_versions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            response_id INTEGER NOT NULL,
+            survey_slug TEXT NOT NULL,
+            department_name TEXT NOT NULL,
+            person_name TEXT NOT NULL,
+            answers_json TEXT NOT NULL,
+            submitted_at TEXT NOT NULL
+        )
+        """
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS response_versions_response ON response_versions (response_id, id)")
+
+
+def backfill_response_versions(conn: sqlite3.Connection, after_id: int, batch_size: int) -> tuple[int, int]:
+    # Rows written before the history existed start it with their current answers.
+    ids = [
+        row[0]
+        for row in conn.execute(
+            "SELECT id FROM responses WHERE id > ? ORDER BY id LIMIT ?",
+            (after_id, batch_size),
+        )
+    ]
+    if not ids:
+        return 0, after_id
+    conn.execute(
+        """
+        INSERT INTO response_versions (response_id, survey_slug, department_name, person_name, answers_json, submitted_at)
+        SELECT id, survey_slug, department_name, person_name, answers_json, submitted_at
+        FROM responses
+        WHERE id BETWEEN ? AND ?
+          AND NOT EXISTS (SELECT 1 FROM response_versions WHERE response_id = responses.id)
+        ORDER BY id
+        """,
+        (ids[0], ids[-1]),
+    )
+    return len(ids), ids[-1]
+
+
+# bucket key length in submitted_at, step and strptime format per granularity
+RESPONSE_ROLLUPS = {
+    "hour": ("response_rollups_hourly", 13, timedelta(hours=1), "%Y-%m-%dT%H"),
+    "day": ("response_rollups_daily", 10, timedelta(days=1), "%Y-%m-%d"),
+}
+
+
+def rebuild_response_rollups(conn: sqlite3.Connection) -> None:
+    for table, width, _step, _format in RESPONSE_ROLLUPS.values():
+        conn.execute(f"DELETE FROM {table}")
+        conn.execute(
+            f"""
+            INSERT INTO {table} (survey_slug, bucket, department_name, submissions)
+            SELECT survey_slug, substr(submitted_at, 1, {width}), department_name, COUNT(*)
+            FROM responses
+            GROUP BY 1, 2, 3
+            """
+        )
+
+
+def migrate_create_response_rollups(conn: sqlite3.Connection) -> None:
+    for table, _width, _step, _format in RESPONSE_ROLLUPS.values():
+        conn.execute(
+            f"""
+            CREATE TABLE IF NOT EXISTS {table} (
+                survey_slug TEXT NOT NULL,
+                bucket TEXT NOT NULL,
+                department_name TEXT NOT NULL,
+                submissions INTEGER NOT NULL,
+                PRIMARY KEY (survey_slug, bucket, department_name)
+            ) WITHOUT ROWID
+            """
+        )
+    # One grouped pass inside the step's transaction: a batched backfill would
+    # race the write path, which already keeps these counts from here on.
+    rebuild_response_rollups(conn)
+
+
+def migrate_add_facet_columns(conn: sqlite3.Connection) -> None:
+    # Virtual columns cost nothing to add and cannot drift from answers_json;
+    # the facet index below stores their values.
+    for column in ("main_system", "main_role"):
+        add_column_if_missing(
+            conn,
+            "responses",
+            column,
+            f"TEXT GENERATED ALWAYS AS (CASE WHEN json_valid(answers_json) "
+            f"THEN COALESCE(json_extract(answers_json, '$.{column}'), '') ELSE '' END) VIRTUAL",
+        )
+
+
+def migrate_create_facet_index(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        """
+        CREATE INDEX IF NOT EXISTS responses_survey_facets
+        ON responses (survey_slug, submitted_at, department_name, main_system, main_role)
+        """
+    )
+
+
+def migrate_create_maintenance_leases(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS maintenance_leases (
+            name TEXT PRIMARY KEY,
+            holder TEXT NOT NULL,
+            expires_at TEXT NOT NULL
+        )
+        """
+    )
+
+
+def migrate_create_response_search(conn: sqlite3.Connection) -> None:
+    # Without FTS5 search falls back to LIKE over answers_json; nothing to create.
+    if FTS5_AVAILABLE:
+        conn.execute(
+            """
+            CREATE VIRTUAL TABLE IF NOT EXISTS response_search USING fts5(
+                department_name,
+                person_name,
+                main_system,
+                main_role,
+                notes,
+                other_text,
+                tokenize = 'unicode61'
+            )
+            """
+        )
+
+
+def backfill_response_search(conn: sqlite3.Connection, after_id: int, batch_size: int) -> tuple[int, int]:
+    rows = conn.execute(
+        "SELECT id, answers_json FROM responses WHERE id > ? ORDER BY id LIMIT ?",
+        (after_id, batch_size),
+    ).fetchall()
+    if not FTS5_AVAILABLE:
+        return len(rows), rows[-1][0] if rows else after_id
+    for record_id, answers_json in rows:
+        # A submission racing the batch already indexed its own row.
+        if conn.execute("SELECT 1 FROM response_search WHERE rowid = ?", (record_id,)).fetchone():
+            continue
+        try:
+            answers = json.loads(answers_json)
+        except json.JSONDecodeError:
+            answers = {}
+        write_search_document(conn, record_id, answers)
+    return len(rows), rows[-1][0] if rows else after_id
+
+
+def backfill_response_renders(conn: sqlite3.Connection, after_id: int, batch_size: int) -> tuple[int, int]:
+    # Rows stored before response_renders existed get their payloads here;
+    # later definition changes are handled by refresh_stale_report_renders.
+    rows = conn.execute(
+        "SELECT id, survey_slug, answers_json FROM responses WHERE id > ? ORDER BY id LIMIT ?",
+        (after_id, batch_size),
+    ).fetchall()
+    for record_id, survey_slug, answers_json in rows:
+        survey = get_survey(survey_slug)
+        if survey is None or conn.execute("SELECT 1 FROM response_renders WHERE response_id = ?", (record_id,)).fetchone():
+            continue
+        try:
+            answers = json.loads(answers_json)
+        except json.JSONDecodeError:
+            answers = {}
+        write_report_renders(conn, record_id, answers, survey)
+    return len(rows), rows[-1][0] if rows else after_id
+
+
+# Applied in order and recorded in schema_version. Append new steps with the
+# next version number; never renumber or edit a step that has shipped. A step
+# either runs ``apply`` in one transaction or walks ``backfill`` over the
+# responses table in batches, committing its cursor after every batch. Data
+# that has to be filled in for existing rows goes in a backfill step, never
+# in ``apply``. Index steps and the rollup rebuild are the exceptions that
+# hold the write lock for a full table pass: SQLite builds an index in a
+# single statement, and the rollups must be counted in the same transaction
+# that lets the write path start maintaining them.
+SCHEMA_MIGRATIONS = (
+    {"version": 1, "name": "create responses", "apply": migrate_create_responses},
+    {"version": 2, "name": "index responses by survey and time", "apply": migrate_create_responses_index},
+    {"version": 3, "name": "create response_renders", "apply": migrate_create_response_renders},
+    {"version": 4, "name": "create api_idempotency_keys", "apply": migrate_create_api_idempotency_keys},
+    {"version": 5, "name": "create report_events", "apply": migrate_create_report_events},
+    {"version": 6, "name": "add responses.answers_hash", "apply": migrate_add_answers_hash},
+    {"version": 7, "name": "backfill responses.answers_hash", "backfill": backfill_answers_hash},
+    {"version": 8, "name": "create response_versions", "apply": migrate_create_response_versions},
+    {"version": 9, "name": "backfill response_versions", "backfill": backfill_response_versions},
+    {"version": 10, "name": "create response rollups", "apply": migrate_create_response_rollups},
+    {"version": 11, "name": "add responses facet columns", "apply": migrate_add_facet_columns},
+    {"version": 12, "name": "index responses by facets", "apply": migrate_create_facet_index},
+    {"version": 13, "name": "create maintenance_leases", "apply": migrate_create_maintenance_leases},
+    {"version": 14, "name": "create response_search", "apply": migrate_create_response_search},
+    {"version": 15, "name": "backfill response_search", "backfill": backfill_response_search},
+    {"version": 16, "name": "backfill response_renders", "backfill": backfill_response_renders},
+)
+
+
+def init_schema_version_table(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            applied_at TEXT NOT NULL,
+            seconds REAL NOT NULL
+        )
+        """
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS schema_migration_progress (
+            version INTEGER PRIMARY KEY,
+            last_id INTEGER NOT NULL,
+            rows_done INTEGER NOT NULL,
+            updated_at TEXT NOT NULL
+        )
+        """
+    )
+    conn.commit()
+
+
+def get_schema_version(conn: sqlite3.Connection) -> int:
+    if not table_exists(conn, "schema_version"):
+        return 0
+    return conn.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version").fetchone()[0]
+
+
+def run_backfill_step(
+    conn: sqlite3.Connection,
+    step: dict,
+    batch_size: int,
+    pause_seconds: float,
+) -> tuple[int, int]:
+    """Walk a backfill step to the end, one committed batch at a time.
+
+    The last processed id is saved in the same transaction as each batch, so
+    an interrupted run resumes where it stopped. Submissions get the write
+    lock between batches.
+    """
+    progress = conn.execute(
+        "SELECT last_id, rows_done FROM schema_migration_progress WHERE version = ?",
+        (step["version"],),
+    ).fetchone()
+    last_id, rows_done = progress if progress else (0, 0)
+    batches = 0
+    while True:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            processed, last_id = step["backfill"](conn, last_id, batch_size)
+            rows_done += processed
+            conn.execute(
+                """
+                INSERT INTO schema_migration_progress (version, last_id, rows_done, updated_at)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(version) DO UPDATE SET
+                    last_id = excluded.last_id,
+                    rows_done = excluded.rows_done,
+                    updated_at = excluded.updated_at
+                """,
+                (step["version"], last_id, rows_done, datetime.now().isoformat(timespec="seconds")),
+            )
+        except BaseException:
+            conn.rollback()
+            raise
+        conn.commit()
+        batches += 1
+        if processed < batch_size:
+            return rows_done, batches
+        if pause_seconds > 0:
+            sleep(pause_seconds)
+
+
+def migrate_database(
+    dry_run: bool = False,
+    batch_size: int = MIGRATION_BATCH_SIZE,
+    pause_seconds: float = MIGRATION_BATCH_PAUSE_SECONDS,
+    target_version: int | None = None,
+    log=None,
+) -> list[dict]:
+    """Apply pending SCHEMA_MIGRATIONS and report one entry per step.
+
+    ``dry_run`` only lists the pending steps, with the number of response
+    rows each backfill still has to visit. ``log`` receives one line per
+    step as it finishes.
+    """
+    batch_size = max(batch_size, 1)
+    results = []
+    conn = connect_db()
+    try:
+        if not dry_run:
+            init_schema_version_table(conn)
+        applied = set()
+        if table_exists(conn, "schema_version"):
+            applied = {row[0] for row in conn.execute("SELECT version FROM schema_version")}
+        for step in SCHEMA_MIGRATIONS:
+            if step["version"] in applied:
+                continue
+            if target_version is not None and step["version"] > target_version:
+                break
+            kind = "backfill" if "backfill" in step else "apply"
+            entry = {"version": step["version"], "name": step["name"], "kind": kind}
+            if dry_run:
+                if kind == "backfill":
+                    done = 0
+                    if table_exists(conn, "schema_migration_progress"):
+                        row = conn.execute(
+                            "SELECT rows_done FROM schema_migration_progress WHERE version = ?",
+                            (step["version"],),
+                        ).fetchone()
+                        done = row[0] if row else 0
+                    total = conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0] if table_exists(conn, "responses") else 0
+                    entry["pending_rows"] = max(total - done, 0)
+                entry["status"] = "pending"
+                results.append(entry)
+                if log:
+                    log(f"{step['version']:>3}  {step['name']:<40} pending")
+                continue
+
+            started = perf_counter()
+            if kind == "backfill":
+                entry["rows"], entry["batches"] = run_backfill_step(conn, step, batch_size, pause_seconds)
+                conn.execute("BEGIN IMMEDIATE")
+            else:
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    step["apply"](conn)
+                except BaseException:
+                    conn.rollback()
+                    raise
+            seconds = perf_counter() - started
+            conn.execute(
+                "INSERT INTO schema_version (version, name, applied_at, seconds) VALUES (?, ?, ?, ?)",
+                (step["version"], step["name"], datetime.now().isoformat(timespec="seconds"), seconds),
+            )
+            conn.execute("DELETE FROM schema_migration_progress WHERE version = ?", (step["version"],))
+            conn.commit()
+            entry["status"] = "applied"
+            entry["seconds"] = round(seconds, 4)
+            results.append(entry)
+            if log:
+                detail = f" rows={entry['rows']} batches={entry['batches']}" if kind == "backfill" else ""
+                log(f"{step['version']:>3}  {step['name']:<40} {seconds:8.3f}s{detail}")
+    finally:
+        conn.close()
+    return results
+
+
+def init_db() -> None:
+    with connect_db() as conn:
+        # WAL lets report reads in one worker run alongside submissions in another.
+        conn.execute("PRAGMA journal_mode=WAL")
+    migrate_database()
+
+    with connect_db() as conn:
+        refresh_stale_report_renders(conn)
+        conn.commit()
+
+
+DRAFT_TTL_HOURS = normalize_positive_int(os.getenv(DRAFT_TTL_HOURS_ENV), 72)
+
+
+def get_draft_db_path() -> Path:
+    return DB_PATH.with_name(f"{DB_PATH.stem}.drafts.db")
+
+
+DRAFT_DB_READY: set[Path] = set()
+
+
+def connect_draft_db() -> sqlite3.Connection:
+    # Drafts live in their own file so autosaves never queue behind, or
+    # compete with, submissions for the responses database write lock. The
+    # file is created on the first autosave.
+    draft_path = get_draft_db_path()
+    conn = sqlite3.connect(draft_path, timeout=SQLITE_BUSY_TIMEOUT_SECONDS)
+    conn.execute("PRAGMA synchronous=NORMAL")
+    if draft_path not in DRAFT_DB_READY:
+        init_draft_db(conn)
+        DRAFT_DB_READY.add(draft_path)
+    return conn
+
+
+def init_draft_db(conn: sqlite3.Connection) -> None:
+    with conn:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS response_drafts (
+                survey_slug TEXT NOT NULL,
+                draft_key TEXT NOT NULL,
+                answers_json TEXT NOT NULL,
+                answers_hash TEXT NOT NULL,
+                updated_at TEXT NOT NULL,
+                PRIMARY KEY (survey_slug, draft_key)
+            ) WITHOUT ROWID
+            """
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS response_drafts_updated ON response_drafts (updated_at)")
+        add_column_if_missing(conn, "response_drafts", "client_key", "TEXT NOT NULL DEFAULT ''")
+        conn.execute("CREATE INDEX IF NOT EXISTS response_drafts_client ON response_drafts (survey_slug, client_key, updated_at)")
+
+
+def get_draft_expiry_cutoff() -> str:
+    return (now() - timedelta(hours=DRAFT_TTL_HOURS)).isoformat(timespec="seconds")
+
+
+def has_draft_room(draft_key: str | None, client_key: str) -> bool:
+    """Whether ``client_key`` may store ``draft_key`` for the active survey.
+
+    Updating a stored draft is always allowed; a new one counts against the
+    client's DRAFT_MAX_PER_CLIENT unexpired drafts.
+    """
+    survey_slug = get_active_survey()["slug"]
+    with connect_draft_db() as conn:
+        if draft_key and conn.execute(
+            "SELECT 1 FROM response_drafts WHERE survey_slug = ? AND draft_key = ?",
+            (survey_slug, draft_key),
+        ).fetchone():
+            return True
+        stored = conn.execute(
+            "SELECT COUNT(*) FROM response_drafts WHERE survey_slug = ? AND client_key = ? AND updated_at >= ?",
+            (survey_slug, client_key, get_draft_expiry_cutoff()),
+        ).fetchone()[0]
+    return stored < DRAFT_MAX_PER_CLIENT
+
+
+def save_draft(draft_key: str, answers: dict, client_key: str = "") -> bool:
+    """Store the draft; returns False when it matched the saved one."""
+    answers_hash = compute_answers_hash(answers)
+    with connect_draft_db() as conn:
+        written = conn.execute(
+            """
+            INSERT INTO response_drafts (survey_slug, draft_key, answers_json, answers_hash, updated_at, client_key)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT(survey_slug, draft_key)
+            DO UPDATE SET answers_json = excluded.answers_json,
+                          answers_hash = excluded.answers_hash,
+                          updated_at = excluded.updated_at
+            WHERE response_drafts.answers_hash != excluded.answers_hash
+            """,
+            (
+                get_active_survey()["slug"],
+                draft_key,
+                json.dumps(answers, ensure_ascii=False),
+                answers_hash,
+                now().isoformat(timespec="seconds"),
+                client_key,
+            ),
+        ).rowcount
+        conn.commit()
+    return bool(written)
+
+
+def load_draft(draft_key: str) -> dict | None:
+    with connect_draft_db() as conn:
+        row = conn.execute(
+            "SELECT answers_json FROM response_drafts WHERE survey_slug = ? AND draft_key = ? AND updated_at >= ?",
+            (get_active_survey()["slug"], draft_key, get_draft_expiry_cutoff()),
+        ).fetchone()
+    return json.loads(row[0]) if row else None
+
+
+def delete_draft(draft_key: str) -> None:
+    with connect_draft_db() as conn:
+        conn.execute(
+            "DELETE FROM response_drafts WHERE survey_slug = ? AND draft_key = ?",
+            (get_active_survey()["slug"], draft_key),
+        )
+        conn.commit()
+
+
+def purge_expired_drafts() -> int:
+    if not get_draft_db_path().exists():
+        return 0
+    with connect_draft_db() as conn:
+        purged = conn.execute("DELETE FROM response_drafts WHERE updated_at < ?", (get_draft_expiry_cutoff(),)).rowcount
+        conn.commit()
+    return purged
+
+
+def run_draft_purger(stop_event: threading.Event) -> None:
+    while not stop_event.is_set():
+        try:
+            purge_expired_drafts()
+        except sqlite3.Error as error:
+            print(f"draft purge failed: {error}")
+        stop_event.wait(DRAFT_PURGE_INTERVAL_SECONDS)
+
+
+def start_draft_purger() -> threading.Event:
+    stop_event = threading.Event()
+    threading.Thread(
+        target=run_draft_purger,
+        args=(stop_event,),
+        name="draft-purge",
+        daemon=True,
+    ).start()
+    return stop_event
+
+
+def get_request_draft_key() -> str | None:
+    draft_key = request.cookies.get(DRAFT_COOKIE_NAME, "")
+    return draft_key if DRAFT_KEY_PATTERN.match(draft_key) else None
+
+
+def now() -> datetime:
+    return datetime.now()
+
+
+def is_survey_open() -> bool:
+    survey = get_active_survey()
+    current = now()
+    return survey["open_start_at"] <= current <= survey["open_end_at"]
+
+
+def collect_answers(fields: list[dict]) -> dict:
+    payload = {}
+    for field in fields:
+        field_type = field["type"]
+        name = field["name"]
+
+        if field_type == "multiselect":
+            payload[name] = request.form.getlist(name)
+            if field.get("allow_other"):
+                payload[f"{name}_other"] = request.form.get(f"{name}_other", "").strip()
+        elif field_type == "text_pair":
+            left_name = field["left"]["name"]
+            right_name = field["right"]["name"]
+            payload[left_name] = request.form.get(left_name, "").strip()
+            payload[right_name] = request.form.get(right_name, "").strip()
+        else:
+            payload[name] = request.form.get(name, "").strip()
+
+    return payload
+
+
+def save_response_record(answers: dict, submitted_at: str | None = None) -> str:
+    persisted_at = submitted_at or now().isoformat(timespec="seconds")
+
+    with connect_db() as conn:
+        _, status = persist_response(conn, answers, persisted_at)
+        conn.commit()
+    if status != "unchanged":
+        notify_report_listeners()
+    return status
+
+
+def compute_answers_hash(answers: dict) -> str:
+    canonical = json.dumps(answers, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def persist_response(conn: sqlite3.Connection, answers: dict, submitted_at: str) -> tuple[int, str]:
+    survey_slug = get_active_survey()["slug"]
+    department_name = str(answers.get("department_name", "")).strip()
+    person_name = str(answers.get("person_name", "")).strip()
+    answers_hash = compute_answers_hash(answers)
+    answers_json = json.dumps(answers, ensure_ascii=False)
+    lookup = (
+        "SELECT id, answers_hash, submitted_at FROM responses WHERE survey_slug = ? AND department_name = ? AND person_name = ?",
+        (survey_slug, department_name, person_name),
+    )
+    existing = conn.execute(*lookup).fetchone()
+    if existing and existing[1] == answers_hash:
+        # An identical resubmission keeps the stored row, its submitted_at and
+        # everything derived from it; it is answered from a plain read without
+        # taking the write lock.
+        return existing[0], "unchanged"
+    if not conn.in_transaction:
+        # Re-read under the write lock: the created / updated status and the
+        # rollup bucket being moved out of must describe the row this upsert
+        # actually replaces, and a concurrent submit may have just written
+        # the same answers.
+        conn.execute("BEGIN IMMEDIATE")
+        existing = conn.execute(*lookup).fetchone()
+        if existing and existing[1] == answers_hash:
+            conn.rollback()
+            return existing[0], "unchanged"
+    record_id = conn.execute(
+        """
+        INSERT INTO responses (survey_slug, department_name, person_name, answers_json, submitted_at, answers_hash)
+        VALUES (?, ?, ?, ?, ?, ?)
+        ON CONFLICT(survey_slug, department_name, person_name)
+        DO UPDATE SET answers_json = excluded.answers_json,
+                      submitted_at = excluded.submitted_at,
+                      answers_hash = excluded.answers_hash
+        RETURNING id
+        """,
+        (
+            survey_slug,
+            department_name,
+            person_name,
+            answers_json,
+            submitted_at,
+            answers_hash,
+        ),
+    ).fetchone()[0]
+    append_response_version(conn, record_id, survey_slug, department_name, person_name, answers_json, submitted_at)
+    move_response_rollups(conn, survey_slug, department_name, existing[2] if existing else None, submitted_at)
+    write_search_document(conn, record_id, answers)
+    write_report_renders(conn, record_id, answers)
+    status = "updated" if existing else "created"
+    record_report_event(conn, status, record_id)
+    return record_id, status
+
+
+def upsert_response(answers: dict) -> None:
+    save_response_record(answers)
+
+
+def bump_response_rollup(
+    conn: sqlite3.Connection,
+    table: str,
+    survey_slug: str,
+    bucket: str,
+    department_name: str,
+    delta: int,
+) -> None:
+    conn.execute(
+        f"""
+        INSERT INTO {table} (survey_slug, bucket, department_name, submissions)
+        VALUES (?, ?, ?, ?)
+        ON CONFLICT(survey_slug, bucket, department_name)
+        DO UPDATE SET submissions = submissions + excluded.submissions
+        """,
+        (survey_slug, bucket, department_name, delta),
+    )
+    if delta < 0:
+        conn.execute(
+            f"DELETE FROM {table} WHERE survey_slug = ? AND bucket = ? AND department_name = ? AND submissions <= 0",
+            (survey_slug, bucket, department_name),
+        )
+
+
+def move_response_rollups(
+    conn: sqlite3.Connection,
+    survey_slug: str,
+    department_name: str,
+    old_submitted_at: str | None,
+    new_submitted_at: str | None,
+) -> None:
+    """Keep the rollups counting each response once, in its current bucket.
+
+    A new response passes only ``new_submitted_at``, a deleted one only
+    ``old_submitted_at``; an overwrite that stays in the same bucket writes
+    nothing.
+    """
+    for table, width, _step, _format in RESPONSE_ROLLUPS.values():
+        old_bucket = old_submitted_at[:width] if old_submitted_at else None
+        new_bucket = new_submitted_at[:width] if new_submitted_at else None
+        if old_bucket == new_bucket:
+            continue
+        if old_bucket is not None:
+            bump_response_rollup(conn, table, survey_slug, old_bucket, department_name, -1)
+        if new_bucket is not None:
+            bump_response_rollup(conn, table, survey_slug, new_bucket, department_name, 1)
+
+
+def append_response_version(
+    conn: sqlite3.Connection,
+    record_id: int,
+    survey_slug: str,
+    department_name: str,
+    person_name: str,
+    answers_json: str,
+    submitted_at: str,
+) -> None:
+    # responses keeps only the latest answers for reads; every accepted
+    # submission is also appended here, which only ever grows the right edge
+    # of the table and its (response_id, id) index.
+    conn.execute(
+        """
+        INSERT INTO response_versions (response_id, survey_slug, department_name, person_name, answers_json, submitted_at)
+        VALUES (?, ?, ?, ?, ?, ?)
+        """,
+        (record_id, survey_slug, department_name, person_name, answers_json, submitted_at),
+    )
+
+
+def get_response_versions(record_id: int, lang: str = "zh-TW") -> list[dict]:
+    with connect_db() as conn:
+        rows = conn.execute(
+            """
+            SELECT id, answers_json, submitted_at
+            FROM response_versions
+            WHERE response_id = ? AND survey_slug = ?
+            ORDER BY id DESC
+            """,
+            (record_id, get_active_survey()["slug"]),
+        ).fetchall()
+    versions = [build_report_record(row, lang) for row in rows]
+    # Flag the answers that differ from the next older version.
+    for version, previous in zip(versions, versions[1:] + [None]):
+        for key in ("basic_items", "questionnaire_items"):
+            previous_items = previous[key] if previous else [None] * len(version[key])
+            for item, previous_item in zip(version[key], previous_items):
+                item["changed"] = previous is not None and item["value"] != previous_item["value"]
+    return versions
+
+
+HISTORY_KEEP_VERSIONS = normalize_positive_int(os.getenv(HISTORY_KEEP_VERSIONS_ENV), 20)
+HISTORY_COMPACT_INTERVAL_SECONDS = normalize_positive_int(os.getenv(HISTORY_COMPACT_INTERVAL_ENV), 3600)
+HISTORY_DELETE_BATCH_SIZE = 500
+
+
+def get_history_archive_dir() -> Path:
+    return DB_PATH.parent / "history_archive"
+
+
+def claim_maintenance_lease(name: str, seconds: int) -> str | None:
+    """Claim the named lease for ``seconds``; returns the holder token or None.
+
+    Background jobs that every serving process starts use this so only one
+    process runs a pass at a time. An expired lease can be taken over.
+    """
+    holder = secrets.token_hex(8)
+    current = now()
+    with connect_db() as conn:
+        claimed = conn.execute(
+            """
+            INSERT INTO maintenance_leases (name, holder, expires_at) VALUES (?, ?, ?)
+            ON CONFLICT(name) DO UPDATE SET holder = excluded.holder, expires_at = excluded.expires_at
+            WHERE maintenance_leases.expires_at <= ?
+            """,
+            (
+                name,
+                holder,
+                (current + timedelta(seconds=seconds)).isoformat(timespec="seconds"),
+                current.isoformat(timespec="seconds"),
+            ),
+        ).rowcount
+    return holder if claimed else None
+
+
+def release_maintenance_lease(name: str, holder: str) -> None:
+    with connect_db() as conn:
+        conn.execute("DELETE FROM maintenance_leases WHERE name = ? AND holder = ?", (name, holder))
+
+
+def compact_response_versions(keep_versions: int | None = None) -> dict:
+    """Archive and delete history beyond the newest ``keep_versions`` per response.
+
+    Versions of deleted responses are archived as well. Candidates are read
+    and written as gzip NDJSON without the write lock; the archived ids are
+    then deleted in short transactions so submissions interleave with the
+    pass. A lease keeps compactions in other processes from running at the
+    same time; a pass that cannot get it returns ``skipped``.
+    """
+    keep_versions = keep_versions or HISTORY_KEEP_VERSIONS
+    started = perf_counter()
+    holder = claim_maintenance_lease("history-compaction", HISTORY_COMPACT_INTERVAL_SECONDS)
+    if holder is None:
+        return {"archived": 0, "path": None, "seconds": 0.0, "skipped": True}
+    archive_path = get_history_archive_dir() / f"{DB_PATH.stem}-versions-{now():%Y%m%d-%H%M%S}-{secrets.token_hex(2)}.ndjson.gz"
+    archived_ids = []
+    conn = connect_db()
+    try:
+        cursor = conn.execute(
+            """
+            SELECT ranked.id, ranked.response_id, ranked.survey_slug, ranked.department_name,
+                   ranked.person_name, ranked.answers_json, ranked.submitted_at
+            FROM (
+                SELECT response_versions.*,
+                       ROW_NUMBER() OVER (PARTITION BY response_id ORDER BY id DESC) AS version_rank
+                FROM response_versions
+            ) AS ranked
+            LEFT JOIN responses ON responses.id = ranked.response_id
+            WHERE ranked.version_rank > ? OR responses.id IS NULL
+            ORDER BY ranked.id
+            """,
+            (keep_versions,),
+        )
+        archive = None
+        try:
+            while rows := cursor.fetchmany(EXPORT_FETCH_SIZE):
+                if archive is None:
+                    archive_path.parent.mkdir(parents=True, exist_ok=True)
+                    archive = gzip.open(archive_path.with_suffix(".partial"), "wt", encoding="utf-8")
+                for version_id, response_id, survey_slug, department_name, person_name, answers_json, submitted_at in rows:
+                    archive.write(
+                        f'{{"version_id": {version_id}, "response_id": {response_id}, '
+                        f'"survey_slug": {json.dumps(survey_slug)}, '
+                        f'"department_name": {json.dumps(department_name, ensure_ascii=False)}, '
+                        f'"person_name": {json.dumps(person_name, ensure_ascii=False)}, '
+                        f'"submitted_at": {json.dumps(submitted_at)}, "answers": {answers_json}}}\n'
+                    )
+                    archived_ids.append((version_id,))
+        finally:
+            if archive is not None:
+                archive.close()
+        if archived_ids:
+            # Versions are append-only, so a row that ranked past the limit
+            # during the read is still past it when its delete batch runs.
+            os.replace(archive_path.with_suffix(".partial"), archive_path)
+            for offset in range(0, len(archived_ids), HISTORY_DELETE_BATCH_SIZE):
+                conn.execute("BEGIN IMMEDIATE")
+                conn.executemany(
+                    "DELETE FROM response_versions WHERE id = ?",
+                    archived_ids[offset:offset + HISTORY_DELETE_BATCH_SIZE],
+                )
+                conn.commit()
+    finally:
+        conn.close()
+        release_maintenance_lease("history-compaction", holder)
+    return {
+        "archived": len(archived_ids),
+        "path": str(archive_path) if archived_ids else None,
+        "seconds": round(perf_counter() - started, 3),
+        "skipped": False,
+    }
+
+
+def run_history_compactor(stop_event: threading.Event) -> None:
+    while not stop_event.wait(HISTORY_COMPACT_INTERVAL_SECONDS):
+        try:
+            compact_response_versions()
+        except (sqlite3.Error, OSError) as error:
+            print(f"history compaction failed: {error}")
+
+
+def start_history_compactor() -> threading.Event:
+    stop_event = threading.Event()
+    threading.Thread(
+        target=run_history_compactor,
+        args=(stop_event,),
+        name="history-compaction",
+        daemon=True,
+    ).start()
+    return stop_event
+
+
+class SubmissionAdmission:
+    """Admission control in front of the survey write path.
+
+    Each client key gets a token bucket refilled at ``rate_per_minute`` and
+    capped at ``burst``. Admitted writes then wait for one of
+    ``max_concurrent`` slots; a request that cannot get one within
+    ``max_queue_seconds`` is shed instead of piling up behind the SQLite
+    writer. Limits are per serving process.
+    """
+
+    def __init__(
+        self,
+        rate_per_minute: int,
+        burst: int,
+        max_concurrent: int,
+        max_queue_seconds: float,
+        max_clients: int = SUBMIT_TRACKED_CLIENTS,
+    ):
+        self.rate_per_second = rate_per_minute / 60
+        self.burst = burst
+        self.max_concurrent = max_concurrent
+        self.max_queue_seconds = max_queue_seconds
+        self.max_clients = max_clients
+        self.buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+        self.slots = threading.BoundedSemaphore(max_concurrent)
+        self.in_flight = 0
+        self.admitted = 0
+        self.rate_limited = 0
+        self.shed = 0
+        self.queue_waits: deque[float] = deque(maxlen=SUBMIT_QUEUE_SAMPLES)
+        self.lock = threading.Lock()
+
+    def take_token(self, client_key: str) -> float:
+        """Spend one token; return 0, or the seconds until one is available."""
+        current = perf_counter()
+        with self.lock:
+            tokens, updated_at = self.buckets.pop(client_key, (self.burst, current))
+            tokens = min(self.burst, tokens + (current - updated_at) * self.rate_per_second)
+            if tokens >= 1:
+                tokens -= 1
+                wait_seconds = 0.0
+            else:
+                self.rate_limited += 1
+                wait_seconds = (1 - tokens) / self.rate_per_second
+            self.buckets[client_key] = (tokens, current)
+            while len(self.buckets) > self.max_clients:
+                self.buckets.popitem(last=False)
+        return wait_seconds
+
+    def acquire_slot(self) -> bool:
+        started = perf_counter()
+        acquired = self.slots.acquire(timeout=self.max_queue_seconds)
+        with self.lock:
+            self.queue_waits.append(perf_counter() - started)
+            if acquired:
+                self.admitted += 1
+                self.in_flight += 1
+            else:
+                self.shed += 1
+        return acquired
+
+    def release_slot(self) -> None:
+        with self.lock:
+            self.in_flight -= 1
+        self.slots.release()
+
+    def stats(self) -> dict:
+        with self.lock:
+            waits = sorted(self.queue_waits)
+            return {
+                "rate_per_minute": round(self.rate_per_second * 60),
+                "burst": self.burst,
+                "max_concurrent": self.max_concurrent,
+                "max_queue_ms": round(self.max_queue_seconds * 1000),
+                "in_flight": self.in_flight,
+                "admitted": self.admitted,
+                "rate_limited": self.rate_limited,
+                "shed": self.shed,
+                "tracked_clients": len(self.buckets),
+                "queue_wait_p50_ms": round(waits[len(waits) // 2] * 1000, 2) if waits else 0.0,
+                "queue_wait_p99_ms": round(waits[int(len(waits) * 0.99)] * 1000, 2) if waits else 0.0,
+            }
+
+
+# Clients are keyed by request.remote_addr, so several people behind one
+# NAT share a bucket; the defaults leave room for a small office submitting
+# together. Behind a reverse proxy set SURVEY_TRUSTED_PROXY_HOPS so the key
+# is the forwarded client address instead of the proxy's.
+SUBMISSION_ADMISSION = SubmissionAdmission(
+    normalize_positive_int(os.getenv(SUBMIT_RATE_PER_MINUTE_ENV), 60),
+    normalize_positive_int(os.getenv(SUBMIT_BURST_ENV), 20),
+    normalize_positive_int(os.getenv(SUBMIT_CONCURRENCY_ENV), 4),
+    normalize_positive_int(os.getenv(SUBMIT_MAX_QUEUE_MS_ENV), 1000) / 1000,
+)
+# Autosaves get a bucket of their own so typing never spends the tokens a
+# real submit needs; only the rate applies, drafts do not take write slots.
+# form.js saves at most once per 2 s pause, so 30 a minute covers a typist.
+DRAFT_ADMISSION = SubmissionAdmission(normalize_positive_int(os.getenv(DRAFT_RATE_PER_MINUTE_ENV), 30), 10, 1, 0)
+
+
+# Opt-in: only trust X-Forwarded-For when this many proxies are known to sit
+# in front of the app, otherwise any client could pick its own bucket.
+TRUSTED_PROXY_HOPS = normalize_positive_int(os.getenv(TRUSTED_PROXY_HOPS_ENV), 0)
+if TRUSTED_PROXY_HOPS:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=TRUSTED_PROXY_HOPS)
+
+
+def build_retry_after_headers(seconds: float) -> dict:
+    return {"Retry-After": str(max(1, math.ceil(seconds)))}
+
+
+def parse_api_submitted_at(value) -> str | None:
+    if value in (None, ""):
+        return now().isoformat(timespec="seconds")
+    if not isinstance(value, str):
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.strip())
+        if parsed.tzinfo is not None:
+            parsed = parsed.astimezone().replace(tzinfo=None)
+        return parsed.isoformat(timespec="seconds")
+    except ValueError:
+        pass
+    for fmt in ["%Y-%m-%d %H:%M:%S", "%Y/%m/%d %H:%M:%S"]:
+        try:
+            return datetime.strptime(value.strip(), fmt).isoformat(timespec="seconds")
+        except ValueError:
+            continue
+    return None
+
+
+def validate_api_submission(item) -> tuple[dict, str | None, list[str]]:
+    if not isinstance(item, dict):
+        return {}, None, ["item must be a JSON object"]
+
+    errors = []
+    answers: dict = {}
+    known_keys = {"submitted_at"}
+    for field in get_active_survey()["form_definition"]:
+        if field["type"] == "text_pair":
+            text_names = [field["left"]["name"], field["right"]["name"]]
+        elif field["type"] == "multiselect":
+            text_names = [f"{field['name']}_other"] if field.get("allow_other") else []
+            known_keys.add(field["name"])
+            selected = item.get(field["name"], [])
+            if not isinstance(selected, list) or not all(isinstance(value, str) for value in selected):
+                errors.append(f"{field['name']}: must be a list of strings")
+                selected = []
+            canonical_values = [canonicalize_selected_option(field, value.strip()) for value in selected]
+            unknown_values = [value for value in canonical_values if value not in field["options"]]
+            if unknown_values:
+                errors.append(f"{field['name']}: unknown option {', '.join(unknown_values)}")
+            answers[field["name"]] = list(dict.fromkeys(canonical_values))
+        else:
+            text_names = [field["name"]]
+
+        for name in text_names:
+            known_keys.add(name)
+            value = item.get(name, "")
+            if not isinstance(value, str):
+                errors.append(f"{name}: must be a string")
+                value = ""
+            answers[name] = value.strip()
+
+    unknown_keys = sorted(set(item) - known_keys)
+    if unknown_keys:
+        errors.append(f"unknown fields: {', '.join(unknown_keys)}")
+    for name in ["department_name", "person_name"]:
+        if not answers.get(name):
+            errors.append(f"{name}: required")
+
+    submitted_at = parse_api_submitted_at(item.get("submitted_at"))
+    if submitted_at is None:
+        errors.append("submitted_at: expected ISO 8601 datetime")
+    return answers, submitted_at, errors
+
+
+def parse_api_batch_items(body: bytes, content_type: str) -> list:
+    text = body.decode("utf-8-sig")
+    if content_type == "application/x-ndjson":
+        return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+    payload = json.loads(text)
+    if isinstance(payload, dict) and isinstance(payload.get("items"), list):
+        return payload["items"]
+    if not isinstance(payload, list):
+        raise ValueError("expected a JSON array of submissions")
+    return payload
+
+
+def ingest_api_batch(items: list) -> dict:
+    results = []
+    pending = []
+    for index, item in enumerate(items):
+        answers, submitted_at, errors = validate_api_submission(item)
+        if errors:
+            results.append({"index": index, "status": "invalid", "errors": errors})
+        else:
+            results.append(None)
+            pending.append((index, answers, submitted_at))
+
+    # Each chunk is one transaction: a failure rolls back only that chunk and
+    # the per-item results report which submissions were not applied.
+    for start in range(0, len(pending), API_BATCH_TRANSACTION_SIZE):
+        chunk = pending[start:start + API_BATCH_TRANSACTION_SIZE]
+        chunk_results = []
+        try:
+            with connect_db() as conn:
+                for index, answers, submitted_at in chunk:
+                    record_id, status = persist_response(conn, answers, submitted_at)
+                    chunk_results.append((index, {"index": index, "status": status, "id": record_id}))
+                conn.commit()
+        except sqlite3.Error as error:
+            chunk_results = [(index, {"index": index, "status": "failed", "errors": [str(error)]}) for index, _, _ in chunk]
+        for index, result in chunk_results:
+            results[index] = result
+    if any(result["status"] in ("created", "updated") for result in results):
+        notify_report_listeners()
+
+    counts = {status: 0 for status in ["created", "updated", "unchanged", "invalid", "failed"]}
+    for result in results:
+        counts[result["status"]] += 1
+    return {**counts, "total": len(results), "results": results}
+
+
+def reserve_idempotency_key(idempotency_key: str, request_hash: str) -> tuple[int, str] | bool | None:
+    # None: newly reserved; False: held by another body or still running;
+    # otherwise the stored (status_code, response_json) to replay.
+    expires_before = (now() - timedelta(hours=API_IDEMPOTENCY_TTL_HOURS)).isoformat(timespec="seconds")
+    with connect_db() as conn:
+        conn.execute("DELETE FROM api_idempotency_keys WHERE created_at < ?", (expires_before,))
+        inserted = conn.execute(
+            """
+            INSERT OR IGNORE INTO api_idempotency_keys (idempotency_key, request_hash, created_at)
+            VALUES (?, ?, ?)
+            """,
+            (idempotency_key, request_hash, now().isoformat(timespec="seconds")),
+        ).rowcount
+        conn.commit()
+        if inserted:
+            return None
+        stored_hash, status_code, response_json = conn.execute(
+            "SELECT request_hash, status_code, response_json FROM api_idempotency_keys WHERE idempotency_key = ?",
+            (idempotency_key,),
+        ).fetchone()
+
+    if stored_hash != request_hash or response_json is None:
+        return False
+    return status_code, response_json
+
+
+def store_idempotent_response(idempotency_key: str, status_code: int | None, response_json: str | None) -> None:
+    with connect_db() as conn:
+        if response_json is None:
+            conn.execute("DELETE FROM api_idempotency_keys WHERE idempotency_key = ?", (idempotency_key,))
+        else:
+            conn.execute(
+                "UPDATE api_idempotency_keys SET status_code = ?, response_json = ? WHERE idempotency_key = ?",
+                (status_code, response_json, idempotency_key),
+            )
+        conn.commit()
+
+
+REPORT_EVENT_CONDITION = threading.Condition()
+
+
+def record_report_event(conn: sqlite3.Connection, kind: str, record_id: int) -> None:
+    # Events live in SQLite rather than in process memory so every serving
+    # process sees the same feed; the table is trimmed to a fixed window.
+    survey_slug = get_active_survey()["slug"]
+    event_id = conn.execute(
+        "INSERT INTO report_events (survey_slug, kind, record_id, created_at) VALUES (?, ?, ?, ?)",
+        (survey_slug, kind, record_id, now().isoformat(timespec="seconds")),
+    ).lastrowid
+    conn.execute(
+        "DELETE FROM report_events WHERE survey_slug = ? AND id <= ?",
+        (survey_slug, event_id - REPORT_EVENT_RETENTION),
+    )
+
+
+def notify_report_listeners() -> None:
+    # Wakes this process's event notifier so local writes reach viewers
+    # without waiting for the next poll.
+    with REPORT_EVENT_CONDITION:
+        REPORT_EVENT_CONDITION.notify_all()
+
+
+class ReportEventHub:
+    """Per-process fan-out of ``report_events``.
+
+    A single notifier thread copies new rows into a bounded in-memory window
+    (one query per poll, however many viewers are connected). Every viewer
+    reads the window from its own position, its Last-Event-ID, so event
+    requests never query SQLite and never wait for new events.
+    """
+
+    def __init__(self, window: int):
+        self.events: deque[tuple[int, str, str, int]] = deque(maxlen=window)
+        self.floor_id = 0
+        self.latest_id: int | None = None
+        self.background = False
+        self.lock = threading.Lock()
+
+    def refresh(self) -> None:
+        with connect_db() as conn:
+            max_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM report_events").fetchone()[0]
+            reload = self.latest_id is None or max_id < self.latest_id
+            if reload:
+                # First use or a restored database: take the newest window.
+                rows = conn.execute(
+                    "SELECT id, survey_slug, kind, record_id FROM report_events ORDER BY id DESC LIMIT ?",
+                    (self.events.maxlen,),
+                ).fetchall()[::-1]
+            elif max_id > self.latest_id:
+                rows = conn.execute(
+                    "SELECT id, survey_slug, kind, record_id FROM report_events WHERE id > ? ORDER BY id",
+                    (self.latest_id,),
+                ).fetchall()
+            else:
+                return
+        with self.lock:
+            if reload:
+                self.events.clear()
+                self.floor_id = rows[0][0] - 1 if len(rows) == self.events.maxlen else 0
+            for row in rows:
+                if len(self.events) == self.events.maxlen:
+                    self.floor_id = self.events[0][0]
+                self.events.append(tuple(row))
+            self.latest_id = max_id
+
+    def read(self, survey_slug: str, after_id: int | None) -> tuple[int, list[dict] | None]:
+        """Return ``(latest id, events after after_id)``; the events are None
+        when the client fell out of the window and has to reload."""
+        if not self.background:
+            # No notifier thread (tests, the dev server): read through.
+            self.refresh()
+        with self.lock:
+            latest_id = self.latest_id or 0
+            if after_id is None or after_id > latest_id:
+                return latest_id, []
+            if after_id < self.floor_id:
+                return latest_id, None
+            events = [
+                {"id": event_id, "kind": kind, "record_id": record_id}
+                for event_id, slug, kind, record_id in self.events
+                if event_id > after_id and slug == survey_slug
+            ]
+        return latest_id, events
+
+
+REPORT_EVENT_HUB = ReportEventHub(REPORT_EVENT_RETENTION)
+
+
+def run_report_event_notifier(stop_event: threading.Event) -> None:
+    while not stop_event.is_set():
+        try:
+            REPORT_EVENT_HUB.refresh()
+        except sqlite3.Error as error:
+            print(f"report event refresh failed: {error}")
+        with REPORT_EVENT_CONDITION:
+            REPORT_EVENT_CONDITION.wait(REPORT_EVENT_POLL_SECONDS)
+
+
+def start_report_event_notifier() -> threading.Event:
+    stop_event = threading.Event()
+    REPORT_EVENT_HUB.background = True
+    threading.Thread(
+        target=run_report_event_notifier,
+        args=(stop_event,),
+        name="report-event-notifier",
+        daemon=True,
+    ).start()
+    return stop_event
+
+
+class RecordFragmentCache:
+    """Bounded LRU of rendered record-card HTML.
+
+    Keys are ``(record id, submitted_at, lang, role, definition hash)``.
+    Entries are dropped for every record that shows up in ``report_events``,
+    so writes from any serving process invalidate the cache here too.
+    Fragments are held UTF-8 encoded: the card icons are outside the BMP,
+    which would make Python store the str at four bytes per character.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries: OrderedDict[tuple, bytes] = OrderedDict()
+        self.keys_by_record: dict[int, set[tuple]] = {}
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.last_event_id: int | None = None
+        self.lock = threading.Lock()
+
+    def get(self, key: tuple) -> Markup | None:
+        with self.lock:
+            fragment = self.entries.get(key)
+            if fragment is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+        return Markup(fragment.decode("utf-8"))
+
+    def put(self, key: tuple, fragment: Markup) -> None:
+        encoded = str(fragment).encode("utf-8")
+        with self.lock:
+            self._discard(key)
+            self.entries[key] = encoded
+            self.keys_by_record.setdefault(key[0], set()).add(key)
+            self.bytes += len(encoded)
+            while self.entries and (len(self.entries) > self.max_entries or self.bytes > self.max_bytes):
+                self._discard(next(iter(self.entries)))
+
+    def invalidate_record(self, record_id: int) -> None:
+        with self.lock:
+            for key in self.keys_by_record.pop(record_id, set()):
+                fragment = self.entries.pop(key, None)
+                if fragment is not None:
+                    self.bytes -= len(fragment)
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+            self.keys_by_record.clear()
+            self.bytes = 0
+
+    def _discard(self, key: tuple) -> None:
+        fragment = self.entries.pop(key, None)
+        if fragment is None:
+            return
+        self.bytes -= len(fragment)
+        record_keys = self.keys_by_record.get(key[0])
+        if record_keys is not None:
+            record_keys.discard(key)
+            if not record_keys:
+                del self.keys_by_record[key[0]]
+
+    def stats(self) -> dict:
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self.entries),
+                "max_entries": self.max_entries,
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+RECORD_FRAGMENT_CACHE = RecordFragmentCache(
+    normalize_positive_int(os.getenv(RECORD_FRAGMENT_CACHE_ENTRIES_ENV), 5000),
+    RECORD_FRAGMENT_CACHE_MAX_BYTES,
+)
+
+
+def sync_record_fragment_cache() -> None:
+    # Record ids are unique across surveys, so events of every survey apply.
+    cache = RECORD_FRAGMENT_CACHE
+    with connect_db() as conn:
+        latest_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM report_events").fetchone()[0]
+        if (
+            cache.last_event_id is None
+            or latest_id < cache.last_event_id
+            or latest_id - cache.last_event_id >= REPORT_EVENT_RETENTION
+        ):
+            # First use, a reset database, or events pruned past our position.
+            cache.clear()
+        elif latest_id > cache.last_event_id:
+            changed_ids = conn.execute(
+                "SELECT DISTINCT record_id FROM report_events WHERE id > ? AND id <= ?",
+                (cache.last_event_id, latest_id),
+            ).fetchall()
+            for (record_id,) in changed_ids:
+                cache.invalidate_record(record_id)
+    cache.last_event_id = latest_id
+
+
+def render_cached_record(record: dict, admin_ui: dict, lang: str, role: str | None) -> Markup:
+    key = (record["id"], record["submitted_at"], lang, role, get_active_survey()["definition_hash"])
+    fragment = RECORD_FRAGMENT_CACHE.get(key)
+    if fragment is None:
+        fragment = Markup(get_template_attribute("_record_card.html", "render_record")(record, admin_ui, role == "admin"))
+        RECORD_FRAGMENT_CACHE.put(key, fragment)
+    return fragment
+
+
+app.jinja_env.globals["render_cached_record"] = render_cached_record
+app.jinja_env.globals["lang_labels"] = {lang: load_catalog(lang)["lang_label"] for lang in SWITCHER_LANGS}
+
+
+def get_submission_trend(granularity: str = "day", department: str | None = None) -> dict:
+    """Submissions per hour or day from the rollup tables.
+
+    Covers the open window up to now, widened to any bucket holding data and
+    capped at the latest TREND_MAX_BUCKETS buckets; empty buckets count zero.
+    """
+    table, _width, step, bucket_format = RESPONSE_ROLLUPS[granularity]
+    survey = get_active_survey()
+    department_clause = " AND department_name = ?" if department else ""
+    params = (survey["slug"], department) if department else (survey["slug"],)
+    with connect_db() as conn:
+        rows = conn.execute(
+            f"SELECT bucket, department_name, submissions FROM {table} WHERE survey_slug = ?{department_clause} ORDER BY bucket",
+            params,
+        ).fetchall()
+
+    counts: dict[datetime, dict[str, int]] = {}
+    for bucket, department_name, submissions in rows:
+        try:
+            bucket_start = datetime.strptime(bucket, bucket_format)
+        except ValueError:
+            continue
+        counts.setdefault(bucket_start, {})[department_name] = submissions
+
+    def truncate(value: datetime) -> datetime:
+        return datetime.strptime(value.strftime(bucket_format), bucket_format)
+
+    window_start = truncate(survey["open_start_at"])
+    window_end = max(truncate(min(survey["open_end_at"], now())), window_start)
+    first = min(window_start, *counts) if counts else window_start
+    last = max(window_end, *counts) if counts else window_end
+    if (last - first) // step >= TREND_MAX_BUCKETS:
+        first = last - step * (TREND_MAX_BUCKETS - 1)
+
+    buckets = []
+    current = first
+    while current <= last:
+        departments = counts.get(current, {})
+        buckets.append({"bucket": current.strftime(bucket_format), "total": sum(departments.values()), "departments": departments})
+        current += step
+    return {
+        "granularity": granularity,
+        "department": department,
+        "total": sum(bucket["total"] for bucket in buckets),
+        "peak": max((bucket["total"] for bucket in buckets), default=0),
+        "buckets": buckets,
+    }
+
+
+def build_filtered_report_summary(lang: str, filters: dict) -> dict:
+    filter_clause, filter_params = build_export_filter(**filters)
+    with connect_db() as conn:
+        total, department_count, latest = conn.execute(
+            f"""
+            SELECT COUNT(*),
+                   COUNT(DISTINCT NULLIF(department_name, '')),
+                   MAX(submitted_at)
+            FROM responses
+            WHERE survey_slug = ?{filter_clause}
+            """,
+            (get_active_survey()["slug"], *filter_params),
+        ).fetchone()
+
+    return {
+        "total_submissions": total,
+        "department_count": department_count,
+        "latest_submitted_at": format_report_datetime(latest, lang) if latest else "—",
+    }
+
+
+def format_sse_message(event: str, payload: dict, event_id: int | None = None) -> str:
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(payload, ensure_ascii=False)}")
+    return "\n".join(lines) + "\n\n"
+
+
+def iter_report_events(last_event_id: int | None, lang: str, filters: dict):
+    # Each request answers from the hub's window and ends; EventSource
+    # reconnects after REPORT_EVENT_RETRY_MS with Last-Event-ID, so an idle
+    # viewer costs one in-memory request per interval rather than a held
+    # serving thread.
+    yield f"retry: {REPORT_EVENT_RETRY_MS}\n\n"
+
+    latest_id, events = REPORT_EVENT_HUB.read(get_active_survey()["slug"], last_event_id)
+    if events is None or len(events) > REPORT_EVENT_CLIENT_BUFFER:
+        # The client fell behind what is retained or buffered; let it reload
+        # instead of replaying a partial history.
+        yield format_sse_message("reset", {"last_event_id": latest_id}, latest_id)
+        return
+    if last_event_id is None or last_event_id > latest_id:
+        yield format_sse_message("ready", {"last_event_id": latest_id}, latest_id)
+        return
+
+    for event in events:
+        yield format_sse_message(event["kind"], {"record_id": event["record_id"]}, event["id"])
+    if events:
+        yield format_sse_message("summary", build_filtered_report_summary(lang, filters))
+
+
+def load_static_asset(filename: str) -> dict | None:
+    cached = STATIC_ASSET_MANIFEST.get(filename)
+    if cached is not None and not app.debug:
+        return cached
+
+    static_root = STATIC_DIR.resolve()
+    path = (static_root / filename).resolve()
+    if not path.is_relative_to(static_root) or not path.is_file():
+        return None
+
+    content = path.read_bytes()
+    mimetype = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+    if mimetype.startswith("text/") or mimetype in {"application/javascript", "text/javascript"}:
+        mimetype = f"{mimetype}; charset=utf-8"
+    asset = {
+        "fingerprint": hashlib.sha256(content).hexdigest()[:16],
+        "content": content,
+        "gzip": gzip.compress(content, compresslevel=9, mtime=0) if len(content) >= STATIC_ASSET_GZIP_MIN_BYTES else None,
+        "mimetype": mimetype,
+    }
+    STATIC_ASSET_MANIFEST[filename] = asset
+    return asset
+
+
+def asset_url(filename: str) -> str:
+    asset = load_static_asset(filename)
+    if asset is None:
+        return url_for("static", filename=filename)
+    return url_for("static_asset", fingerprint=asset["fingerprint"], filename=filename)
+
+
+STATIC_ASSET_MANIFEST: dict[str, dict] = {}
+app.jinja_env.globals["asset_url"] = asset_url
+
+
+def choose_content_encoding(accept_encoding: str) -> str:
+    accepted = parse_accept_header(accept_encoding)
+    for encoding in ("gzip", "deflate"):
+        if accepted[encoding] > 0:
+            return encoding
+    return ""
+
+
+def iter_compressed(chunks, encoding: str, level: int):
+    # gzip wraps the deflate stream in a gzip header; "deflate" means zlib format.
+    wbits = zlib.MAX_WBITS | 16 if encoding == "gzip" else zlib.MAX_WBITS
+    compressor = zlib.compressobj(level, zlib.DEFLATED, wbits)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+class CompressionMiddleware:
+    def __init__(self, wsgi_app, level: int = 6, min_bytes: int = 1024):
+        self.wsgi_app = wsgi_app
+        self.level = level
+        self.min_bytes = min_bytes
+
+    def should_compress(self, status: str, headers: list[tuple[str, str]]) -> bool:
+        status_code = int(status.split(" ", 1)[0])
+        if status_code < 200 or status_code in {204, 206, 304}:
+            return False
+
+        header_map = {key.lower(): value for key, value in headers}
+        if "content-encoding" in header_map or "no-transform" in header_map.get("cache-control", ""):
+            return False
+        mimetype = header_map.get("content-type", "").split(";", 1)[0].strip().lower()
+        if mimetype not in COMPRESSIBLE_MIMETYPES:
+            return False
+
+        content_length = header_map.get("content-length")
+        return content_length is None or int(content_length) >= self.min_bytes
+
+    def __call__(self, environ, start_response):
+        encoding = choose_content_encoding(environ.get("HTTP_ACCEPT_ENCODING", ""))
+        if not encoding or environ.get("REQUEST_METHOD") == "HEAD":
+            return self.wsgi_app(environ, start_response)
+
+        state = {"compress": False}
+
+        def compressing_start_response(status, headers, exc_info=None):
+            if self.should_compress(status, headers):
+                state["compress"] = True
+                headers = [(key, value) for key, value in headers if key.lower() != "content-length"]
+                headers.append(("Content-Encoding", encoding))
+                vary = [value for key, value in headers if key.lower() == "vary"]
+                if not any("accept-encoding" in value.lower() for value in vary):
+                    headers.append(("Vary", "Accept-Encoding"))
+            return start_response(status, headers, exc_info)
+
+        app_iter = self.wsgi_app(environ, compressing_start_response)
+        if not state["compress"]:
+            return app_iter
+        return self.iter_response(app_iter, encoding)
+
+    def iter_response(self, app_iter, encoding: str):
+        try:
+            yield from iter_compressed(app_iter, encoding, self.level)
+        finally:
+            if hasattr(app_iter, "close"):
+                app_iter.close()
+
+
+app.wsgi_app = CompressionMiddleware(
+    app.wsgi_app,
+    level=min(normalize_positive_int(os.getenv(COMPRESS_LEVEL_ENV), 6), 9),
+    min_bytes=normalize_positive_int(os.getenv(COMPRESS_MIN_BYTES_ENV), 1024),
+)
+
+
+def apply_common_cookies(response, lang: str):
+    response.set_cookie(LANG_COOKIE_NAME, lang, max_age=60 * 60 * 24 * 365)
     return response
 
 
-def resolve_report_auth_state() -> tuple[str | None, int]:
-    cookie_value = request.cookies.get(REPORT_AUTH_COOKIE_NAME, "")
-    if not cookie_value or "|" not in cookie_value:
+def get_guest_credentials() -> tuple[str, str]:
+    username = os.getenv(GUEST_USERNAME_ENV, "guest").strip() or "guest"
+    password = os.getenv(GUEST_PASSWORD_ENV, "guest").strip() or "guest"
+    return username, password
+
+
+def get_admin_credentials() -> tuple[str, str]:
+    username = os.getenv(ADMIN_USERNAME_ENV, "admin").strip() or "admin"
+    password = os.getenv(ADMIN_PASSWORD_ENV, "admin").strip() or "admin"
+    return username, password
+
+
+def credentials_match(provided: tuple[str, str], expected: tuple[str, str]) -> bool:
+    username_ok = hmac.compare_digest(provided[0].encode("utf-8"), expected[0].encode("utf-8"))
+    password_ok = hmac.compare_digest(provided[1].encode("utf-8"), expected[1].encode("utf-8"))
+    return username_ok and password_ok
+
+
+# Read once at startup, like AUTH_SIGNING_KEY (which already mixes them in,
+# so a password change needs a restart either way), instead of per request.
+GUEST_CREDENTIALS = get_guest_credentials()
+ADMIN_CREDENTIALS = get_admin_credentials()
+
+
+def sign_report_auth_payload(payload: str) -> str:
+    digest = hmac.new(AUTH_SIGNING_KEY, payload.encode("utf-8"), hashlib.sha256).digest()
+    return base64.urlsafe_b64encode(digest).rstrip(b"=").decode("ascii")
+
+
+def build_report_auth_cookie_value(role: str, expires_at: int) -> str:
+    payload = f"{role}.{expires_at}.{secrets.token_urlsafe(12)}"
+    return f"{payload}.{sign_report_auth_payload(payload)}"
+
+
+def verify_report_auth_token(token: str) -> tuple[str | None, int]:
+    parts = token.split(".")
+    if len(parts) != 4:
+        return None, 0
+
+    role, expires_raw, nonce, signature = parts
+    expected_signature = sign_report_auth_payload(f"{role}.{expires_raw}.{nonce}")
+    if not hmac.compare_digest(signature.encode("ascii", "replace"), expected_signature.encode("ascii")):
+        return None, 0
+    if role not in REPORT_ROLES:
         return None, 0
 
-    token, expires_raw = cookie_value.rsplit("|", 1)
     try:
         expires_at = int(expires_raw)
     except ValueError:
@@ -961,12 +3400,31 @@ def resolve_report_auth_state() -> tuple[str | None, int]:
     remaining_seconds = expires_at - int(now().timestamp())
     if remaining_seconds <= 0:
         return None, 0
+    return role, remaining_seconds
+
+
+def set_report_auth_cookie(response, role: str, expires_at: int | None = None):
+    cookie_expires_at = expires_at if expires_at is not None else int(now().timestamp()) + REPORT_SESSION_TIMEOUT_SECONDS
+    response.set_cookie(
+        REPORT_AUTH_COOKIE_NAME,
+        build_report_auth_cookie_value(role, cookie_expires_at),
+        max_age=60 * 60 * 8,
+        httponly=True,
+    )
+    return response
+
+
+def clear_report_auth_cookie(response):
+    response.delete_cookie(REPORT_AUTH_COOKIE_NAME)
+    return response
 
-    if token == build_auth_cookie_token("admin"):
-        return "admin", remaining_seconds
-    if token == build_auth_cookie_token("guest"):
-        return "guest", remaining_seconds
-    return None, 0
+
+def resolve_report_auth_state() -> tuple[str | None, int]:
+    cached_state = g.get("report_auth_state")
+    if cached_state is None:
+        cached_state = verify_report_auth_token(request.cookies.get(REPORT_AUTH_COOKIE_NAME, ""))
+        g.report_auth_state = cached_state
+    return cached_state
 
 
 def resolve_current_user_role() -> str | None:
@@ -980,13 +3438,183 @@ def resolve_session_remaining_seconds() -> int:
 
 
 def ensure_report_viewer() -> bool:
-    return resolve_current_user_role() in {"guest", "admin"}
+    return resolve_current_user_role() in REPORT_ROLES
 
 
 def ensure_special_admin() -> bool:
     return resolve_current_user_role() == "admin"
 
 
+def ensure_api_admin() -> bool:
+    # Scripts pushing offline data authenticate with HTTP Basic admin
+    # credentials; a browser session holding the admin cookie also works.
+    if ensure_special_admin():
+        return True
+    authorization = request.authorization
+    if authorization is None or authorization.type != "basic":
+        return False
+    provided = (authorization.username or "", authorization.password or "")
+    return credentials_match(provided, ADMIN_CREDENTIALS)
+
+
+def get_profile_request_mode() -> str:
+    raw_mode = request.args.get(PROFILE_QUERY_PARAM) or request.headers.get(PROFILE_HEADER_NAME, "")
+    mode = raw_mode.strip().lower()
+    if mode in {"1", "true", "yes", "on"}:
+        return "header"
+    if mode in {"html", "pstats"}:
+        return mode
+    return ""
+
+
+def prune_request_profiles(profile_dir: Path, max_files: int) -> None:
+    stats_files = sorted(profile_dir.glob("*.pstats"))
+    for stale_path in stats_files[: max(len(stats_files) - max_files, 0)]:
+        stale_path.unlink(missing_ok=True)
+        stale_path.with_suffix(".json").unlink(missing_ok=True)
+
+
+def save_request_profile(profiler: cProfile.Profile, elapsed_seconds: float) -> str:
+    PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+    profile_id = f"{datetime.now():%Y%m%d-%H%M%S}-{secrets.token_hex(4)}"
+    profiler.dump_stats(str(PROFILE_DIR / f"{profile_id}.pstats"))
+    meta = {
+        "method": request.method,
+        "path": request.full_path.rstrip("?"),
+        "endpoint": request.endpoint or "",
+        "elapsed_ms": round(elapsed_seconds * 1000, 2),
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+    }
+    (PROFILE_DIR / f"{profile_id}.json").write_text(json.dumps(meta, ensure_ascii=False), encoding="utf-8")
+    prune_request_profiles(PROFILE_DIR, PROFILE_MAX_FILES)
+    return profile_id
+
+
+def resolve_profile_path(profile_id: str) -> Path | None:
+    if not PROFILE_ID_PATTERN.match(profile_id):
+        return None
+    path = PROFILE_DIR / f"{profile_id}.pstats"
+    return path if path.exists() else None
+
+
+def format_profile_function(func: tuple[str, int, str]) -> str:
+    filename, line_number, function_name = func
+    if filename == "~" and line_number == 0:
+        return function_name
+    return f"{Path(filename).name}:{line_number}({function_name})"
+
+
+def build_profile_summary(profile_id: str, limit: int = PROFILE_TOP_FUNCTIONS) -> dict:
+    path = PROFILE_DIR / f"{profile_id}.pstats"
+    stats = pstats.Stats(str(path))
+    stats.sort_stats("cumulative")
+
+    rows = []
+    for func in stats.fcn_list[:limit]:
+        primitive_calls, total_calls, total_time, cumulative_time, _ = stats.stats[func]
+        rows.append(
+            {
+                "function": format_profile_function(func),
+                "calls": total_calls if total_calls == primitive_calls else f"{total_calls}/{primitive_calls}",
+                "total_ms": round(total_time * 1000, 3),
+                "cumulative_ms": round(cumulative_time * 1000, 3),
+                "per_call_ms": round(cumulative_time * 1000 / primitive_calls, 3) if primitive_calls else 0,
+            }
+        )
+
+    meta_path = path.with_suffix(".json")
+    meta = json.loads(meta_path.read_text(encoding="utf-8")) if meta_path.exists() else {}
+    return {
+        "profile_id": profile_id,
+        "meta": meta,
+        "total_calls": stats.total_calls,
+        "total_ms": round(stats.total_tt * 1000, 3),
+        "rows": rows,
+    }
+
+
+def render_profile_summary(profile_id: str):
+    return render_template(
+        "admin_profile.html",
+        summary=build_profile_summary(profile_id),
+        download_url=url_for("admin_profile_download", profile_id=profile_id),
+    )
+
+
+@app.before_request
+def start_request_profiler():
+    if request.endpoint in {"admin_profile_summary", "admin_profile_download"}:
+        return None
+
+    mode = get_profile_request_mode()
+    if mode and not ensure_special_admin():
+        mode = ""
+    if not mode and not (PROFILE_SAMPLE_RATE and random.random() < PROFILE_SAMPLE_RATE):
+        return None
+
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        # Another profiler is already active on this interpreter.
+        return None
+    g.request_profiler = profiler
+    g.request_profile_mode = mode
+    g.request_profile_started = perf_counter()
+    return None
+
+
+def stop_request_profiler() -> str | None:
+    profiler = g.pop("request_profiler", None)
+    if profiler is None:
+        return None
+    profiler.disable()
+    return save_request_profile(profiler, perf_counter() - g.request_profile_started)
+
+
+@app.after_request
+def finish_request_profiler(response):
+    profile_id = stop_request_profiler()
+    if profile_id is None:
+        return response
+
+    mode = g.pop("request_profile_mode", "")
+    if mode == "html":
+        return make_response(render_profile_summary(profile_id))
+    if mode == "pstats":
+        return send_file(PROFILE_DIR / f"{profile_id}.pstats", as_attachment=True, download_name=f"{profile_id}.pstats")
+    if mode:
+        response.headers["X-Survey-Profile-Id"] = profile_id
+        response.headers["X-Survey-Profile-Url"] = url_for("admin_profile_summary", profile_id=profile_id)
+    return response
+
+
+@app.teardown_request
+def release_request_profiler(error: BaseException | None) -> None:
+    # after_request is skipped when the view raises; the profiler would
+    # otherwise stay enabled on this thread and block every later profile.
+    stop_request_profiler()
+
+
+@app.get("/admin/profiles/<profile_id>")
+def admin_profile_summary(profile_id: str):
+    if not ensure_special_admin():
+        return "Forbidden", 403
+    if resolve_profile_path(profile_id) is None:
+        return "Not Found", 404
+    return render_profile_summary(profile_id)
+
+
+@app.get("/admin/profiles/<profile_id>.pstats")
+def admin_profile_download(profile_id: str):
+    if not ensure_special_admin():
+        return "Forbidden", 403
+    path = resolve_profile_path(profile_id)
+    if path is None:
+        return "Not Found", 404
+    return send_file(path, as_attachment=True, download_name=path.name, mimetype="application/octet-stream")
+
+
 @app.route("/admin/login", methods=["GET", "POST"])
 def admin_login():
     lang = get_lang()
@@ -995,16 +3623,15 @@ def admin_login():
     if not next_url.startswith("/admin"):
         next_url = url_for("admin_report", lang=lang)
 
-    admin_username, admin_password = get_admin_credentials()
-    guest_username, guest_password = get_guest_credentials()
     error_message = ""
     if request.method == "POST":
         provided_username = request.form.get("username", "").strip()
         provided_password = request.form.get("password", "").strip()
+        provided = (provided_username, provided_password)
         role = None
-        if provided_username == admin_username and provided_password == admin_password:
+        if credentials_match(provided, ADMIN_CREDENTIALS):
             role = "admin"
-        elif provided_username == guest_username and provided_password == guest_password:
+        elif credentials_match(provided, GUEST_CREDENTIALS):
             role = "guest"
 
         if role:
@@ -1019,10 +3646,7 @@ def admin_login():
             "admin_login.html",
             html_lang=get_html_lang(lang),
             current_lang=lang,
-            lang_urls={
-                "zh-TW": url_for("admin_login", lang="zh-TW", next=next_url),
-                "en": url_for("admin_login", lang="en", next=next_url),
-            },
+            lang_urls=build_lang_urls("admin_login", next=next_url),
             next_url=next_url,
             title=ui["admin_login"],
             submit_text=ui["admin_login"],
@@ -1045,7 +3669,7 @@ def admin_logout():
 @app.post("/admin/session/reset")
 def admin_session_reset():
     role = resolve_current_user_role()
-    if role not in {"guest", "admin"}:
+    if role not in REPORT_ROLES:
         return "Forbidden", 403
 
     response = make_response(jsonify({"remaining_seconds": REPORT_SESSION_TIMEOUT_SECONDS}))
@@ -1053,6 +3677,47 @@ def admin_session_reset():
     return response
 
 
+@app.get("/assets/<fingerprint>/<path:filename>")
+def static_asset(fingerprint: str, filename: str):
+    asset = load_static_asset(filename)
+    if asset is None or asset["fingerprint"] != fingerprint:
+        return "Not Found", 404
+
+    use_gzip = asset["gzip"] is not None and request.accept_encodings["gzip"] > 0
+    etag = f"{fingerprint}-gz" if use_gzip else fingerprint
+    if etag in request.if_none_match:
+        response = make_response("", 304)
+    else:
+        response = make_response(asset["gzip"] if use_gzip else asset["content"])
+        response.headers["Content-Type"] = asset["mimetype"]
+        if use_gzip:
+            response.headers["Content-Encoding"] = "gzip"
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = STATIC_ASSET_CACHE_CONTROL
+    response.headers["Vary"] = "Accept-Encoding"
+    return response
+
+
+@app.before_request
+def bind_active_survey():
+    # Survey pages name the survey in the path; admin pages and the API take
+    # ?survey=<slug> and default to the built-in survey.
+    slug = (request.view_args or {}).get("slug") or request.args.get("survey", "").strip() or SURVEY_SLUG
+    if get_survey(slug) is None:
+        return tr("找不到問卷", get_lang()), 404
+    g.survey_slug = slug
+    return None
+
+
+@app.url_defaults
+def add_active_survey(endpoint: str, values: dict) -> None:
+    slug = g.get("survey_slug", SURVEY_SLUG)
+    if slug == SURVEY_SLUG or "survey" in values or "slug" in values:
+        return
+    if endpoint in SURVEY_SCOPED_ENDPOINTS:
+        values["survey"] = slug
+
+
 @app.get("/")
 def home():
     lang = get_lang()
@@ -1063,24 +3728,22 @@ def home():
 def survey(slug: str):
     lang = get_lang()
     ui = build_ui_texts(lang)
-    open_window_parts = build_open_window_parts(lang)
-
-    if slug != SURVEY_SLUG:
+    active_survey = get_survey(slug)
+    if active_survey is None:
         return tr("找不到問卷", lang), 404
 
-    lang_urls = {
-        "zh-TW": url_for("survey", slug=SURVEY_SLUG, lang="zh-TW"),
-        "en": url_for("survey", slug=SURVEY_SLUG, lang="en"),
-    }
+    open_window_parts = build_open_window_parts(lang)
+    survey_title = tr(active_survey["title"], lang)
+    lang_urls = build_lang_urls("survey", slug=slug)
 
     if not is_survey_open():
         response = make_response(
             render_template(
                 "closed.html",
                 html_lang=get_html_lang(lang),
-                title=tr(CLOSED_MESSAGE_TITLE, lang),
-                message=tr(CLOSED_MESSAGE_BODY, lang),
-                survey_title=tr(SURVEY_TITLE, lang),
+                title=tr(active_survey["closed_message_title"], lang),
+                message=tr(active_survey["closed_message_body"], lang),
+                survey_title=survey_title,
                 open_window_parts=open_window_parts,
                 ui=ui,
                 lang_urls=lang_urls,
@@ -1090,73 +3753,116 @@ def survey(slug: str):
         )
         return apply_common_cookies(response, lang)
 
-    localized_fields = localize_form_definition(lang)
-    basic_fields = [field for field in localized_fields if field.get("section") == "basic"]
-    questionnaire_fields = [field for field in localized_fields if field.get("section") != "basic"]
-    questionnaire_rows = build_questionnaire_rows(questionnaire_fields)
+    localized_form = active_survey["localized_forms"][lang]
+    localized_fields = localized_form["fields"]
+    basic_fields = localized_form["basic_fields"]
+    questionnaire_rows = localized_form["questionnaire_rows"]
+
+    def render_form(existing: dict, error_message: str = "", status: int = 200, headers: dict | None = None):
+        response = make_response(
+            render_template(
+                "form.html",
+                html_lang=get_html_lang(lang),
+                survey_title=survey_title,
+                basic_fields=basic_fields,
+                questionnaire_rows=questionnaire_rows,
+                existing=existing,
+                draft_url=url_for("survey_draft", slug=slug, lang=lang),
+                open_window_parts=open_window_parts,
+                ui=ui,
+                lang_urls=lang_urls,
+                current_lang=lang,
+                error_message=error_message,
+            ),
+            status,
+            headers or {},
+        )
+        return apply_common_cookies(response, lang)
 
     if request.method == "POST":
+        admission = SUBMISSION_ADMISSION
         answers = collect_answers(localized_fields)
+        # Rejected submits re-render the form with the answers filled back
+        # in, so a retry does not mean retyping everything.
+        retry_seconds = admission.take_token(request.remote_addr or "")
+        if retry_seconds:
+            retry_headers = build_retry_after_headers(retry_seconds)
+            message = tr("送出次數過於頻繁，請於 {seconds} 秒後再送出；已填寫的內容已保留。", lang)
+            return render_form(answers, message.format(seconds=retry_headers["Retry-After"]), 429, retry_headers)
+
         department_name = str(answers.get("department_name", "")).strip()
         person_name = str(answers.get("person_name", "")).strip()
 
         if not department_name or not person_name:
-            response = make_response(
-                render_template(
-                    "form.html",
-                    html_lang=get_html_lang(lang),
-                    survey_title=tr(SURVEY_TITLE, lang),
-                    basic_fields=basic_fields,
-                    questionnaire_rows=questionnaire_rows,
-                    existing=answers,
-                    open_window_parts=open_window_parts,
-                    ui=ui,
-                    lang_urls=lang_urls,
-                    current_lang=lang,
-                    error_message="請先填寫訪談部門與訪談人員，系統才可判斷更新或新增。",
-                )
-            )
-            return apply_common_cookies(response, lang)
+            return render_form(answers, "請先填寫訪談部門與訪談人員，系統才可判斷更新或新增。")
 
-        upsert_response(answers)
+        if not admission.acquire_slot():
+            retry_headers = build_retry_after_headers(admission.max_queue_seconds)
+            message = tr("系統忙碌中，請於 {seconds} 秒後再送出；已填寫的內容已保留。", lang)
+            return render_form(answers, message.format(seconds=retry_headers["Retry-After"]), 503, retry_headers)
+        try:
+            upsert_response(answers)
+        finally:
+            admission.release_slot()
+        draft_key = get_request_draft_key()
+        if draft_key:
+            delete_draft(draft_key)
 
         response = make_response(
             render_template(
                 "success.html",
                 html_lang=get_html_lang(lang),
-                survey_title=tr(SURVEY_TITLE, lang),
-                message=tr(SUCCESS_MESSAGE, lang),
-                survey_url=url_for("survey", slug=SURVEY_SLUG, lang=lang),
+                survey_title=survey_title,
+                message=tr(active_survey["success_message"], lang),
+                survey_url=url_for("survey", slug=slug, lang=lang),
                 ui=ui,
                 lang_urls=lang_urls,
                 current_lang=lang,
             )
         )
+        response.delete_cookie(DRAFT_COOKIE_NAME, path=url_for("survey", slug=slug))
         return apply_common_cookies(response, lang)
 
-    response = make_response(
-        render_template(
-            "form.html",
-            html_lang=get_html_lang(lang),
-            survey_title=tr(SURVEY_TITLE, lang),
-            basic_fields=basic_fields,
-            questionnaire_rows=questionnaire_rows,
-            existing={},
-            open_window_parts=open_window_parts,
-            ui=ui,
-            lang_urls=lang_urls,
-            current_lang=lang,
-            error_message="",
-        )
+    draft_key = get_request_draft_key()
+    return render_form((load_draft(draft_key) if draft_key else None) or {})
+
+
+@app.post("/q/<slug>/draft")
+def survey_draft(slug: str):
+    # Debounced autosave from form.js; drafts are kept apart from responses
+    # until the real submit.
+    if not is_survey_open():
+        return "", 410
+    if (request.content_length or 0) > DRAFT_MAX_BYTES:
+        return "", 413
+    client_key = request.remote_addr or ""
+    retry_seconds = DRAFT_ADMISSION.take_token(client_key)
+    if retry_seconds:
+        return "", 429, build_retry_after_headers(retry_seconds)
+    draft_key = get_request_draft_key()
+    if not has_draft_room(draft_key, client_key):
+        return "", 429
+    lang = get_lang()
+    answers = collect_answers(get_survey(slug)["localized_forms"][lang]["fields"])
+    draft_key = draft_key or secrets.token_urlsafe(24)
+    save_draft(draft_key, answers, client_key)
+    response = make_response("", 204)
+    response.set_cookie(
+        DRAFT_COOKIE_NAME,
+        draft_key,
+        max_age=DRAFT_TTL_HOURS * 60 * 60,
+        path=url_for("survey", slug=slug),
+        httponly=True,
+        samesite="Lax",
     )
-    return apply_common_cookies(response, lang)
+    return response
 
 
 @app.get("/admin/report")
 def admin_report():
     lang = get_lang()
     current_role, session_remaining_seconds = resolve_report_auth_state()
-    if current_role not in {"guest", "admin"}:
+    if current_role not in REPORT_ROLES:
         next_url = request.full_path.rstrip("?")
         response = make_response(redirect(url_for("admin_login", lang=lang, next=next_url)))
         response = clear_report_auth_cookie(response)
@@ -1165,22 +3871,62 @@ def admin_report():
     admin_ui = build_admin_ui_texts(lang)
     can_manage_exports = bool(current_role)
     can_manage_import_tools = current_role == "admin"
-    selected_date = request.args.get("date", "").strip()
+    filters = get_report_filter_args()
+    filter_url_args = build_report_filter_url_args(filters)
     page = normalize_positive_int(request.args.get("page"), 1)
     per_page = normalize_positive_int(request.args.get("per_page"), 10)
     allowed_per_page = [10, 20, 50]
     if per_page not in allowed_per_page:
         per_page = 10
-    if not selected_date:
-        selected_date = now().strftime("%Y-%m-%d")
-
-    all_records = get_report_records(lang)
-    available_dates = build_available_dates(all_records)
 
-    records = filter_records_by_date(all_records, selected_date)
-    paged_records, current_page, total_pages = paginate_records(records, page, per_page)
-    summary = build_report_summary(records)
-    selected_date_display = format_filter_date_value(selected_date, lang)
+    # Apply pending invalidations before reading: a write landing after the
+    # records are read must stay unapplied until the next sync, or its stale
+    # card would be cached as current.
+    sync_record_fragment_cache()
+    facets = get_report_facets(filters)
+    current_page, total_pages = paginate(facets["total"], page, per_page)
+    records = []
+    if facets["total"]:
+        records = get_report_records(lang, **filters, limit=per_page, offset=(current_page - 1) * per_page)
+    summary = {
+        "total_submissions": facets["total"],
+        "department_count": facets["department_count"],
+        "latest_submitted_at": format_report_datetime(facets["latest_submitted_at"], lang) if facets["latest_submitted_at"] else "—",
+    }
+    date_from_display = format_filter_date_value(filters["date_from"], lang)
+    date_to_display = format_filter_date_value(filters["date_to"], lang)
+    if filters["date_from"] == filters["date_to"]:
+        selected_date_display = date_from_display
+    elif filters["date_from"] or filters["date_to"]:
+        selected_date_display = f"{date_from_display or '…'} ~ {date_to_display or '…'}"
+    else:
+        selected_date_display = ""
+    facet_fields = [
+        {
+            "name": param,
+            "label": admin_ui[f"facet_{param}"],
+            "selected": filters[key],
+            "options": facets["facets"][column],
+        }
+        for param, key, column in (
+            ("department", "department", "department_name"),
+            ("system", "main_system", "main_system"),
+            ("role", "main_role", "main_role"),
+        )
+    ]
+    # Facet selects list every value; the day chips stop at the most recent
+    # REPORT_DATE_FACET_CHIPS and point at the date range inputs for the rest.
+    shown_dates = facets["dates"][:REPORT_DATE_FACET_CHIPS]
+    date_facets = [
+        {
+            "label": format_filter_date_value(option["value"], lang),
+            "count": option["count"],
+            "active": filters["date_from"] == filters["date_to"] == option["value"],
+            "url": url_for("admin_report", lang=lang, **{**filter_url_args, "date_from": option["value"], "date_to": option["value"]}, per_page=per_page),
+        }
+        for option in shown_dates
+    ]
+    trends = {granularity: get_submission_trend(granularity) for granularity in ("day", "hour")}
 
     response = make_response(
         render_template(
@@ -1188,42 +3934,181 @@ def admin_report():
             html_lang=get_html_lang(lang),
             current_lang=lang,
             admin_ui=admin_ui,
-            survey_title=tr(SURVEY_TITLE, lang),
+            survey_title=tr(get_active_survey()["title"], lang),
             summary=summary,
-            records=paged_records,
-            selected_date=selected_date,
+            trends=trends,
+            trend_url=url_for("admin_report_trend"),
+            records=records,
+            filters=filters,
+            filter_url_args=filter_url_args,
+            has_filters=any(filters.values()),
+            facet_fields=facet_fields,
+            date_facets=date_facets,
+            more_date_count=len(facets["dates"]) - len(shown_dates),
+            all_dates_url=url_for("admin_report", lang=lang, **{**filter_url_args, "date_from": "", "date_to": ""}, per_page=per_page),
+            all_dates_active=not filters["date_from"] and not filters["date_to"],
             selected_date_display=selected_date_display,
-            available_dates=available_dates,
+            search_query=filters["search_query"],
             current_page=current_page,
             total_pages=total_pages,
             per_page=per_page,
             allowed_per_page=allowed_per_page,
             can_manage_exports=can_manage_exports,
             can_manage_import_tools=can_manage_import_tools,
+            current_role=current_role,
             is_authenticated=bool(current_role),
             session_timeout_seconds=session_remaining_seconds,
             session_reset_url=url_for("admin_session_reset"),
-            admin_login_url=url_for("admin_login", lang=lang, next=url_for("admin_report", lang=lang, date=selected_date, page=current_page, per_page=per_page)),
+            events_url=url_for("admin_report_events", lang=lang, **filter_url_args),
+            record_fragment_url=url_for("admin_report_record_fragment", record_id=0, lang=lang, **filter_url_args).replace("/0/", "/__id__/", 1),
+            admin_login_url=url_for("admin_login", lang=lang, next=url_for("admin_report", lang=lang, **filter_url_args, page=current_page, per_page=per_page)),
             admin_logout_url=url_for("admin_logout", lang=lang),
-            export_url=url_for("admin_report_export_csv", lang=lang),
-            export_pdf_url=url_for("admin_report_export_pdf", lang=lang),
-            prev_page_url=url_for("admin_report", lang=lang, date=selected_date, page=max(current_page - 1, 1), per_page=per_page),
-            next_page_url=url_for("admin_report", lang=lang, date=selected_date, page=min(current_page + 1, total_pages), per_page=per_page),
-            lang_urls={
-                "zh-TW": url_for("admin_report", lang="zh-TW", date=selected_date, page=current_page, per_page=per_page),
-                "en": url_for("admin_report", lang="en", date=selected_date, page=current_page, per_page=per_page),
-            },
+            export_url=url_for("admin_report_export_csv", lang=lang, **filter_url_args),
+            export_pdf_url=url_for("admin_report_export_pdf", lang=lang, **filter_url_args),
+            prev_page_url=url_for("admin_report", lang=lang, **filter_url_args, page=max(current_page - 1, 1), per_page=per_page),
+            next_page_url=url_for("admin_report", lang=lang, **filter_url_args, page=min(current_page + 1, total_pages), per_page=per_page),
+            lang_urls=build_lang_urls("admin_report", **filter_url_args, page=current_page, per_page=per_page),
         )
     )
     return apply_common_cookies(response, lang)
 
 
+def get_export_filter_args(args=None) -> dict:
+    args = request.args if args is None else args
+    return {
+        "date_from": args.get("date_from", "").strip(),
+        "date_to": args.get("date_to", "").strip(),
+        "department": args.get("department", "").strip(),
+        "search_query": args.get("q", "").strip(),
+        "main_system": args.get("system", "").strip(),
+        "main_role": args.get("role", "").strip(),
+    }
+
+
+def get_report_filter_args(args=None) -> dict:
+    """Report page filters, with the same keys as get_export_filter_args.
+
+    ``date`` is kept as a one-day shorthand. Without any date parameter the
+    page opens on today, while an explicitly empty range means all dates.
+    """
+    args = request.args if args is None else args
+    filters = get_export_filter_args(args)
+    single_date = args.get("date", "").strip()
+    if single_date and not filters["date_from"] and not filters["date_to"]:
+        filters["date_from"] = filters["date_to"] = single_date
+    elif not single_date and "date_from" not in args and "date_to" not in args:
+        filters["date_from"] = filters["date_to"] = now().strftime("%Y-%m-%d")
+    return filters
+
+
+def build_report_filter_url_args(filters: dict) -> dict:
+    # Empty dates stay in the URL so "all dates" survives paging and reloads.
+    return {
+        "date_from": filters["date_from"],
+        "date_to": filters["date_to"],
+        "department": filters["department"] or None,
+        "system": filters["main_system"] or None,
+        "role": filters["main_role"] or None,
+        "q": filters["search_query"] or None,
+    }
+
+
+@app.get("/admin/report/events")
+def admin_report_events():
+    if not ensure_report_viewer():
+        return "Forbidden", 403
+
+    lang = get_lang()
+    filters = get_report_filter_args()
+    raw_last_event_id = request.headers.get("Last-Event-ID") or request.args.get("last_event_id")
+    try:
+        last_event_id = max(int(str(raw_last_event_id)), 0)
+    except (TypeError, ValueError):
+        last_event_id = None
+
+    response = Response(
+        stream_with_context(
+            iter_report_events(last_event_id, lang, filters)
+        ),
+        mimetype="text/event-stream",
+    )
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
+
+
+@app.get("/admin/report/records/<int:record_id>/fragment")
+def admin_report_record_fragment(record_id: int):
+    if not ensure_report_viewer():
+        return "Forbidden", 403
+
+    lang = get_lang()
+    sync_record_fragment_cache()
+    records = get_report_records(lang, record_id=record_id, **get_report_filter_args())
+    if not records:
+        return "", 204
+
+    return render_cached_record(records[0], build_admin_ui_texts(lang), lang, resolve_current_user_role())
+
+
+@app.get("/admin/report/records/<int:record_id>/history")
+def admin_report_record_history(record_id: int):
+    if not ensure_special_admin():
+        return "Forbidden", 403
+    lang = get_lang()
+    versions = get_response_versions(record_id, lang)
+    if not versions:
+        return "Not Found", 404
+    return render_template(
+        "admin_history.html",
+        html_lang=get_html_lang(lang),
+        admin_ui=build_admin_ui_texts(lang),
+        survey_title=tr(get_active_survey()["title"], lang),
+        versions=versions,
+        report_url=url_for("admin_report", lang=lang),
+    )
+
+
+@app.get("/admin/report/trend")
+def admin_report_trend():
+    if not ensure_report_viewer():
+        return "Forbidden", 403
+
+    granularity = request.args.get("granularity", "day").strip()
+    if granularity not in RESPONSE_ROLLUPS:
+        return jsonify({"error": "granularity must be hour or day"}), 400
+    return jsonify(get_submission_trend(granularity, request.args.get("department", "").strip() or None))
+
+
+@app.get("/admin/report/fragment-cache")
+def admin_report_fragment_cache():
+    if not ensure_special_admin():
+        return "Forbidden", 403
+    return jsonify(RECORD_FRAGMENT_CACHE.stats())
+
+
+@app.get("/admin/submissions/admission")
+def admin_submission_admission():
+    if not ensure_special_admin():
+        return "Forbidden", 403
+    return jsonify(SUBMISSION_ADMISSION.stats())
+
+
+@app.post("/admin/backup")
+def admin_backup():
+    if not ensure_special_admin():
+        return "Forbidden", 403
+    result = create_database_backup()
+    result["path"] = Path(result["path"]).name
+    return jsonify(result)
+
+
 @app.get("/admin/report/export.csv")
 def admin_report_export_csv():
     if not ensure_report_viewer():
         return "Forbidden", 403
 
-    records = get_report_records()
+    records = get_report_records(**get_export_filter_args(), from_snapshot=True)
     payload = build_report_csv(records)
     filename = f"survey-report-{datetime.now():%Y%m%d-%H%M%S}.csv"
 
@@ -1233,18 +4118,55 @@ def admin_report_export_csv():
     return response
 
 
+@app.get("/admin/report/export.ndjson")
+def admin_report_export_ndjson():
+    if not ensure_report_viewer():
+        return "Forbidden", 403
+
+    filename = f"survey-report-{datetime.now():%Y%m%d-%H%M%S}.ndjson"
+
+    response = Response(
+        stream_with_context(iter_report_ndjson(get_export_filter_args())),
+        mimetype="application/x-ndjson",
+    )
+    response.headers["Content-Disposition"] = f"attachment; filename={filename}"
+    return response
+
+
+@app.get("/admin/report/export.parquet")
+def admin_report_export_parquet():
+    if not ensure_report_viewer():
+        return "Forbidden", 403
+
+    if pyarrow_parquet is None:
+        return "Parquet export needs pyarrow; use /admin/report/export.ndjson", 501
+
+    filename = f"survey-report-{datetime.now():%Y%m%d-%H%M%S}.parquet"
+    response = Response(
+        stream_with_context(iter_report_parquet(get_export_filter_args())),
+        mimetype="application/vnd.apache.parquet",
+    )
+    response.headers["Content-Disposition"] = f"attachment; filename={filename}"
+    return response
+
+
 @app.get("/admin/report/export.pdf")
 def admin_report_export_pdf():
     if not ensure_report_viewer():
         return "Forbidden", 403
 
-    records = get_report_records()
-    summary = build_report_summary(records)
-    payload = build_report_pdf(records, summary)
+    spool = tempfile.SpooledTemporaryFile(max_size=PDF_SPOOL_MAX_MEMORY_BYTES)
+    try:
+        write_report_pdf(spool, get_export_filter_args())
+    except Exception:
+        spool.close()
+        raise
+    content_length = spool.tell()
+    spool.seek(0)
     filename = f"survey-report-{datetime.now():%Y%m%d-%H%M%S}.pdf"
 
-    response = make_response(payload)
-    response.headers["Content-Type"] = "application/pdf"
+    response = Response(iter_spooled_file(spool), mimetype="application/pdf")
+    response.headers["Content-Length"] = str(content_length)
     response.headers["Content-Disposition"] = f"attachment; filename={filename}"
     return response
 
@@ -1255,7 +4177,7 @@ def admin_report_import_csv():
         return "Forbidden", 403
 
     lang = get_lang()
-    selected_date = request.form.get("date", "").strip()
+    filters = get_report_filter_args(request.form)
     page = request.form.get("page", "1").strip()
     per_page = request.form.get("per_page", "10").strip()
 
@@ -1264,23 +4186,247 @@ def admin_report_import_csv():
         payload = uploaded.read().decode("utf-8-sig", errors="ignore")
         import_report_csv(payload)
 
-    return redirect(url_for("admin_report", lang=lang, date=selected_date, page=page, per_page=per_page))
+    return redirect(url_for("admin_report", lang=lang, **build_report_filter_url_args(filters), page=page, per_page=per_page))
 
 
 @app.post("/admin/report/delete/<int:record_id>")
 def admin_report_delete_one(record_id: int):
-    with sqlite3.connect(DB_PATH) as conn:
-        conn.execute(
-            "DELETE FROM responses WHERE survey_slug = ? AND id = ?",
-            (SURVEY_SLUG, record_id),
-        )
+    survey_slug = get_active_survey()["slug"]
+    with connect_db() as conn:
+        deleted = conn.execute(
+            "DELETE FROM responses WHERE survey_slug = ? AND id = ? RETURNING department_name, submitted_at",
+            (survey_slug, record_id),
+        ).fetchone()
+        if deleted:
+            move_response_rollups(conn, survey_slug, deleted[0], deleted[1], None)
+            delete_search_document(conn, record_id)
+            delete_report_renders(conn, record_id)
+            record_report_event(conn, "deleted", record_id)
         conn.commit()
+    if deleted:
+        notify_report_listeners()
 
     return redirect(url_for("admin_report"))
 
 
-if __name__ == "__main__":
+@app.post("/api/responses:batch")
+def api_responses_batch():
+    if not ensure_api_admin():
+        return jsonify({"error": "forbidden"}), 403
+
+    content_type = request.mimetype
+    if content_type not in ("application/json", "application/x-ndjson"):
+        return jsonify({"error": "expected application/json or application/x-ndjson"}), 415
+
+    body = request.get_data(cache=False)
+    idempotency_key = request.headers.get("Idempotency-Key", "").strip()
+    if idempotency_key:
+        if not API_IDEMPOTENCY_KEY_PATTERN.match(idempotency_key):
+            return jsonify({"error": "invalid Idempotency-Key"}), 400
+        request_hash = hashlib.sha256(content_type.encode("ascii") + b"\n" + body).hexdigest()
+        stored = reserve_idempotency_key(idempotency_key, request_hash)
+        if stored is False:
+            return jsonify({"error": "Idempotency-Key is in use by a different or in-flight request"}), 409
+        if stored is not None:
+            status_code, response_json = stored
+            response = make_response(response_json, status_code)
+            response.headers["Content-Type"] = "application/json"
+            response.headers["Idempotent-Replayed"] = "true"
+            return response
+
+    status_code = None
+    response_json = None
+    try:
+        try:
+            items = parse_api_batch_items(body, content_type)
+        except (UnicodeDecodeError, ValueError) as error:
+            status_code, payload = 400, {"error": f"invalid body: {error}"}
+        else:
+            if len(items) > API_BATCH_MAX_ITEMS:
+                status_code, payload = 413, {"error": f"at most {API_BATCH_MAX_ITEMS} items per request"}
+            else:
+                status_code, payload = 200, ingest_api_batch(items)
+        response_json = json.dumps(payload, ensure_ascii=False)
+    finally:
+        if idempotency_key:
+            store_idempotent_response(idempotency_key, status_code, response_json)
+
+    response = make_response(response_json, status_code)
+    response.headers["Content-Type"] = "application/json"
+    return response
+
+
+def init_worker_process() -> None:
+    # Runs inside every serving process after fork, so the background threads
+    # belong to the worker; nothing opened by the parent (init_db included)
+    # is reused, each request opens its own connection. gunicorn already logs
+    # each booted worker.
+    start_report_snapshot_refresher()
+    start_report_event_notifier()
+    start_survey_config_watcher()
+    start_draft_purger()
+    start_history_compactor()
+
+
+def resolve_serve_backend(backend: str) -> str:
+    if backend != "auto":
+        return backend
+    if GunicornBaseApplication is not None and os.name != "nt":
+        return "gunicorn"
+    return "waitress"
+
+
+def run_gunicorn_server(options: dict) -> None:
+    class SurveyGunicornApplication(GunicornBaseApplication):
+        def load_config(self):
+            for key, value in options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            return app
+
+    SurveyGunicornApplication().run()
+
+
+def handle_stop_signal(signum, frame):
+    raise SystemExit(0)
+
+
+def serve(
+    host: str,
+    port: int,
+    workers: int,
+    threads: int,
+    keepalive: int,
+    graceful_timeout: int,
+    backend: str = "auto",
+) -> None:
+    resolved_backend = resolve_serve_backend(backend)
+    if resolved_backend == "gunicorn" and GunicornBaseApplication is None:
+        raise SystemExit("gunicorn 未安裝，請改用 --backend waitress")
+    if resolved_backend == "waitress" and waitress_serve is None:
+        raise SystemExit("waitress 未安裝，請先執行 pip install -r requirements.txt")
+
+    init_db()
+    print_startup_info(port)
+    print(f"伺服器：{resolved_backend}｜workers={workers}｜threads={threads}｜keep-alive={keepalive}s")
+
+    if resolved_backend == "gunicorn":
+        run_gunicorn_server(
+            {
+                "bind": f"{host}:{port}",
+                "workers": workers,
+                "threads": threads,
+                "worker_class": "gthread",
+                "keepalive": keepalive,
+                "graceful_timeout": graceful_timeout,
+                "timeout": SERVE_REQUEST_TIMEOUT_SECONDS,
+                "post_fork": lambda server, worker: init_worker_process(),
+            }
+        )
+        return
+
+    if workers > 1:
+        print("waitress 僅支援單一行程，workers 參數將忽略，請以 threads 調整併發量。")
+    # waitress finishes in-flight tasks when the serve loop exits on SystemExit.
+    signal.signal(signal.SIGTERM, handle_stop_signal)
+    init_worker_process()
+    waitress_serve(
+        app,
+        host=host,
+        port=port,
+        threads=threads,
+        channel_timeout=max(keepalive, 1),
+        connection_limit=max(threads * 25, 100),
+        cleanup_interval=max(min(keepalive, 30), 1),
+    )
+
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=f"問卷：{SURVEY_TITLE}")
+    subparsers = parser.add_subparsers(dest="command")
+
+    serve_parser = subparsers.add_parser("serve", help="以正式環境 WSGI 伺服器啟動")
+    serve_parser.add_argument("--host", default=os.getenv(SERVE_HOST_ENV, "0.0.0.0"))
+    serve_parser.add_argument("--port", type=int, default=normalize_positive_int(os.getenv(SERVE_PORT_ENV), 5000))
+    serve_parser.add_argument("--workers", type=int, default=normalize_positive_int(os.getenv(SERVE_WORKERS_ENV), 2))
+    serve_parser.add_argument("--threads", type=int, default=normalize_positive_int(os.getenv(SERVE_THREADS_ENV), 8))
+    serve_parser.add_argument("--keepalive", type=int, default=normalize_positive_int(os.getenv(SERVE_KEEPALIVE_ENV), 5))
+    serve_parser.add_argument(
+        "--graceful-timeout",
+        type=int,
+        default=normalize_positive_int(os.getenv(SERVE_GRACEFUL_TIMEOUT_ENV), 30),
+    )
+    serve_parser.add_argument("--backend", choices=["auto", "gunicorn", "waitress"], default="auto")
+
+    backup_parser = subparsers.add_parser("backup", help="線上備份資料庫（不需停機）")
+    backup_parser.add_argument("--output", type=Path, default=None, help=f"輸出檔案（預設存於 {BACKUP_DIR.name}/）")
+    backup_parser.add_argument("--pages", type=int, default=BACKUP_PAGES_PER_STEP, help="每一步複製的頁數")
+    backup_parser.add_argument("--pause", type=float, default=BACKUP_STEP_PAUSE_SECONDS, help="每一步之間暫停秒數")
+
+    compact_parser = subparsers.add_parser("compact-history", help="封存並清除過舊的填答歷史版本")
+    compact_parser.add_argument("--keep", type=int, default=HISTORY_KEEP_VERSIONS, help="每位填答者保留的最新版本數")
+
+    migrate_parser = subparsers.add_parser("migrate", help="套用尚未執行的資料庫結構遷移")
+    migrate_parser.add_argument("--dry-run", action="store_true", help="只列出待執行的步驟，不修改資料庫")
+    migrate_parser.add_argument("--batch-size", type=int, default=MIGRATION_BATCH_SIZE, help="回填時每個交易處理的筆數")
+    migrate_parser.add_argument("--pause", type=float, default=MIGRATION_BATCH_PAUSE_SECONDS, help="每批之間暫停秒數")
+    migrate_parser.add_argument("--to", type=int, default=None, dest="target_version", help="只遷移到指定版本")
+    return parser
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = build_arg_parser().parse_args(argv)
+    if args.command == "serve":
+        serve(
+            host=args.host,
+            port=args.port,
+            workers=max(args.workers, 1),
+            threads=max(args.threads, 1),
+            keepalive=max(args.keepalive, 0),
+            graceful_timeout=max(args.graceful_timeout, 1),
+            backend=args.backend,
+        )
+        return
+    if args.command == "backup":
+        if args.output is None:
+            result = create_database_backup(args.pages, max(args.pause, 0))
+        else:
+            result = backup_database(args.output, args.pages, max(args.pause, 0))
+        print(json.dumps(result, ensure_ascii=False))
+        return
+    if args.command == "compact-history":
+        init_db()
+        print(json.dumps(compact_response_versions(max(args.keep, 1)), ensure_ascii=False))
+        return
+    if args.command == "migrate":
+        with connect_db() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            print(f"schema version: {get_schema_version(conn)}")
+        started = perf_counter()
+        results = migrate_database(
+            dry_run=args.dry_run,
+            batch_size=args.batch_size,
+            pause_seconds=max(args.pause, 0),
+            target_version=args.target_version,
+            log=print,
+        )
+        if not results:
+            print("nothing to migrate")
+        elif not args.dry_run:
+            print(f"applied {len(results)} step(s) in {perf_counter() - started:.3f}s")
+        return
+
     init_db()
     print_startup_info()
+    start_report_snapshot_refresher()
+    start_report_event_notifier()
+    start_survey_config_watcher()
+    start_draft_purger()
+    start_history_compactor()
     auto_reload = os.getenv("SURVEY_AUTO_RELOAD", "1") == "1"
     app.run(host="0.0.0.0", port=5000, debug=auto_reload, use_reloader=auto_reload)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Submission latency under overload, with and without admission control.
+
+    python benchmarks/bench_admission.py --rows 20000 --clients 32 --seconds 10
+
+Each client thread posts the survey form back to back from its own address.
+"unlimited" lifts every limit; "admission" uses the given concurrency cap and
+queue threshold with a rate limit high enough that only the write slots
+decide. Latency covers every response, shed ones included.
+"""
+
+import argparse
+import random
+import statistics
+import tempfile
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+from synthetic_data import build_answers, populate_database, survey_app
+
+
+def run_load(admission, clients: int, seconds: float) -> tuple[list[float], Counter]:
+    survey_app.SUBMISSION_ADMISSION = admission
+    latencies: list[float] = []
+    statuses: Counter = Counter()
+    deadline = time.perf_counter() + seconds
+
+    def client(index: int) -> None:
+        rng = random.Random(index)
+        http = survey_app.app.test_client()
+        environ = {"REMOTE_ADDR": f"10.0.{index // 250}.{index % 250 + 1}"}
+        while time.perf_counter() < deadline:
+            form = build_answers(rng, rng.randrange(2000))
+            started = time.perf_counter()
+            response = http.post("/q/at", data=form, environ_base=environ)
+            latencies.append((time.perf_counter() - started) * 1000)
+            statuses[response.status_code] += 1
+
+    threads = [threading.Thread(target=client, args=(index,)) for index in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, statuses
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--queue-ms", type=int, default=200)
+    args = parser.parse_args()
+
+    survey_app.is_survey_open = lambda: True
+    modes = [
+        ("unlimited", survey_app.SubmissionAdmission(10**9, 10**9, args.clients, 3600)),
+        ("admission", survey_app.SubmissionAdmission(10**9, 10**9, args.concurrency, args.queue_ms / 1000)),
+    ]
+    print(f"clients={args.clients} seconds={args.seconds} concurrency={args.concurrency} queue_ms={args.queue_ms}")
+    print(f"{'mode':<10} {'requests':>9} {'200':>6} {'503':>6} {'ok/s':>6} {'p50 ms':>7} {'p99 ms':>8} {'max ms':>8}")
+    for name, admission in modes:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            populate_database(Path(tmp_dir) / "bench.db", args.rows)
+            # Fold the bulk load into the database file so no request pays for that checkpoint.
+            with survey_app.connect_db() as conn:
+                conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            latencies, statuses = run_load(admission, args.clients, args.seconds)
+        p99 = statistics.quantiles(latencies, n=100)[98]
+        print(
+            f"{name:<10} {len(latencies):>9} {statuses[200]:>6} {statuses[503]:>6} "
+            f"{statuses[200] / args.seconds:>6.0f} {statistics.median(latencies):>7.1f} {p99:>8.1f} {max(latencies):>8.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Submission latency while an online backup runs.
+
+    python benchmarks/bench_backup.py --rows 50000 --pages 256 --pause 0.01
+
+A writer thread keeps upserting responses; the table shows its latency with
+no backup, with the paced incremental backup and with a single-step copy.
+"""
+
+import argparse
+import statistics
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from synthetic_data import build_answers, populate_database, survey_app
+
+
+def measure_writes(run_backup) -> tuple[list[float], dict | None]:
+    latencies: list[float] = []
+    stop = threading.Event()
+
+    def writer() -> None:
+        import random
+
+        rng = random.Random(11)
+        index = 0
+        while not stop.is_set():
+            answers = build_answers(rng, index % 500)
+            started = time.perf_counter()
+            survey_app.save_response_record(answers)
+            latencies.append((time.perf_counter() - started) * 1000)
+            index += 1
+            time.sleep(0.005)
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    result = run_backup()
+    stop.set()
+    thread.join()
+    return latencies, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--pages", type=int, default=survey_app.BACKUP_PAGES_PER_STEP)
+    parser.add_argument("--pause", type=float, default=survey_app.BACKUP_STEP_PAUSE_SECONDS)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        populate_database(Path(tmp_dir) / "bench.db", args.rows)
+        target = Path(tmp_dir) / "copy.db"
+        modes = [
+            ("no backup", lambda: time.sleep(2) or None),
+            ("incremental", lambda: survey_app.backup_database(target, args.pages, args.pause)),
+            ("single step", lambda: survey_app.backup_database(target, -1, 0)),
+        ]
+        print(f"rows={args.rows} db MB={survey_app.DB_PATH.stat().st_size / 1_000_000:.1f}")
+        print(f"{'mode':<12} {'backup s':>9} {'steps':>6} {'restarts':>9} {'writes':>7} {'p50 ms':>7} {'p99 ms':>7}")
+        for name, run_backup in modes:
+            latencies, result = measure_writes(run_backup)
+            p99 = statistics.quantiles(latencies, n=100)[98] if len(latencies) > 1 else latencies[0]
+            backup_seconds = f"{result['seconds']:.2f}" if result else "—"
+            steps = result["steps"] if result else "—"
+            restarts = result["restarts"] if result else "—"
+            print(
+                f"{name:<12} {backup_seconds:>9} {steps:>6} {restarts:>9} {len(latencies):>7} "
+                f"{statistics.median(latencies):>7.1f} {p99:>7.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
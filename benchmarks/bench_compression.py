@@ -0,0 +1,44 @@
+"""CPU time vs. bytes on the wire for a compressed CSV export.
+
+    python benchmarks/bench_compression.py --rows 50000
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from synthetic_data import populate_database, survey_app
+
+
+def measure(payload: bytes, encoding: str, level: int, chunk_size: int) -> tuple[int, float]:
+    chunks = (payload[offset : offset + chunk_size] for offset in range(0, len(payload), chunk_size))
+    started = time.perf_counter()
+    compressed_size = sum(len(part) for part in survey_app.iter_compressed(chunks, encoding, level))
+    return compressed_size, time.perf_counter() - started
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--chunk-size", type=int, default=64 * 1024)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        populate_database(Path(tmp_dir) / "bench.db", args.rows)
+        payload = survey_app.build_report_csv(survey_app.get_report_records()).encode("utf-8")
+
+    print(f"rows={args.rows} csv_bytes={len(payload):,} chunk={args.chunk_size:,}")
+    print(f"{'encoding':<8} {'level':>5} {'bytes':>12} {'ratio':>7} {'ms':>9} {'MB/s':>8}")
+    for encoding in ("gzip", "deflate"):
+        for level in (1, 3, 6, 9):
+            size, elapsed = measure(payload, encoding, level, args.chunk_size)
+            throughput = len(payload) / elapsed / 1_000_000
+            print(
+                f"{encoding:<8} {level:>5} {size:>12,} {size / len(payload):>7.3f} "
+                f"{elapsed * 1000:>9.1f} {throughput:>8.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
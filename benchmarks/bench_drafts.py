@@ -0,0 +1,69 @@
+"""Cost of draft autosaves and how much the client debounce saves.
+
+    python benchmarks/bench_drafts.py --rows 20000 --bursts 50 --keys 20
+
+A typing trace of ``--bursts`` bursts of ``--keys`` keystrokes is replayed
+against the draft endpoint: once saving on every keystroke, once the way
+form.js does (one save per pause longer than the debounce delay). The table
+shows saves sent, time per save and bytes written to the draft WAL; the
+responses database must stay untouched.
+"""
+
+import argparse
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from synthetic_data import build_answers, populate_database, survey_app
+
+
+def wal_bytes(db_path: Path) -> int:
+    wal_path = Path(f"{db_path}-wal")
+    return wal_path.stat().st_size if wal_path.exists() else 0
+
+
+def replay(forms: list[dict]) -> tuple[float, int, int]:
+    client = survey_app.app.test_client()
+    draft_path = survey_app.get_draft_db_path()
+    client.post("/q/at/draft", data=forms[0])
+    for connect in (survey_app.connect_draft_db, survey_app.connect_db):
+        with connect() as conn:
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    started = time.perf_counter()
+    for form in forms:
+        assert client.post("/q/at/draft", data=form).status_code == 204
+    elapsed = time.perf_counter() - started
+    return elapsed, wal_bytes(draft_path), wal_bytes(survey_app.DB_PATH)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--bursts", type=int, default=50)
+    parser.add_argument("--keys", type=int, default=20)
+    args = parser.parse_args()
+
+    survey_app.is_survey_open = lambda: True
+    rng = random.Random(5)
+    base = build_answers(rng, 0)
+    keystrokes = []
+    for burst in range(args.bursts):
+        for key in range(args.keys):
+            keystrokes.append({**base, "notes": f"{base.get('notes', '')} 第{burst}段" + "字" * key})
+    debounced = [keystrokes[index] for index in range(args.keys - 1, len(keystrokes), args.keys)]
+
+    print(f"rows={args.rows} keystrokes={len(keystrokes)}")
+    print(f"{'mode':<12} {'saves':>6} {'ms/save':>8} {'draft WAL KB':>13} {'responses WAL B':>16}")
+    for name, forms in [("every key", keystrokes), ("debounced", debounced), ("unchanged", [debounced[-1]] * len(debounced))]:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            populate_database(Path(tmp_dir) / "bench.db", args.rows)
+            elapsed, draft_wal, responses_wal = replay(forms)
+        print(
+            f"{name:<12} {len(forms):>6} {elapsed / len(forms) * 1000:>8.2f} "
+            f"{draft_wal / 1024:>13.1f} {responses_wal:>16}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Export cost per format, and how fast an analytics client can load each one.
+
+    python benchmarks/bench_exports.py --rows 100000
+
+The Parquet export and the read timings need pyarrow; without it only CSV
+and NDJSON are measured.
+"""
+
+import argparse
+import io
+import tempfile
+import time
+from pathlib import Path
+
+from synthetic_data import populate_database, survey_app
+
+try:
+    import pyarrow.csv as pyarrow_csv
+    import pyarrow.json as pyarrow_json
+    import pyarrow.parquet as pyarrow_parquet
+except ImportError:
+    pyarrow_csv = pyarrow_json = pyarrow_parquet = None
+
+
+def export_csv() -> bytes:
+    return survey_app.build_report_csv(survey_app.get_report_records()).encode("utf-8")
+
+
+def export_ndjson() -> bytes:
+    return "".join(survey_app.iter_report_ndjson()).encode("utf-8")
+
+
+def export_parquet() -> bytes:
+    return b"".join(survey_app.iter_report_parquet())
+
+
+def read_payload(name: str, payload: bytes):
+    if pyarrow_parquet is None:
+        return None
+    if name == "csv":
+        return pyarrow_csv.read_csv(io.BytesIO(payload)).num_rows
+    if name == "ndjson":
+        return pyarrow_json.read_json(io.BytesIO(payload)).num_rows
+    return pyarrow_parquet.read_table(io.BytesIO(payload)).num_rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        populate_database(Path(tmp_dir) / "bench.db", args.rows)
+        print(f"rows={args.rows} pyarrow={survey_app.pyarrow_parquet is not None}")
+        print(f"{'format':<8} {'export s':>9} {'size MB':>8} {'read s':>7}")
+
+        exports = [("csv", export_csv), ("ndjson", export_ndjson)]
+        if survey_app.pyarrow_parquet is not None:
+            exports.append(("parquet", export_parquet))
+        for name, export in exports:
+            started = time.perf_counter()
+            payload = export()
+            export_seconds = time.perf_counter() - started
+
+            started = time.perf_counter()
+            read_rows = read_payload(name, payload)
+            read_seconds = f"{time.perf_counter() - started:.2f}" if read_rows is not None else "—"
+            print(f"{name:<8} {export_seconds:>9.2f} {len(payload) / 1_000_000:>8.1f} {read_seconds:>7}")
+
+
+if __name__ == "__main__":
+    main()
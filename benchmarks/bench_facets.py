@@ -0,0 +1,66 @@
+"""Report page with facet filters at scale.
+
+    python benchmarks/bench_facets.py --rows 100000
+
+Times the grouped facet pass on its own and full ``/admin/report`` requests
+for one day, all dates, and all dates narrowed by department, system and
+role.
+"""
+
+import argparse
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from synthetic_data import SURVEY_SLUG, populate_database, survey_app
+
+
+def time_ms(func, repeat: int = 5) -> list[float]:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100_000)
+    args = parser.parse_args()
+
+    survey_app.ADMIN_CREDENTIALS = ("bench", "bench-pass")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        populate_database(Path(tmp_dir) / "bench.db", args.rows)
+        survey_app.init_db()
+        with survey_app.connect_db() as conn:
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            department, system, role, day = conn.execute(
+                """
+                SELECT department_name, main_system, main_role, substr(submitted_at, 1, 10)
+                FROM responses WHERE survey_slug = ? ORDER BY id LIMIT 1
+                """,
+                (SURVEY_SLUG,),
+            ).fetchone()
+
+        client = survey_app.app.test_client()
+        client.post("/admin/login", data={"username": "bench", "password": "bench-pass", "next": "/admin/report"})
+        cases = [
+            ("one day", f"date_from={day}&date_to={day}"),
+            ("all dates", "date_from=&date_to="),
+            ("all + department", f"date_from=&date_to=&department={department}"),
+            ("all + dept/sys/role", f"date_from=&date_to=&department={department}&system={system}&role={role}"),
+            ("all + page 50", "date_from=&date_to=&per_page=50&page=50"),
+        ]
+        print(f"rows={args.rows}")
+        with survey_app.app.test_request_context("/admin/report"):
+            facet_ms = time_ms(lambda: survey_app.get_report_facets(survey_app.get_report_filter_args({"date_from": "", "date_to": ""})))
+        print(f"{'facet pass (all dates)':<24} {statistics.median(facet_ms):>8.1f} ms")
+        for name, query in cases:
+            samples = time_ms(lambda: client.get(f"/admin/report?lang=zh-TW&{query}"))
+            print(f"{name:<24} {statistics.median(samples):>8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
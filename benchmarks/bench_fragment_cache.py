@@ -0,0 +1,51 @@
+"""Record-card rendering with a cold and a warm fragment cache.
+
+    python benchmarks/bench_fragment_cache.py --per-page 50 --pages 20
+
+Walks the report pages forward and back in both languages, which is what the
+cache is for, and prints the render time per pass plus hit ratio and memory.
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from synthetic_data import populate_database, survey_app
+
+
+def render_pages(pages: list[list[dict]], lang: str) -> float:
+    admin_ui = survey_app.build_admin_ui_texts(lang)
+    started = time.perf_counter()
+    for records in pages:
+        for record in records:
+            survey_app.render_cached_record(record, admin_ui, lang, "admin")
+    return time.perf_counter() - started
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--per-page", type=int, default=50)
+    parser.add_argument("--pages", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        populate_database(Path(tmp_dir) / "bench.db", args.per_page * args.pages)
+        with survey_app.app.test_request_context("/admin/report"):
+            print(f"{'pass':<14} {'lang':<6} {'ms/page':>8} {'hit ratio':>10} {'cache KB':>9}")
+            for label in ("cold", "warm", "warm reverse"):
+                for lang in sorted(survey_app.SUPPORTED_LANGS):
+                    records = survey_app.get_report_records(lang)
+                    pages = [records[start : start + args.per_page] for start in range(0, len(records), args.per_page)]
+                    if label == "warm reverse":
+                        pages.reverse()
+                    elapsed = render_pages(pages, lang)
+                    stats = survey_app.RECORD_FRAGMENT_CACHE.stats()
+                    print(
+                        f"{label:<14} {lang:<6} {elapsed / len(pages) * 1000:>8.1f} "
+                        f"{stats['hit_ratio']:>10.2f} {stats['bytes'] / 1024:>9.0f}"
+                    )
+
+
+if __name__ == "__main__":
+    main()
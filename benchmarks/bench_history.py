@@ -0,0 +1,68 @@
+"""Cost of the append-only response history and of compacting it.
+
+    python benchmarks/bench_history.py --rows 20000 --updates 5000 --keep 1
+
+Replays ``--updates`` submissions with fresh notes (synthetic respondents, so
+some update an existing row and some create one) with and without the
+version append, then reports history lookups and one
+compaction pass down to ``--keep`` versions per respondent.
+"""
+
+import argparse
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from synthetic_data import build_answers, populate_database, survey_app
+
+
+def replay_updates(rows: int, updates: int) -> list[float]:
+    rng = random.Random(9)
+    latencies = []
+    for index in range(updates):
+        answers = {**build_answers(random.Random(rng.randrange(rows)), rng.randrange(rows)), "notes": f"第 {index} 次修改"}
+        started = time.perf_counter()
+        survey_app.save_response_record(answers)
+        latencies.append((time.perf_counter() - started) * 1000)
+    return latencies
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--updates", type=int, default=5_000)
+    parser.add_argument("--keep", type=int, default=1)
+    args = parser.parse_args()
+
+    append_version = survey_app.append_response_version
+    print(f"rows={args.rows} updates={args.updates}")
+    print(f"{'mode':<16} {'p50 ms':>7} {'p99 ms':>7}")
+    for name, appender in [("no history", lambda *values: None), ("append version", append_version)]:
+        survey_app.append_response_version = appender
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            populate_database(Path(tmp_dir) / "bench.db", args.rows)
+            survey_app.init_db()
+            latencies = replay_updates(args.rows, args.updates)
+            print(f"{name:<16} {statistics.median(latencies):>7.2f} {statistics.quantiles(latencies, n=100)[98]:>7.2f}")
+            if appender is not append_version:
+                continue
+
+            with survey_app.connect_db() as conn:
+                versions = conn.execute("SELECT COUNT(*) FROM response_versions").fetchone()[0]
+                record_ids = [row[0] for row in conn.execute("SELECT id FROM responses ORDER BY random() LIMIT 200")]
+            started = time.perf_counter()
+            for record_id in record_ids:
+                survey_app.get_response_versions(record_id)
+            history_ms = (time.perf_counter() - started) / len(record_ids) * 1000
+            result = survey_app.compact_response_versions(args.keep)
+            print(
+                f"versions={versions} history view={history_ms:.2f} ms "
+                f"compaction: archived={result['archived']} in {result['seconds']:.2f} s"
+            )
+    survey_app.append_response_version = append_version
+
+
+if __name__ == "__main__":
+    main()
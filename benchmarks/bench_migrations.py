@@ -0,0 +1,71 @@
+"""How batched backfills affect submissions that arrive during a migration.
+
+    python benchmarks/bench_migrations.py --rows 50000 --batch-sizes 0,1000,200
+
+Rewinds a populated database to before the answers_hash and history
+backfills, then runs them with each batch size (0 = one transaction for
+the whole table) while a background thread keeps submitting. Reports the
+migration time and the submission latency seen while it ran.
+"""
+
+import argparse
+import random
+import statistics
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from synthetic_data import build_answers, populate_database, survey_app
+
+
+def rewind_backfills(rows: int) -> None:
+    with survey_app.connect_db() as conn:
+        conn.execute("DELETE FROM schema_version WHERE version >= 7")
+        conn.execute("DELETE FROM response_versions")
+        conn.execute("UPDATE responses SET answers_hash = NULL")
+        conn.commit()
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+
+def submit_until(stop_event: threading.Event, rows: int, latencies: list[float]) -> None:
+    rng = random.Random(3)
+    while not stop_event.is_set():
+        answers = {**build_answers(random.Random(rng.randrange(rows)), rng.randrange(rows)), "notes": f"遷移中 {rng.random()}"}
+        started = time.perf_counter()
+        survey_app.save_response_record(answers)
+        latencies.append((time.perf_counter() - started) * 1000)
+        time.sleep(0.005)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--batch-sizes", default="0,1000,200")
+    args = parser.parse_args()
+
+    print(f"rows={args.rows}")
+    print(f"{'batch':>7} {'migrate s':>10} {'submits':>8} {'p50 ms':>7} {'p99 ms':>8} {'max ms':>8}")
+    for batch_size in [int(value) for value in args.batch_sizes.split(",")]:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            populate_database(Path(tmp_dir) / "bench.db", args.rows)
+            survey_app.init_db()
+            rewind_backfills(args.rows)
+            latencies: list[float] = []
+            stop_event = threading.Event()
+            writer = threading.Thread(target=submit_until, args=(stop_event, args.rows, latencies))
+            writer.start()
+            time.sleep(0.2)
+            started = time.perf_counter()
+            survey_app.migrate_database(batch_size=batch_size or args.rows * 2, pause_seconds=0.005)
+            elapsed = time.perf_counter() - started
+            stop_event.set()
+            writer.join()
+            print(
+                f"{batch_size or 'all':>7} {elapsed:>10.2f} {len(latencies):>8} {statistics.median(latencies):>7.2f} "
+                f"{statistics.quantiles(latencies, n=100, method='inclusive')[98]:>8.2f} {max(latencies):>8.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""PDF export throughput and peak memory as the record count grows.
+
+    python benchmarks/bench_pdf.py --rows 5000 20000 50000 --workers 1 2 4
+
+Each size is rendered twice per worker count: once untraced for pages/sec,
+once under tracemalloc for the peak heap of the writing process, which should
+stay flat across sizes. Worker processes are not traced.
+"""
+
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from synthetic_data import populate_database, survey_app
+
+
+def render(tmp_dir: str, workers: int) -> tuple[int, int]:
+    with tempfile.TemporaryFile(dir=tmp_dir) as output:
+        pages = survey_app.write_report_pdf(output, workers=workers)
+        return pages, output.tell()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="+", default=[5_000, 20_000, 50_000])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1])
+    args = parser.parse_args()
+
+    print(f"cpus={os.cpu_count()}")
+    print(f"{'rows':>7} {'workers':>7} {'pages':>7} {'size MB':>8} {'seconds':>8} {'pages/s':>8} {'peak MB':>8}")
+    for rows in args.rows:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            populate_database(Path(tmp_dir) / "bench.db", rows)
+            for workers in args.workers:
+                started = time.perf_counter()
+                pages, size = render(tmp_dir, workers)
+                elapsed = time.perf_counter() - started
+
+                tracemalloc.start()
+                render(tmp_dir, workers)
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+
+                print(
+                    f"{rows:>7} {workers:>7} {pages:>7} {size / 1_000_000:>8.1f} {elapsed:>8.1f} "
+                    f"{pages / elapsed:>8.0f} {peak / 1_000_000:>8.1f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
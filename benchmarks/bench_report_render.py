@@ -0,0 +1,50 @@
+"""Report record building with and without the write-time render payloads.
+
+    python benchmarks/bench_report_render.py --rows 20000
+
+"precomputed" reads the per-language payloads stored by the write path;
+"recompute" points the lookup at a stale definition hash so every row is
+rendered from its answers, which is what a definition change falls back to.
+"""
+
+import argparse
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from synthetic_data import populate_database, survey_app
+
+
+def time_records(lang: str, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        survey_app.get_report_records(lang)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        populate_database(Path(tmp_dir) / "bench.db", args.rows)
+        survey = survey_app.get_active_survey()
+        print(f"rows={args.rows} report fields={len(survey['report_definition'])}")
+        print(f"{'lang':<6} {'precomputed s':>14} {'recompute s':>12}")
+        current_hash = survey["definition_hash"]
+        for lang in sorted(survey_app.SUPPORTED_LANGS):
+            survey["definition_hash"] = current_hash
+            precomputed = time_records(lang, args.repeat)
+            survey["definition_hash"] = "stale"
+            recompute = time_records(lang, args.repeat)
+            print(f"{lang:<6} {precomputed:>14.2f} {recompute:>12.2f}")
+        survey["definition_hash"] = current_hash
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Trend reads from the rollup tables versus grouping the responses table.
+
+    python benchmarks/bench_rollups.py --rows 100000 --updates 2000
+
+Reads the hourly and daily trend both ways, then replays ``--updates``
+overwrites that move ``submitted_at`` with and without rollup maintenance.
+"""
+
+import argparse
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from synthetic_data import SURVEY_SLUG, build_answers, populate_database, survey_app
+
+
+def time_ms(func, repeat: int = 20) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - started) / repeat * 1000
+
+
+def group_responses(width: int) -> list:
+    with survey_app.connect_db() as conn:
+        return conn.execute(
+            f"""
+            SELECT substr(submitted_at, 1, {width}), department_name, COUNT(*)
+            FROM responses
+            WHERE survey_slug = ?
+            GROUP BY 1, 2
+            """,
+            (SURVEY_SLUG,),
+        ).fetchall()
+
+
+def replay_updates(rows: int, updates: int, label: str) -> list[float]:
+    rng = random.Random(5)
+    start = datetime(2026, 2, 20, 9, 0, 0)
+    latencies = []
+    for index in range(updates):
+        answers = {**build_answers(random.Random(rng.randrange(rows)), rng.randrange(rows)), "notes": f"{label} 第 {index} 次修改"}
+        submitted_at = (start + timedelta(minutes=index)).isoformat(timespec="seconds")
+        started = time.perf_counter()
+        survey_app.save_response_record(answers, submitted_at)
+        latencies.append((time.perf_counter() - started) * 1000)
+    return latencies
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--updates", type=int, default=2_000)
+    args = parser.parse_args()
+
+    move_rollups = survey_app.move_response_rollups
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        populate_database(Path(tmp_dir) / "bench.db", args.rows)
+        survey_app.init_db()
+        with survey_app.connect_db() as conn:
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        with survey_app.app.test_request_context("/admin/report"):
+            print(f"rows={args.rows}")
+            print(f"{'granularity':<12} {'rollup ms':>10} {'group by ms':>12} {'buckets':>8}")
+            for granularity, (_table, width, _step, _format) in survey_app.RESPONSE_ROLLUPS.items():
+                trend = survey_app.get_submission_trend(granularity)
+                print(
+                    f"{granularity:<12} {time_ms(lambda: survey_app.get_submission_trend(granularity)):>10.2f} "
+                    f"{time_ms(lambda: group_responses(width), repeat=5):>12.2f} {len(trend['buckets']):>8}"
+                )
+
+            print(f"{'submit':<16} {'p50 ms':>7} {'p99 ms':>7}")
+            for name, mover in [("no rollups", lambda *values: None), ("with rollups", move_rollups)]:
+                survey_app.move_response_rollups = mover
+                latencies = replay_updates(args.rows, args.updates, name)
+                print(f"{name:<16} {statistics.median(latencies):>7.2f} {statistics.quantiles(latencies, n=100)[98]:>7.2f}")
+    survey_app.move_response_rollups = move_rollups
+
+
+if __name__ == "__main__":
+    main()
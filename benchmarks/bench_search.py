@@ -0,0 +1,42 @@
+"""Latency of the report full-text search at scale.
+
+    python benchmarks/bench_search.py --rows 100000
+"""
+
+import argparse
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from synthetic_data import SURVEY_SLUG, populate_database, survey_app
+
+QUERIES = ["研發", "部", "ERP", "回歸", "CI 流程", "OTP", "受訪者000123", "IE 模式"]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        started = time.perf_counter()
+        populate_database(Path(tmp_dir) / "bench.db", args.rows)
+        print(f"rows={args.rows} fts5={survey_app.FTS5_AVAILABLE} populate+index={time.perf_counter() - started:.1f}s")
+        print(f"{'query':<14} {'matches':>8} {'median ms':>10} {'max ms':>8}")
+
+        with survey_app.connect_db() as conn:
+            for query in QUERIES:
+                clause, params = survey_app.build_search_filter(query)
+                sql = f"SELECT id FROM responses WHERE survey_slug = ?{clause}"
+                timings = []
+                for _ in range(args.repeat):
+                    started = time.perf_counter()
+                    matches = len(conn.execute(sql, (SURVEY_SLUG, *params)).fetchall())
+                    timings.append((time.perf_counter() - started) * 1000)
+                print(f"{query:<14} {matches:>8} {statistics.median(timings):>10.2f} {max(timings):>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Cost of compiling survey definitions and of cached lookups.
+
+    python benchmarks/bench_survey_registry.py --surveys 50
+
+Writes N copies of the built-in definition as surveys/<slug>.json in a temp
+directory, then times first access (load + compile), warm lookups and the
+heap held per compiled survey.
+"""
+
+import argparse
+import json
+import tempfile
+import time
+import tracemalloc
+from collections import OrderedDict
+from pathlib import Path
+
+from synthetic_data import survey_app
+
+import survey_config
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--surveys", type=int, default=50)
+    parser.add_argument("--lookups", type=int, default=100_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        survey_config.SURVEYS_DIR = Path(tmp_dir)
+        payload = {
+            "title": survey_config.SURVEY_TITLE,
+            "open_start_at": "2026-02-16 09:00",
+            "open_end_at": "2026-02-20 18:00",
+            "form_definition": survey_config.FORM_DEFINITION,
+        }
+        slugs = [f"survey-{index:03d}" for index in range(args.surveys)]
+        for slug in slugs:
+            (Path(tmp_dir) / f"{slug}.json").write_text(json.dumps(payload, ensure_ascii=False), encoding="utf-8")
+
+        survey_app.COMPILED_SURVEYS = OrderedDict()
+        survey_app.COMPILED_SURVEY_CACHE_SIZE = args.surveys
+        tracemalloc.start()
+        started = time.perf_counter()
+        for slug in slugs:
+            survey_app.get_survey(slug)
+        compile_seconds = time.perf_counter() - started
+        held, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        started = time.perf_counter()
+        for index in range(args.lookups):
+            survey_app.get_survey(slugs[index % len(slugs)])
+        lookup_seconds = time.perf_counter() - started
+
+        print(f"surveys={args.surveys}")
+        print(f"compile ms/survey  {compile_seconds / args.surveys * 1000:.2f}")
+        print(f"lookup  us         {lookup_seconds / args.lookups * 1_000_000:.2f}")
+        print(f"heap KB/survey     {held / args.surveys / 1024:.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Synthetic survey responses shared by the benchmark scripts."""
+
+import json
+import random
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import app as survey_app  # noqa: E402
+from survey_config import FORM_DEFINITION, SURVEY_SLUG  # noqa: E402
+
+DEPARTMENTS = ["研發部", "品保部", "資訊部", "財務部", "人資部", "業務部", "採購部", "法務部"]
+SYSTEMS = ["ERP", "CRM", "MES", "HRM", "BPM", "WMS"]
+ROLES = ["審核者", "申請人", "管理者", "一般使用者"]
+NOTE_SNIPPETS = [
+    "希望可以整合既有的 CI 流程",
+    "目前手動回歸約需兩天",
+    "登入需要 OTP，請協助評估",
+    "匯出報表格式常變動",
+    "",
+]
+
+
+def build_answers(rng: random.Random, index: int) -> dict:
+    answers = {
+        "department_name": rng.choice(DEPARTMENTS),
+        "person_name": f"受訪者{index:06d}",
+        "main_system": rng.choice(SYSTEMS),
+        "main_role": rng.choice(ROLES),
+    }
+    for field in FORM_DEFINITION:
+        if field["type"] == "multiselect":
+            answers[field["name"]] = rng.sample(field["options"], rng.randint(0, len(field["options"])))
+            if field.get("allow_other"):
+                answers[f"{field['name']}_other"] = rng.choice(["", "", "需要支援舊版 IE 模式的內部系統"])
+        elif field["type"] == "textarea":
+            answers[field["name"]] = rng.choice(NOTE_SNIPPETS)
+    return answers
+
+
+def populate_database(db_path: Path, count: int, seed: int = 7) -> None:
+    survey_app.DB_PATH = db_path
+    survey_app.init_db()
+    rng = random.Random(seed)
+    base_time = datetime(2026, 2, 16, 9, 0, 0)
+    rows = []
+    for index in range(count):
+        answers = build_answers(rng, index)
+        submitted_at = (base_time + timedelta(seconds=index * 7)).isoformat(timespec="seconds")
+        rows.append(
+            (
+                SURVEY_SLUG,
+                answers["department_name"],
+                answers["person_name"],
+                json.dumps(answers, ensure_ascii=False),
+                submitted_at,
+            )
+        )
+
+    with survey_app.connect_db() as conn:
+        conn.executemany(
+            """
+            INSERT INTO responses (survey_slug, department_name, person_name, answers_json, submitted_at)
+            VALUES (?, ?, ?, ?, ?)
+            """,
+            rows,
+        )
+        if survey_app.FTS5_AVAILABLE:
+            survey_app.rebuild_search_index(conn)
+        survey_app.refresh_stale_report_renders(conn)
+        survey_app.rebuild_response_rollups(conn)
+        conn.commit()
@@ -0,0 +1,449 @@
+"""Streaming PDF writer for the admin report.
+
+reportlab's canvas keeps every finished page in memory until ``save()``,
+and it has no way to write a page out and drop it: the whole document is
+serialised in one go, and pages laid out in worker processes cannot be
+added to a canvas. This writer keeps only the page being laid out. Each page is written to
+the output stream as soon as it is full, so memory stays flat however many
+records are exported. reportlab is still used for font registration and
+glyph metrics, so wrapping matches the STSong-Light CID font exactly.
+
+Document order is cover, table of contents, per-question summaries, then
+the records grouped by submission date. The front matter depends on totals
+and page numbers that are only known after the last record. It is
+therefore written at the end and placed first in the page tree.
+Page-number footers are likewise separate content streams written during
+``finish()``. The tests check the output's cross-reference table and, when
+pypdf is installed, open it with pypdf in strict mode.
+"""
+
+import math
+import re
+import zlib
+from array import array
+from datetime import datetime
+
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.cidfonts import UnicodeCIDFont
+
+FONT_NAME = "STSong-Light"
+PAGE_WIDTH, PAGE_HEIGHT = A4
+MARGIN_X = 40
+MARGIN_TOP = 48
+MARGIN_BOTTOM = 50
+CONTENT_WIDTH = PAGE_WIDTH - 2 * MARGIN_X
+BODY_SIZE = 9.5
+HEADER_SIZE = 10.5
+HEADING_SIZE = 13
+TITLE_SIZE = 16
+LINE_SPACING = 1.45
+VALUE_INDENT = 14
+TOC_ENTRY_HEIGHT = BODY_SIZE * 1.9
+COMPRESS_LEVEL = 6
+XREF_CHUNK_ENTRIES = 2000
+
+# Kinsoku rules: punctuation that must not start a line hangs on the previous
+# one, and opening brackets never end a line.
+NO_LINE_START = set("，。、；：！？）」』】〉》〕,.;:!?)]}%…·ー～")
+NO_LINE_END = set("（「『【〈《〔([{")
+TOKEN_PATTERN = re.compile(r"[A-Za-z0-9_\-./@#&+'%]+|\s+|.", re.DOTALL)
+
+FONT_OBJECT = (
+    b"<< /Type /Font /Subtype /Type0 /BaseFont /STSong-Light /Encoding /UniGB-UCS2-H\n"
+    b"/DescendantFonts [<< /Type /Font /Subtype /CIDFontType0 /BaseFont /STSong-Light\n"
+    b"/CIDSystemInfo << /Registry (Adobe) /Ordering (GB1) /Supplement 0 >> /DW 1000\n"
+    b"/FontDescriptor << /Type /FontDescriptor /FontName /STSongStd-Light /Flags 6\n"
+    b"/FontBBox [-25 -254 1000 880] /ItalicAngle 0 /Ascent 752 /Descent -271 /CapHeight 737\n"
+    b"/StemV 58 /StemH 91 /XHeight 553 /Leading 148 /MaxWidth 1000 /MissingWidth 500 >>\n"
+    b"/W [1 [207 270 342 467 462 797 710 239 374] 10 [374 423 605 238 375 238 334 462] 18 26 462\n"
+    b"27 28 238 29 31 605 32 [344 748 684 560 695 739 563 511 729 793 318 312 666 526 896 758 772 544\n"
+    b"772 628 465 607 753 711 972 647 620 607 374 333 374 606 500 239 417 503 427 529 415 264 444\n"
+    b"518 241 230 495 228 793 527 524] 81 [524 504 338 336 277 517 450 652 466 452 407 370 258 370 605]]\n"
+    b">>] >>"
+)
+
+pdfmetrics.registerFont(UnicodeCIDFont(FONT_NAME))
+_glyph_widths: dict[str, float] = {}
+
+
+def glyph_width(char: str) -> float:
+    width = _glyph_widths.get(char)
+    if width is None:
+        width = pdfmetrics.stringWidth(char, FONT_NAME, 1000) / 1000
+        _glyph_widths[char] = width
+    return width
+
+
+def text_width(text: str, font_size: float) -> float:
+    return sum(glyph_width(char) for char in text) * font_size
+
+
+def wrap_text(text: str, max_width: float, font_size: float) -> list[str]:
+    """Greedy line breaking that may break between any two CJK characters,
+    keeps Latin words whole where they fit and applies kinsoku rules."""
+    lines: list[str] = []
+    for paragraph in str(text).splitlines() or [""]:
+        current = ""
+        width = 0.0
+
+        def push(piece: str, piece_width: float) -> None:
+            nonlocal current, width
+            if not current or width + piece_width <= max_width or piece in NO_LINE_START:
+                current += piece
+                width += piece_width
+                return
+            carry = ""
+            if current[-1] in NO_LINE_END:
+                carry = current[-1]
+                current = current[:-1]
+            lines.append(current.rstrip())
+            current = carry + piece
+            width = text_width(current, font_size)
+
+        for token in TOKEN_PATTERN.findall(paragraph):
+            if token.isspace():
+                if current:
+                    push(" ", glyph_width(" ") * font_size)
+                continue
+            token_width = text_width(token, font_size)
+            if token_width <= max_width:
+                push(token, token_width)
+            else:
+                for char in token:
+                    push(char, glyph_width(char) * font_size)
+        lines.append(current.rstrip())
+    return lines
+
+
+def encode_text(text: str) -> str:
+    safe = "".join(char if ord(char) <= 0xFFFF else "?" for char in text)
+    return "<" + safe.encode("utf-16-be").hex() + ">"
+
+
+def encode_info_string(text: str) -> bytes:
+    return b"<feff" + text.encode("utf-16-be").hex().encode("ascii") + b">"
+
+
+class PageCanvas:
+    """Collects content-stream operators for a single page."""
+
+    def __init__(self):
+        self.ops: list[str] = []
+        self.y = PAGE_HEIGHT - MARGIN_TOP
+
+    def text(self, x: float, y: float, value: str, size: float = BODY_SIZE, gray: float = 0) -> None:
+        color = f"{gray:.2f} g " if gray else ""
+        self.ops.append(f"BT {color}/F1 {size:g} Tf {x:.2f} {y:.2f} Td {encode_text(value)} Tj ET")
+        if gray:
+            self.ops.append("0 g")
+
+    def rect(self, x: float, y: float, width: float, height: float, gray: float) -> None:
+        self.ops.append(f"{gray:.2f} g {x:.2f} {y:.2f} {width:.2f} {height:.2f} re f 0 g")
+
+    def line(self, x1: float, y1: float, x2: float, y2: float, gray: float = 0.75) -> None:
+        self.ops.append(f"{gray:.2f} G 0.5 w {x1:.2f} {y1:.2f} m {x2:.2f} {y2:.2f} l S 0 G")
+
+    def remaining(self) -> float:
+        return self.y - MARGIN_BOTTOM
+
+    def is_empty(self) -> bool:
+        return not self.ops
+
+    def to_bytes(self) -> bytes:
+        return "\n".join(self.ops).encode("ascii")
+
+
+def layout_record_block(record: dict, index: int) -> list[tuple[float, str, float]]:
+    header = f"[{index}] {record['submitted_at']}｜{record['department_name']}｜{record['person_name']}"
+    block = [(0, line, HEADER_SIZE) for line in wrap_text(header, CONTENT_WIDTH - 8, HEADER_SIZE)]
+    basic = f"主測系統：{record['main_system']}｜主測角色：{record['main_role']}"
+    block.extend((4, line, BODY_SIZE) for line in wrap_text(basic, CONTENT_WIDTH - 4, BODY_SIZE))
+    for item in record["questionnaire_items"]:
+        lines = wrap_text(f"{item['label']}：{item['value']}", CONTENT_WIDTH - VALUE_INDENT, BODY_SIZE)
+        block.append((4, lines[0], BODY_SIZE))
+        block.extend((VALUE_INDENT, line, BODY_SIZE) for line in lines[1:])
+    return block
+
+
+def iter_record_pages(records, first_index: int = 1, current_section: str | None = None):
+    """Lay out records and yield ``(content_bytes, section_titles)`` per page.
+
+    A new page starts whenever ``submitted_date`` changes; ``section_titles``
+    lists the date sections that begin on that page. ``current_section``
+    lets a caller continue a section that was started elsewhere.
+    """
+    page = PageCanvas()
+    sections: list[str] = []
+
+    def flush():
+        nonlocal page, sections
+        finished = (page.to_bytes(), sections)
+        page = PageCanvas()
+        sections = []
+        return finished
+
+    for index, record in enumerate(records, start=first_index):
+        section = record.get("submitted_date") or "—"
+        if section != current_section:
+            if not page.is_empty():
+                yield flush()
+            current_section = section
+            sections.append(section)
+            page.text(MARGIN_X, page.y - HEADING_SIZE, section, HEADING_SIZE)
+            page.y -= HEADING_SIZE * 2
+
+        block = layout_record_block(record, index)
+        header_lines = sum(1 for _, _, size in block if size == HEADER_SIZE)
+        keep_together = min(len(block), header_lines + 2) * BODY_SIZE * LINE_SPACING
+        if page.remaining() < keep_together and not page.is_empty():
+            yield flush()
+
+        for position, (indent, line, size) in enumerate(block):
+            line_height = size * LINE_SPACING
+            if page.remaining() < line_height:
+                yield flush()
+            if size == HEADER_SIZE:
+                page.rect(MARGIN_X - 4, page.y - line_height + 2, CONTENT_WIDTH + 8, line_height, 0.92)
+            page.y -= line_height
+            page.text(MARGIN_X + indent, page.y + size * 0.35, line, size)
+            if position == len(block) - 1:
+                page.y -= 6
+
+    if not page.is_empty():
+        yield flush()
+
+
+def compress_page(content: bytes) -> bytes:
+    return zlib.compress(content, COMPRESS_LEVEL)
+
+
+class ReportPdfWriter:
+    """Writes PDF objects straight to ``stream``; only byte offsets and page
+    object ids are retained, so memory grows by a few bytes per page."""
+
+    CATALOG_ID = 1
+    PAGES_ID = 2
+    FONT_ID = 3
+
+    def __init__(self, stream, title: str):
+        self.stream = stream
+        self.title = title
+        self.offsets = array("Q", [0, 0, 0, 0])
+        self.position = 0
+        self.record_pages = array("I")
+        self.record_footers = array("I")
+        self.sections: list[tuple[str, int]] = []
+        self._emit(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+
+    def _emit(self, data: bytes) -> None:
+        self.stream.write(data)
+        self.position += len(data)
+
+    def _allocate(self) -> int:
+        self.offsets.append(0)
+        return len(self.offsets) - 1
+
+    def _write_object(self, object_id: int, body: bytes) -> None:
+        self.offsets[object_id] = self.position
+        self._emit(b"%d 0 obj\n" % object_id + body + b"\nendobj\n")
+
+    def _write_stream(self, object_id: int, data: bytes, compressed: bool) -> None:
+        header = b"<< /Length %d%s >>\nstream\n" % (len(data), b" /Filter /FlateDecode" if compressed else b"")
+        self._write_object(object_id, header + data + b"\nendstream")
+
+    def _write_page(self, content_id: int, footer_id: int, page_id: int | None = None, annotations: bytes = b"") -> int:
+        page_id = page_id or self._allocate()
+        annots = b" /Annots [" + annotations + b"]" if annotations else b""
+        self._write_object(
+            page_id,
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 %.4f %.4f] /Resources << /Font << /F1 %d 0 R >> >>"
+            b" /Contents [%d 0 R %d 0 R]%s >>"
+            % (self.PAGES_ID, PAGE_WIDTH, PAGE_HEIGHT, self.FONT_ID, content_id, footer_id, annots),
+        )
+        return page_id
+
+    def add_record_page(self, compressed_content: bytes, sections: list[str]) -> None:
+        content_id = self._allocate()
+        self._write_stream(content_id, compressed_content, compressed=True)
+        footer_id = self._allocate()
+        page_id = self._write_page(content_id, footer_id)
+        self.record_pages.append(page_id)
+        self.record_footers.append(footer_id)
+        for section in sections:
+            if not self.sections or self.sections[-1][0] != section:
+                self.sections.append((section, len(self.record_pages) - 1))
+
+    def add_records(self, records, first_index: int = 1) -> None:
+        for content, sections in iter_record_pages(records, first_index):
+            self.add_record_page(compress_page(content), sections)
+
+    def _footer(self, page_number: int, total_pages: int) -> bytes:
+        page = PageCanvas()
+        page.line(MARGIN_X, MARGIN_BOTTOM - 14, PAGE_WIDTH - MARGIN_X, MARGIN_BOTTOM - 14)
+        page.text(MARGIN_X, MARGIN_BOTTOM - 28, self.title[:60], 8, gray=0.4)
+        label = f"{page_number} / {total_pages}"
+        page.text(PAGE_WIDTH - MARGIN_X - text_width(label, 8), MARGIN_BOTTOM - 28, label, 8, gray=0.4)
+        return page.to_bytes()
+
+    def _write_front_page(self, page: PageCanvas, page_id: int, page_number: int, total_pages: int, annotations: bytes = b"") -> None:
+        content_id = self._allocate()
+        self._write_stream(content_id, compress_page(page.to_bytes()), compressed=True)
+        footer_id = self._allocate()
+        self._write_stream(footer_id, self._footer(page_number, total_pages), compressed=False)
+        self._write_page(content_id, footer_id, page_id, annotations)
+
+    def finish(self, overview_lines: list[str], question_summaries: list[dict]) -> int:
+        """Write the front matter, footers, page tree and trailer; returns the page count."""
+        toc_capacity = int((PAGE_HEIGHT - MARGIN_TOP - MARGIN_BOTTOM - HEADING_SIZE * 3) // TOC_ENTRY_HEIGHT)
+        toc_entry_count = 1 + len(question_summaries) + len(self.sections)
+        toc_page_count = max(1, math.ceil(toc_entry_count / toc_capacity))
+
+        # Front-matter page ids are allocated before anything is written so
+        # TOC links and outline entries can point at pages in any position.
+        cover_id = self._allocate()
+        toc_ids = [self._allocate() for _ in range(toc_page_count)]
+        # Summaries are laid out up front: a long option list spills onto
+        # extra pages, and the page count has to be known before writing.
+        summary_pages = []
+        summary_first_pages = []
+        for summary in question_summaries:
+            summary_first_pages.append(2 + toc_page_count + len(summary_pages))
+            summary_pages.extend(self._summary_pages(summary))
+        summary_ids = [self._allocate() for _ in summary_pages]
+        page_ids = array("I", [cover_id, *toc_ids, *summary_ids])
+        page_ids.extend(self.record_pages)
+        front_count = 1 + toc_page_count + len(summary_ids)
+        total_pages = len(page_ids)
+
+        toc_entries = [("概要", 1)]
+        toc_entries += [(summary["label"], page_number) for summary, page_number in zip(question_summaries, summary_first_pages)]
+        toc_entries += [(f"填答紀錄：{section}", front_count + record_offset + 1) for section, record_offset in self.sections]
+
+        cover = PageCanvas()
+        cover.text(MARGIN_X, cover.y - TITLE_SIZE, "管理者報表", TITLE_SIZE)
+        cover.y -= TITLE_SIZE * 2
+        for line in wrap_text(self.title, CONTENT_WIDTH, HEADING_SIZE):
+            cover.y -= HEADING_SIZE * LINE_SPACING
+            cover.text(MARGIN_X, cover.y, line, HEADING_SIZE)
+        cover.y -= HEADING_SIZE
+        for overview_line in overview_lines:
+            for line in wrap_text(overview_line, CONTENT_WIDTH, BODY_SIZE + 1):
+                cover.y -= (BODY_SIZE + 1) * LINE_SPACING
+                cover.text(MARGIN_X, cover.y, line, BODY_SIZE + 1)
+        self._write_front_page(cover, cover_id, 1, total_pages)
+
+        for toc_index, toc_id in enumerate(toc_ids):
+            toc_page = PageCanvas()
+            toc_page.text(MARGIN_X, toc_page.y - HEADING_SIZE, "目錄", HEADING_SIZE)
+            toc_page.y -= HEADING_SIZE * 2.5
+            links = []
+            for label, page_number in toc_entries[toc_index * toc_capacity:(toc_index + 1) * toc_capacity]:
+                toc_page.y -= TOC_ENTRY_HEIGHT
+                number_text = str(page_number)
+                number_width = text_width(number_text, BODY_SIZE)
+                label_text = wrap_text(label, CONTENT_WIDTH - number_width - 40, BODY_SIZE)[0]
+                toc_page.text(MARGIN_X, toc_page.y, label_text, BODY_SIZE)
+                toc_page.line(
+                    MARGIN_X + text_width(label_text, BODY_SIZE) + 6,
+                    toc_page.y + 2,
+                    PAGE_WIDTH - MARGIN_X - number_width - 6,
+                    toc_page.y + 2,
+                    gray=0.8,
+                )
+                toc_page.text(PAGE_WIDTH - MARGIN_X - number_width, toc_page.y, number_text, BODY_SIZE)
+                links.append(
+                    b"<< /Type /Annot /Subtype /Link /Border [0 0 0] /Rect [%.2f %.2f %.2f %.2f] /Dest [%d 0 R /Fit] >>"
+                    % (MARGIN_X, toc_page.y - 3, PAGE_WIDTH - MARGIN_X, toc_page.y + BODY_SIZE + 2, page_ids[page_number - 1])
+                )
+            self._write_front_page(toc_page, toc_id, 2 + toc_index, total_pages, b" ".join(links))
+
+        for offset, (summary_page, summary_id) in enumerate(zip(summary_pages, summary_ids)):
+            self._write_front_page(summary_page, summary_id, 2 + toc_page_count + offset, total_pages)
+
+        for offset, footer_id in enumerate(self.record_footers):
+            self._write_stream(footer_id, self._footer(front_count + offset + 1, total_pages), compressed=False)
+
+        self._write_object(self.FONT_ID, FONT_OBJECT)
+        self.offsets[self.PAGES_ID] = self.position
+        self._emit(b"%d 0 obj\n<< /Type /Pages /Count %d /Kids [" % (self.PAGES_ID, total_pages))
+        for start in range(0, total_pages, XREF_CHUNK_ENTRIES):
+            self._emit(b" ".join(b"%d 0 R" % page_id for page_id in page_ids[start:start + XREF_CHUNK_ENTRIES]) + b" ")
+        self._emit(b"] >>\nendobj\n")
+
+        outlines_id = self._write_outlines([(label, page_ids[page_number - 1]) for label, page_number in toc_entries])
+        self._write_object(
+            self.CATALOG_ID,
+            b"<< /Type /Catalog /Pages %d 0 R /Outlines %d 0 R /PageMode /UseOutlines >>" % (self.PAGES_ID, outlines_id),
+        )
+        info_id = self._allocate()
+        self._write_object(
+            info_id,
+            b"<< /Title %s /Producer (survey report) /CreationDate (D:%s) >>"
+            % (encode_info_string(self.title), datetime.now().strftime("%Y%m%d%H%M%S").encode("ascii")),
+        )
+
+        xref_position = self.position
+        self._emit(b"xref\n0 %d\n0000000000 65535 f \n" % len(self.offsets))
+        for start in range(1, len(self.offsets), XREF_CHUNK_ENTRIES):
+            chunk = self.offsets[start:start + XREF_CHUNK_ENTRIES]
+            self._emit(b"".join(b"%010d 00000 n \n" % offset for offset in chunk))
+        self._emit(
+            b"trailer\n<< /Size %d /Root %d 0 R /Info %d 0 R >>\nstartxref\n%d\n%%%%EOF\n"
+            % (len(self.offsets), self.CATALOG_ID, info_id, xref_position)
+        )
+        return total_pages
+
+    def _summary_pages(self, summary: dict) -> list[PageCanvas]:
+        """Lay out one question summary; option rows that do not fit continue
+        on further pages under the question label marked "（續）"."""
+        page = PageCanvas()
+        pages = [page]
+        for line in wrap_text(summary["label"], CONTENT_WIDTH, HEADING_SIZE):
+            page.y -= HEADING_SIZE * LINE_SPACING
+            page.text(MARGIN_X, page.y, line, HEADING_SIZE)
+        page.y -= BODY_SIZE * 2
+        page.text(MARGIN_X, page.y, f"作答人數：{summary['answered']} / {summary['total']}", BODY_SIZE, gray=0.3)
+        page.y -= BODY_SIZE * 2.5
+
+        label_width = CONTENT_WIDTH * 0.45
+        bar_left = MARGIN_X + label_width + 10
+        bar_width = CONTENT_WIDTH - label_width - 90
+        denominator = max(summary["total"], 1)
+        for option, count in summary["rows"]:
+            lines = wrap_text(option, label_width, BODY_SIZE)
+            row_height = max(len(lines), 1) * BODY_SIZE * LINE_SPACING + 6
+            if page.remaining() < row_height:
+                page = PageCanvas()
+                pages.append(page)
+                continued = wrap_text(f"{summary['label']}（續）", CONTENT_WIDTH, HEADING_SIZE)[0]
+                page.y -= HEADING_SIZE * LINE_SPACING
+                page.text(MARGIN_X, page.y, continued, HEADING_SIZE)
+                page.y -= BODY_SIZE * 2.5
+            for offset, line in enumerate(lines):
+                page.text(MARGIN_X, page.y - (offset + 1) * BODY_SIZE * LINE_SPACING + 3, line, BODY_SIZE)
+            bar_y = page.y - BODY_SIZE * LINE_SPACING
+            page.rect(bar_left, bar_y, bar_width, BODY_SIZE, 0.92)
+            if count:
+                page.rect(bar_left, bar_y, max(bar_width * count / denominator, 1), BODY_SIZE, 0.45)
+            page.text(bar_left + bar_width + 8, bar_y + 1, f"{count}（{count * 100 / denominator:.1f}%）", BODY_SIZE)
+            page.y -= row_height
+        return pages
+
+    def _write_outlines(self, entries: list[tuple[str, int]]) -> int:
+        outlines_id = self._allocate()
+        item_ids = [self._allocate() for _ in entries]
+        for position, ((label, page_id), item_id) in enumerate(zip(entries, item_ids)):
+            links = b""
+            if position > 0:
+                links += b" /Prev %d 0 R" % item_ids[position - 1]
+            if position < len(item_ids) - 1:
+                links += b" /Next %d 0 R" % item_ids[position + 1]
+            self._write_object(
+                item_id,
+                b"<< /Title %s /Parent %d 0 R%s /Dest [%d 0 R /Fit] >>"
+                % (encode_info_string(label), outlines_id, links, page_id),
+            )
+        first_last = b" /First %d 0 R /Last %d 0 R" % (item_ids[0], item_ids[-1]) if item_ids else b""
+        self._write_object(outlines_id, b"<< /Type /Outlines /Count %d%s >>" % (len(item_ids), first_last))
+        return outlines_id
@@ -0,0 +1,190 @@
+const reportConfig = document.body.dataset;
+const deleteConfirmTemplate = reportConfig.deleteConfirmTemplate || '';
+const unknownText = reportConfig.unknownText || '';
+
+function confirmDeleteRecord(formElement) {
+  const department = formElement.dataset.department || unknownText;
+  const person = formElement.dataset.person || unknownText;
+  const message = deleteConfirmTemplate
+    .replace('{department}', department)
+    .replace('{person}', person);
+  return window.confirm(message);
+}
+
+function renderRecordDetail(recordId) {
+  const panelBody = document.getElementById('detail-panel-content');
+  const panelHint = document.getElementById('detail-panel-hint');
+  if (!panelBody || !panelHint) {
+    return;
+  }
+
+  const template = document.getElementById(`record-detail-template-${recordId}`);
+  if (!template) {
+    return;
+  }
+
+  panelBody.innerHTML = '';
+  panelBody.appendChild(template.content.cloneNode(true));
+  panelHint.hidden = true;
+
+  document.querySelectorAll('.record-card').forEach((card) => {
+    card.classList.toggle('active', card.dataset.recordId === String(recordId));
+  });
+}
+
+document.addEventListener('click', (event) => {
+  const button = event.target.closest('[data-record-select]');
+  if (button) {
+    renderRecordDetail(button.dataset.recordSelect);
+  }
+});
+
+function removeRecordCard(recordId) {
+  document.querySelectorAll(`.record-card[data-record-id="${recordId}"]`).forEach((card) => card.remove());
+  const template = document.getElementById(`record-detail-template-${recordId}`);
+  if (template) {
+    template.remove();
+  }
+}
+
+async function upsertRecordCard(recordId) {
+  const recordGrid = document.querySelector('.record-grid');
+  const exists = Boolean(document.getElementById(`record-detail-template-${recordId}`));
+  if (!exists && reportConfig.currentPage !== '1') {
+    return;
+  }
+
+  const url = reportConfig.recordFragmentUrl.replace('__id__', encodeURIComponent(recordId));
+  const response = await window.fetch(url, { headers: { Accept: 'text/html' } });
+  if (response.status === 204) {
+    removeRecordCard(recordId);
+    return;
+  }
+  if (!response.ok) {
+    return;
+  }
+  if (!recordGrid) {
+    // The page rendered the empty state; the list markup only exists after a reload.
+    window.location.reload();
+    return;
+  }
+
+  const holder = document.createElement('template');
+  holder.innerHTML = (await response.text()).trim();
+  removeRecordCard(recordId);
+  recordGrid.prepend(holder.content);
+}
+
+function applySummary(summary) {
+  document.querySelectorAll('[data-summary-field]').forEach((element) => {
+    const value = summary[element.dataset.summaryField];
+    if (value !== undefined) {
+      element.textContent = value;
+    }
+  });
+}
+
+if (reportConfig.eventsUrl && 'EventSource' in window) {
+  const eventSource = new window.EventSource(reportConfig.eventsUrl);
+  const handleUpsert = (event) => {
+    const payload = JSON.parse(event.data);
+    upsertRecordCard(payload.record_id).catch((error) => console.error(error));
+  };
+  eventSource.addEventListener('created', handleUpsert);
+  eventSource.addEventListener('updated', handleUpsert);
+  eventSource.addEventListener('deleted', (event) => removeRecordCard(JSON.parse(event.data).record_id));
+  eventSource.addEventListener('summary', (event) => applySummary(JSON.parse(event.data)));
+  eventSource.addEventListener('reset', () => {
+    eventSource.close();
+    window.location.reload();
+  });
+}
+
+const isAuthenticated = reportConfig.authenticated === 'true';
+const timeoutSeconds = Number(reportConfig.sessionTimeout);
+const resetTimerUrl = reportConfig.sessionResetUrl;
+const countdownChip = document.getElementById('logout-countdown');
+const resetTimerButton = document.getElementById('reset-logout-timer');
+const logoutForm = document.getElementById('logout-form');
+const selectedImportInput = document.getElementById('selected-import-file-input');
+const selectedImportTrigger = document.getElementById('selected-import-trigger');
+
+function formatCountdown(totalSeconds) {
+  const minutes = Math.floor(totalSeconds / 60);
+  const seconds = totalSeconds % 60;
+  return `${String(minutes).padStart(2, '0')}:${String(seconds).padStart(2, '0')}`;
+}
+
+if (isAuthenticated && countdownChip && logoutForm) {
+  let remainingSeconds = Number.isFinite(timeoutSeconds) && timeoutSeconds > 0 ? timeoutSeconds : 0;
+  countdownChip.textContent = formatCountdown(remainingSeconds);
+
+  if (remainingSeconds <= 0) {
+    logoutForm.submit();
+  } else {
+    const timerId = window.setInterval(() => {
+      remainingSeconds -= 1;
+      if (remainingSeconds <= 0) {
+        window.clearInterval(timerId);
+        logoutForm.submit();
+        return;
+      }
+      countdownChip.textContent = formatCountdown(remainingSeconds);
+    }, 1000);
+
+    if (resetTimerButton) {
+      resetTimerButton.addEventListener('click', async () => {
+        try {
+          const response = await window.fetch(resetTimerUrl, { method: 'POST' });
+          if (!response.ok) {
+            return;
+          }
+          const payload = await response.json();
+          const serverRemaining = Number(payload.remaining_seconds);
+          if (Number.isFinite(serverRemaining) && serverRemaining > 0) {
+            remainingSeconds = serverRemaining;
+            countdownChip.textContent = formatCountdown(remainingSeconds);
+          }
+        } catch (error) {
+          console.error(error);
+        }
+      });
+    }
+  }
+}
+
+if (selectedImportInput && selectedImportTrigger) {
+  selectedImportTrigger.addEventListener('click', () => selectedImportInput.click());
+  selectedImportInput.addEventListener('change', () => {
+    if (selectedImportInput.files && selectedImportInput.files.length > 0) {
+      selectedImportInput.form.submit();
+    }
+  });
+}
+
+document.querySelectorAll('[data-collapse-target]').forEach((button) => {
+  button.addEventListener('click', () => {
+    const targetId = button.dataset.collapseTarget;
+    const target = document.getElementById(targetId);
+    if (!target) {
+      return;
+    }
+    const expanded = button.getAttribute('aria-expanded') === 'true';
+    const next = !expanded;
+    button.setAttribute('aria-expanded', String(next));
+    target.hidden = !next;
+    button.textContent = next ? '▾' : '▸';
+  });
+});
+
+document.querySelectorAll('[data-trend-option]').forEach((button) => {
+  button.addEventListener('click', () => {
+    const option = button.dataset.trendOption;
+    document.querySelectorAll('[data-trend-option]').forEach((item) => {
+      item.classList.toggle('active', item === button);
+    });
+    document.querySelectorAll('.trend-chart').forEach((chart) => {
+      chart.hidden = chart.dataset.trend !== option;
+    });
+  });
+});
@@ -0,0 +1,63 @@
+function toggleCard(button) {
+  const contentId = button.getAttribute('aria-controls');
+  const content = document.getElementById(contentId);
+  if (!content) {
+    return;
+  }
+
+  const isExpanded = button.getAttribute('aria-expanded') === 'true';
+  const nextExpanded = !isExpanded;
+  button.setAttribute('aria-expanded', String(nextExpanded));
+  content.hidden = !nextExpanded;
+
+  const icon = button.querySelector('[data-toggle-icon]');
+  if (icon) {
+    icon.textContent = nextExpanded ? '▾' : '▸';
+  }
+}
+
+document.querySelectorAll('[data-collapse-toggle]').forEach((button) => {
+  button.addEventListener('click', () => toggleCard(button));
+});
+
+const DRAFT_SAVE_DELAY_MS = 2000;
+const draftForm = document.querySelector('form[data-draft-url]');
+
+if (draftForm) {
+  // One autosave per pause in typing; the server skips drafts that did not change.
+  let draftTimerId = null;
+  let draftSubmitted = false;
+
+  const saveDraft = () => {
+    draftTimerId = null;
+    window.fetch(draftForm.dataset.draftUrl, {
+      method: 'POST',
+      body: new URLSearchParams(new FormData(draftForm)),
+      keepalive: true,
+    }).catch((error) => console.error(error));
+  };
+
+  const scheduleDraftSave = () => {
+    if (draftSubmitted) {
+      return;
+    }
+    window.clearTimeout(draftTimerId);
+    draftTimerId = window.setTimeout(saveDraft, DRAFT_SAVE_DELAY_MS);
+  };
+
+  draftForm.addEventListener('input', scheduleDraftSave);
+  draftForm.addEventListener('change', scheduleDraftSave);
+  draftForm.addEventListener('submit', () => {
+    // The submit deletes the draft server-side; a pending or pagehide save
+    // must not write it back.
+    draftSubmitted = true;
+    window.clearTimeout(draftTimerId);
+    draftTimerId = null;
+  });
+  window.addEventListener('pagehide', () => {
+    if (draftTimerId !== null) {
+      window.clearTimeout(draftTimerId);
+      saveDraft();
+    }
+  });
+}
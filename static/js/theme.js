@@ -0,0 +1,17 @@
+function applyTheme(themeName) {
+  const validThemes = ['light', 'forest', 'dark'];
+  const resolvedTheme = validThemes.includes(themeName) ? themeName : 'light';
+  document.documentElement.setAttribute('data-theme', resolvedTheme);
+  localStorage.setItem('survey-theme', resolvedTheme);
+
+  document.querySelectorAll('[data-theme-option]').forEach((button) => {
+    button.classList.toggle('active', button.dataset.themeOption === resolvedTheme);
+  });
+}
+
+const savedTheme = localStorage.getItem('survey-theme') || 'light';
+applyTheme(savedTheme);
+
+document.querySelectorAll('[data-theme-option]').forEach((button) => {
+  button.addEventListener('click', () => applyTheme(button.dataset.themeOption));
+});
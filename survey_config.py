@@ -1,7 +1,12 @@
 import json
+import re
 from datetime import date, datetime, time, timedelta
 from pathlib import Path
 
+SURVEYS_DIR = Path(__file__).parent / "surveys"
+WINDOW_CONFIG_PATH = Path(__file__).parent / "survey_window.json"
+SURVEY_SLUG_PATTERN = re.compile(r"^[a-z0-9][a-z0-9-]{0,63}$")
+
 
 def add_workdays_including_start(start_date: date, workdays: int) -> date:
     current = start_date
@@ -23,21 +28,28 @@ def default_window() -> tuple[datetime, datetime]:
     return start, end
 
 
+def parse_window(payload: dict) -> tuple[datetime, datetime]:
+    try:
+        start = datetime.strptime(payload["open_start_at"], "%Y-%m-%d %H:%M")
+        end = datetime.strptime(payload["open_end_at"], "%Y-%m-%d %H:%M")
+        if end < start:
+            return default_window()
+        return start, end
+    except (KeyError, TypeError, ValueError):
+        return default_window()
+
+
 def load_window_from_param_file() -> tuple[datetime, datetime]:
-    config_path = Path(__file__).parent / "survey_window.json"
+    config_path = WINDOW_CONFIG_PATH
     if not config_path.exists():
         return default_window()
 
     try:
         with config_path.open("r", encoding="utf-8") as file:
             payload = json.load(file)
-        start = datetime.strptime(payload["open_start_at"], "%Y-%m-%d %H:%M")
-        end = datetime.strptime(payload["open_end_at"], "%Y-%m-%d %H:%M")
-        if end < start:
-            return default_window()
-        return start, end
-    except (json.JSONDecodeError, KeyError, ValueError):
+    except json.JSONDecodeError:
         return default_window()
+    return parse_window(payload)
 
 
 SURVEY_SLUG = "at"
@@ -222,3 +234,102 @@ FORM_DEFINITION = [
         "placeholder": "可填寫其他需求、限制或補充背景",
     },
 ]
+
+
+def default_survey_source() -> dict:
+    # The window is re-read so a reload picks up edits to survey_window.json.
+    open_start_at, open_end_at = load_window_from_param_file()
+    return {
+        "slug": SURVEY_SLUG,
+        "title": SURVEY_TITLE,
+        "open_start_at": open_start_at,
+        "open_end_at": open_end_at,
+        "closed_message_title": CLOSED_MESSAGE_TITLE,
+        "closed_message_body": CLOSED_MESSAGE_BODY,
+        "success_message": SUCCESS_MESSAGE,
+        "form_definition": FORM_DEFINITION,
+    }
+
+
+FIELD_TYPES = {"text", "text_pair", "textarea", "multiselect"}
+
+
+def validate_form_definition(form_definition: object) -> None:
+    """Raise ValueError naming the first field the app could not render."""
+    if not isinstance(form_definition, list):
+        raise ValueError("form_definition must be a list")
+    for index, field in enumerate(form_definition):
+        if not isinstance(field, dict):
+            raise ValueError(f"field {index} must be an object")
+        if field.get("type") not in FIELD_TYPES:
+            raise ValueError(f"field {index} has unknown type {field.get('type')!r}")
+        if not isinstance(field.get("name"), str):
+            raise ValueError(f"field {index} has no name")
+        if field["type"] == "text_pair":
+            for side in ("left", "right"):
+                part = field.get(side)
+                if not isinstance(part, dict) or not all(isinstance(part.get(key), str) for key in ("name", "label", "placeholder")):
+                    raise ValueError(f"field {index} needs {side}.name, {side}.label and {side}.placeholder")
+            continue
+        if not isinstance(field.get("label"), str):
+            raise ValueError(f"field {index} has no label")
+        if field["type"] == "multiselect" and not (
+            isinstance(field.get("options"), list) and all(isinstance(option, str) for option in field["options"])
+        ):
+            raise ValueError(f"field {index} needs a list of option strings")
+
+
+def load_survey_source(slug: str) -> dict | None:
+    """Return the raw definition of survey ``slug``, or None if there is none.
+
+    The built-in survey comes from this module; others are read from
+    ``surveys/<slug>.json`` with the same keys as ``default_survey_source``
+    (the window as ``"YYYY-MM-DD HH:MM"`` strings, messages optional). A file
+    that exists but cannot be parsed or rendered raises ValueError.
+    """
+    if slug == SURVEY_SLUG:
+        return default_survey_source()
+    if not SURVEY_SLUG_PATTERN.match(slug):
+        return None
+
+    config_path = SURVEYS_DIR / f"{slug}.json"
+    try:
+        with config_path.open("r", encoding="utf-8") as file:
+            payload = json.load(file)
+    except FileNotFoundError:
+        return None
+    if not isinstance(payload, dict):
+        raise ValueError("survey file must hold a JSON object")
+    validate_form_definition(payload.get("form_definition"))
+
+    open_start_at, open_end_at = parse_window(payload)
+    return {
+        "slug": slug,
+        "title": str(payload.get("title") or slug),
+        "open_start_at": open_start_at,
+        "open_end_at": open_end_at,
+        "closed_message_title": str(payload.get("closed_message_title") or CLOSED_MESSAGE_TITLE),
+        "closed_message_body": str(payload.get("closed_message_body") or CLOSED_MESSAGE_BODY),
+        "success_message": str(payload.get("success_message") or SUCCESS_MESSAGE),
+        "form_definition": payload["form_definition"],
+    }
+
+
+def survey_source_path(slug: str) -> Path:
+    if slug == SURVEY_SLUG:
+        return WINDOW_CONFIG_PATH
+    return SURVEYS_DIR / f"{slug}.json"
+
+
+def get_survey_source_mtime(slug: str) -> int | None:
+    try:
+        return survey_source_path(slug).stat().st_mtime_ns
+    except OSError:
+        return None
+
+
+def list_survey_slugs() -> list[str]:
+    extra_slugs = sorted(
+        path.stem for path in SURVEYS_DIR.glob("*.json") if SURVEY_SLUG_PATTERN.match(path.stem) and path.stem != SURVEY_SLUG
+    )
+    return [SURVEY_SLUG, *extra_slugs]
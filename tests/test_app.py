@@ -1,7 +1,19 @@
+import base64
+import gzip
 import io
-from datetime import datetime
+import json
+import re
+import sys
+import threading
+import zlib
+from datetime import datetime, timedelta
+from time import sleep
+
+import pytest
 
 import app as survey_app
+import survey_config
+import ui_catalog
 
 
 def _sample_answers(core_flow_value: str) -> dict:
@@ -17,10 +29,11 @@ def _sample_answers(core_flow_value: str) -> dict:
 def _build_client_with_temp_db(tmp_path, monkeypatch):
     db_path = tmp_path / "test_survey.db"
     monkeypatch.setattr(survey_app, "DB_PATH", db_path)
-    monkeypatch.setenv("SURVEY_GUEST_USERNAME", "guest")
-    monkeypatch.setenv("SURVEY_GUEST_PASSWORD", "guest")
-    monkeypatch.setenv("SURVEY_ADMIN_USERNAME", "manager")
-    monkeypatch.setenv("SURVEY_ADMIN_PASSWORD", "manager-pass")
+    monkeypatch.setattr(survey_app, "GUEST_CREDENTIALS", ("guest", "guest"))
+    monkeypatch.setattr(survey_app, "ADMIN_CREDENTIALS", ("manager", "manager-pass"))
+    monkeypatch.setattr(survey_app, "SUBMISSION_ADMISSION", survey_app.SubmissionAdmission(60, 20, 4, 1.0))
+    monkeypatch.setattr(survey_app, "DRAFT_ADMISSION", survey_app.SubmissionAdmission(30, 10, 1, 0))
+    monkeypatch.setattr(survey_app, "REPORT_EVENT_HUB", survey_app.ReportEventHub(survey_app.REPORT_EVENT_RETENTION))
     survey_app.init_db()
     survey_app.app.config["TESTING"] = True
     return survey_app.app.test_client()
@@ -34,6 +47,50 @@ def _login_report_user(client, username: str, password: str, lang: str = "en"):
     )
 
 
+def _pdf_text(payload: bytes) -> str:
+    texts = []
+    for matched in re.finditer(rb"<< /Length (\d+)( /Filter /FlateDecode)? >>\nstream\n", payload):
+        start = matched.end()
+        data = payload[start:start + int(matched.group(1))]
+        content = zlib.decompress(data) if matched.group(2) else data
+        texts.extend(bytes.fromhex(hex_text.decode()).decode("utf-16-be") for hex_text in re.findall(rb"<([0-9a-f]*)> Tj", content))
+    return "\n".join(texts)
+
+
+def _assert_pdf_structure(payload: bytes) -> int:
+    # What a reader relies on: the xref points at every object, every
+    # reference outside stream data resolves, and the page tree counts every
+    # page object. Returns the page count.
+    skeleton, cursor = [], 0
+    for matched in re.finditer(rb"<< /Length (\d+)( /Filter /FlateDecode)? >>\nstream\n", payload):
+        if matched.start() < cursor:
+            continue
+        skeleton.append(payload[cursor:matched.end()])
+        cursor = matched.end() + int(matched.group(1))
+        assert payload.startswith(b"\nendstream", cursor)
+    skeleton = b"".join(skeleton) + payload[cursor:]
+
+    xref_position = int(re.search(rb"startxref\n(\d+)\n%%EOF\n$", payload).group(1))
+    assert payload.startswith(b"xref\n0 ", xref_position)
+    size = int(re.match(rb"xref\n0 (\d+)\n", payload[xref_position:]).group(1))
+    entries = re.findall(rb"(\d{10}) (\d{5}) ([nf]) \n", payload[xref_position:])
+    assert len(entries) == size and b"/Size %d " % size in payload[xref_position:]
+    for object_id, (offset, _generation, kind) in enumerate(entries[1:], start=1):
+        assert kind == b"n" and payload.startswith(b"%d 0 obj\n" % object_id, int(offset))
+    assert {int(ref) for ref in re.findall(rb"(\d+) 0 R", skeleton)} <= set(range(1, size))
+    page_count = int(re.search(rb"/Type /Pages /Count (\d+)", skeleton).group(1))
+    assert page_count == len(re.findall(rb"/Type /Page ", skeleton))
+    return page_count
+
+
+def _fetch_asset_text(client, html: str, filename: str) -> str:
+    matched = re.search(r'(/assets/[0-9a-f]+/' + re.escape(filename) + ')"', html)
+    assert matched, f"{filename} is not referenced"
+    response = client.get(matched.group(1))
+    assert response.status_code == 200
+    return response.get_data(as_text=True)
+
+
 def test_canonicalize_selected_option_accepts_legacy_value():
     entry = {
         "options": [
@@ -115,7 +172,7 @@ def test_admin_report_renders_compact_parallel_cards(tmp_path, monkeypatch):
     assert '<th class="table-label" scope="col">' in html
     assert '<tbody>' in html
     assert 'record-detail-template-' in html
-    assert 'renderRecordDetail(' in html
+    assert 'renderRecordDetail(' in _fetch_asset_text(client, html, "js/admin_report.js")
     assert 'const firstSelectable' not in html
     assert "Questionnaire Details" in html
     assert "background: #cf222e;" not in html
@@ -138,13 +195,14 @@ def test_admin_report_shows_csv_pdf_for_special_admin(tmp_path, monkeypatch):
     assert 'class="selected-date-actions"' in html
     assert '>Export<' in html
     assert '>Import<' in html
-    assert '.admin-export-btn {' in html
-    assert '.admin-import-btn {' in html
-    assert '.inline-file-input {' in html
-    assert 'display: none;' in html
-    assert 'width: 56px;' in html
-    assert 'height: 40px;' in html
-    assert 'box-sizing: border-box;' in html
+    stylesheet = _fetch_asset_text(client, html, "css/admin_report.css")
+    assert '.admin-export-btn {' in stylesheet
+    assert '.admin-import-btn {' in stylesheet
+    assert '.inline-file-input {' in stylesheet
+    assert 'display: none;' in stylesheet
+    assert 'width: 56px;' in stylesheet
+    assert 'height: 40px;' in stylesheet
+    assert 'box-sizing: border-box;' in stylesheet
     assert 'class="export-btn admin-export-btn"' in html
     assert '/admin/report/export.csv' in html
     assert 'class="export-btn admin-import-btn" id="selected-import-trigger"' in html
@@ -186,7 +244,7 @@ def test_admin_report_countdown_does_not_reset_after_refresh(tmp_path, monkeypat
 
     assert response.status_code == 200
     html = response.get_data(as_text=True)
-    assert "const timeoutSeconds = Number(420);" in html
+    assert 'data-session-timeout="420"' in html
     assert "if (remainingSeconds <= 0) {\n      logoutForm.submit();\n      return;\n    }" not in html
 
 
@@ -205,7 +263,7 @@ def test_admin_session_reset_endpoint_resets_remaining_seconds(tmp_path, monkeyp
     assert reset_response.status_code == 200
     assert reset_response.get_json()["remaining_seconds"] == 600
     assert report_response.status_code == 200
-    assert "const timeoutSeconds = Number(600);" in report_response.get_data(as_text=True)
+    assert 'data-session-timeout="600"' in report_response.get_data(as_text=True)
 
 
 def test_admin_login_page_hides_heading_and_keeps_lang_spacing(tmp_path, monkeypatch):
@@ -478,3 +536,1449 @@ def test_bilingual_footer_on_survey_and_admin_pages(tmp_path, monkeypatch):
     assert "若有任何需求，請不吝與我聯繫" in admin_zh_html
     assert "Provided by: Charles" in admin_en_html
     assert "If you have any requirements, please feel free to contact me." in admin_en_html
+
+
+def test_admin_profile_hook_stores_stats_for_admin_only(tmp_path, monkeypatch):
+    client = _build_client_with_temp_db(tmp_path, monkeypatch)
+    monkeypatch.setattr(survey_app, "PROFILE_DIR", tmp_path / "profiles")
+    survey_app.upsert_response(_sample_answers("登入主功能操作送出"))
+
+    _login_report_user(client, "guest", "guest", "en")
+    guest_response = client.get("/admin/report?lang=en&_profile=1")
+    assert guest_response.status_code == 200
+    assert "X-Survey-Profile-Id" not in guest_response.headers
+
+    _login_report_user(client, "manager", "manager-pass", "en")
+    response = client.get("/admin/report?lang=en", headers={"X-Survey-Profile": "1"})
+    assert response.status_code == 200
+    profile_id = response.headers["X-Survey-Profile-Id"]
+    assert response.headers["X-Survey-Profile-Url"] == f"/admin/profiles/{profile_id}"
+
+    summary = client.get(f"/admin/profiles/{profile_id}")
+    download = client.get(f"/admin/profiles/{profile_id}.pstats")
+
+    assert summary.status_code == 200
+    assert "get_report_records" in summary.get_data(as_text=True)
+    assert download.status_code == 200
+    assert download.headers["Content-Disposition"].endswith(f"{profile_id}.pstats")
+    assert client.get("/admin/profiles/..%2Fsurvey.pstats").status_code == 404
+
+
+def test_admin_profile_html_mode_returns_summary(tmp_path, monkeypatch):
+    client = _build_client_with_temp_db(tmp_path, monkeypatch)
+    monkeypatch.setattr(survey_app, "PROFILE_DIR", tmp_path / "profiles")
+    _login_report_user(client, "manager", "manager-pass", "en")
+
+    response = client.get("/admin/report?lang=en&_profile=html")
+
+    assert response.status_code == 200
+    html = response.get_data(as_text=True)
+    assert 'class="profile-table"' in html
+    assert "admin_report" in html
+    assert len(list((tmp_path / "profiles").glob("*.pstats"))) == 1
+
+
+def test_request_profiler_is_stopped_when_the_view_raises(tmp_path, monkeypatch):
+    client = _build_client_with_temp_db(tmp_path, monkeypatch)
+    monkeypatch.setattr(survey_app, "PROFILE_DIR", tmp_path / "profiles")
+    monkeypatch.setattr(survey_app, "PROFILE_SAMPLE_RATE", 1.0)
+
+    def failing_view():
+        raise RuntimeError("boom")
+
+    monkeypatch.setitem(survey_app.app.view_functions, "home", failing_view)
+    with pytest.raises(RuntimeError):
+        client.get("/")
+
+    assert sys.getprofile() is None
+    assert len(list((tmp_path / "profiles").glob("*.pstats"))) == 1
+
+
+def test_serve_initializes_db_once_before_starting_workers(tmp_path, monkeypatch):
+    db_path = tmp_path / "serve.db"
+    monkeypatch.setattr(survey_app, "DB_PATH", db_path)
+    monkeypatch.setattr(survey_app, "GunicornBaseApplication", object)
+    captured = {}
+
+    def fake_run_gunicorn_server(options):
+        captured["db_ready"] = db_path.exists()
+        captured["options"] = options
+
+    monkeypatch.setattr(survey_app, "run_gunicorn_server", fake_run_gunicorn_server)
+    monkeypatch.setattr(survey_app.os, "name", "posix")
+
+    survey_app.main(["serve", "--port", "5050", "--workers", "3", "--threads", "6", "--keepalive", "7"])
+
+    options = captured["options"]
+    assert captured["db_ready"] is True
+    assert options["bind"] == "0.0.0.0:5050"
+    assert options["workers"] == 3
+    assert options["threads"] == 6
+    assert options["keepalive"] == 7
+    assert options["worker_class"] == "gthread"
+    assert callable(options["post_fork"])
+
+
+def test_static_assets_are_fingerprinted_immutable_and_gzip_encoded(tmp_path, monkeypatch):
+    client = _build_client_with_temp_db(tmp_path, monkeypatch)
+    monkeypatch.setattr(survey_app, "is_survey_open", lambda: True)
+
+    html = client.get("/q/at?lang=zh-TW").get_data(as_text=True)
+    matched = re.search(r'href="(/assets/([0-9a-f]+)/css/form\.css)"', html)
+    assert matched
+    assert "<style>" not in html
+    asset_path, fingerprint = matched.groups()
+
+    plain = client.get(asset_path)
+    compressed = client.get(asset_path, headers={"Accept-Encoding": "gzip"})
+    revalidated = client.get(asset_path, headers={"If-None-Match": f'"{fingerprint}"'})
+    stale = client.get("/assets/0000000000000000/css/form.css")
+
+    assert plain.status_code == 200
+    assert plain.headers["Cache-Control"] == "public, max-age=31536000, immutable"
+    assert plain.headers["Content-Type"].startswith("text/css")
+    assert "Content-Encoding" not in plain.headers
+    assert compressed.headers["Content-Encoding"] == "gzip"
+    assert len(compressed.data) < len(plain.data)
+    assert revalidated.status_code == 304
+    assert stale.status_code == 404
+
+
+def test_compression_middleware_gzips_html_and_skips_pdf_and_small_bodies(tmp_path, monkeypatch):
+    client = _build_client_with_temp_db(tmp_path, monkeypatch)
+    # The page embeds the remaining session seconds; pin the clock so both renders match.
+    monkeypatch.setattr(survey_app, "now", lambda: datetime(2026, 2, 17, 9, 0, 0))
+    survey_app.upsert_response(_sample_answers("登入主功能操作送出"))
+    _login_report_user(client, "guest", "guest", "en")
+
+    plain = client.get("/admin/report?lang=en")
+    compressed = client.get("/admin/report?lang=en", headers={"Accept-Encoding": "gzip, deflate"})
+    pdf = client.get("/admin/report/export.pdf", headers={"Accept-Encoding": "gzip"})
+    small = client.post("/admin/session/reset", headers={"Accept-Encoding": "gzip"})
+
+    assert compressed.headers["Content-Encoding"] == "gzip"
+    assert compressed.headers["Vary"] == "Accept-Encoding"
+    assert gzip.decompress(compressed.data) == plain.data
+    assert "Content-Encoding" not in pdf.headers
+    assert pdf.data.startswith(b"%PDF")
+    assert "Content-Encoding" not in small.headers
+
+
+def test_compression_middleware_streams_deflate_chunks():
+    def streaming_app(environ, start_response):
+        start_response("200 OK", [("Content-Type", "text/csv; charset=utf-8")])
+        return (f"row-{idx},部門{idx}\n".encode("utf-8") for idx in range(2000))
+
+    middleware = survey_app.CompressionMiddleware(streaming_app, level=1, min_bytes=1024)
+    captured = {}
+
+    def start_response(status, headers, exc_info=None):
+        captured["headers"] = dict(headers)
+
+    body = b"".join(middleware({"HTTP_ACCEPT_ENCODING": "deflate", "REQUEST_METHOD": "GET"}, start_response))
+
+    assert captured["headers"]["Content-Encoding"] == "deflate"
+    assert "Content-Length" not in captured["headers"]
+    assert zlib.decompress(body).decode("utf-8").splitlines()[-1] == "row-1999,部門1999"
+
+
+def test_report_auth_cookie_is_signed_and_rejects_tampering(tmp_path, monkeypatch):
+    client = _build_client_with_temp_db(tmp_path, monkeypatch)
+
+    login_response = _login_report_user(client, "guest", "guest", "en")
+    cookie_value = client.get_cookie(survey_app.REPORT_AUTH_COOKIE_NAME).value
+    role, expires_at, nonce, signature = cookie_value.split(".")
+
+    assert login_response.status_code == 302
+    assert role == "guest"
+    assert "guest:guest" not in cookie_value
+    assert client.get("/admin/report?lang=en").status_code == 200
+
+    client.set_cookie(survey_app.REPORT_AUTH_COOKIE_NAME, f"admin.{expires_at}.{nonce}.{signature}")
+    assert client.get("/admin/report?lang=en").status_code == 302
+    assert client.get("/admin/report/export.csv").status_code == 403
+
+
+def test_report_auth_state_is_verified_once_per_request(tmp_path, monkeypatch):
+    client = _build_client_with_temp_db(tmp_path, monkeypatch)
+    monkeypatch.setattr(survey_app, "PROFILE_DIR", tmp_path / "profiles")
+    _login_report_user(client, "manager", "manager-pass", "en")
+    calls = {"count": 0}
+    original_verify = survey_app.verify_report_auth_token
+
+    def counting_verify(token):
+        calls["count"] += 1
+        return original_verify(token)
+
+    monkeypatch.setattr(survey_app, "verify_report_auth_token", counting_verify)
+
+    response = client.get("/admin/report?lang=en&_profile=1")
+
+    assert response.status_code == 200
+    assert "X-Survey-Profile-Id" in response.headers
+    assert calls["count"] == 1
+
+
+def test_segment_search_text_indexes_cjk_bigrams():
+    assert survey_app.segment_search_text("研發部ERP") == " 研發 發部 部 ERP"
+    assert survey_app.build_search_match_query("研發部 erp 部") == '"研發 發部" AND "erp"* AND "部"*'
+
+
+def test_admin_report_search_combines_with_date_filter(tmp_path, monkeypatch):
+    client = _build_client_with_temp_db(tmp_path, monkeypatch)
+    monkeypatch.setattr(survey_app, "now", lambda: datetime(2026, 2, 17, 9, 0, 1))
+
+    matching = _sample_answers("登入主功能操作送出")
+    matching.update({"department_name": "品保部", "person_name": "小花", "notes": "希望整合既有的 Jenkins 排程"})
+    other = _sample_answers("登入主功能操作送出")
+    other.update({"department_name": "財務部", "person_name": "阿明", "core_flows_other": "月結報表流程"})
+    survey_app.upsert_response(matching)
+    survey_app.upsert_response(other)
+    _login_report_user(client, "guest", "guest", "zh-TW")
+
+    by_notes = client.get("/admin/report?lang=zh-TW&date=2026-02-17&q=jenkins").get_data(as_text=True)
+    by_other_text = client.get("/admin/report?lang=zh-TW&date=2026-02-17&q=報表").get_data(as_text=True)
+    by_department = client.get("/admin/report?lang=zh-TW&date=2026-02-17&q=品保").get_data(as_text=True)
+    other_date = client.get("/admin/report?lang=zh-TW&date=2026-02-16&q=品保").get_data(as_text=True)
+
+    assert "📇 小花" in by_notes and "📇 阿明" not in by_notes
+    assert "📇 阿明" in by_other_text and "📇 小花" not in by_other_text
+    assert "📇 小花" in by_department
+    assert 'name="q" type="search" value="品保"' in by_department
+    assert "q=%E5%93%81%E4%BF%9D" in by_department
+    assert "所選日期沒有符合搜尋條件的資料。" in other_date
+
+
+def test_search_index_follows_upsert_and_delete(tmp_path, monkeypatch):
+    client = _build_client_with_temp_db(tmp_path, monkeypatch)
+    answers = _sample_answers("登入主功能操作送出")
+    answers["notes"] = "舊的補充說明"
+    survey_app.upsert_response(answers)
+    answers["notes"] = "新的補充說明"
+    survey_app.upsert_response(answers)
+    _login_report_user(client, "manager", "manager-pass", "zh-TW")
+
+    assert survey_app.get_report_records(search_query="舊的") == []
+    [record] = survey_app.get_report_records(search_query="新的")
+
+    client.post(f"/admin/report/delete/{record['id']}")
+
+    assert survey_app.get_report_records(search_query="新的") == []
+    with survey_app.connect_db() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM response_search").fetchone()[0] == 0
+
+
+def _parse_sse_events(body: str) -> list[dict]:
+    events = []
+    for block in body.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines() if ": " in line)
+        if "event" in fields:
+            events.append(fields)
+    return events
+
+
+def test_report_event_stream_replays_changes_after_last_event_id(tmp_path, monkeypatch):
+    client = _build_client_with_temp_db(tmp_path, monkeypatch)
+    monkeypatch.setattr(survey_app, "now", lambda: datetime(2026, 2, 17, 9, 0, 1))
+    _login_report_user(client, "manager", "manager-pass", "zh-TW")
+
+    ready = client.get("/admin/report/events?date=2026-02-17")
+    assert ready.mimetype == "text/event-stream"
+    assert ready.headers["Cache-Control"] == "no-cache"
+    [ready_event] = _parse_sse_events(ready.get_data(as_text=True))
+    assert ready_event["event"] == "ready"
+
+    survey_app.upsert_response(_sample_answers("登入主功能操作送出"))
+    survey_app.upsert_response(_sample_answers("查詢檢視匯出"))
+    [record] = survey_app.get_report_records()
+    client.post(f"/admin/report/delete/{record['id']}")
+
+    replay = client.get("/admin/report/events?date=2026-02-17", headers={"Last-Event-ID": ready_event["id"]})
+    events = _parse_sse_events(replay.get_data(as_text=True))
+
+    assert [event["event"] for event in events] == ["created", "updated", "deleted", "summary"]
+    assert all(json.loads(event["data"])["record_id"] == record["id"] for event in events[:3])
+    assert json.loads(events[-1]["data"])["total_submissions"] == 0
+
+    caught_up = client.get("/admin/report/events", headers={"Last-Event-ID": events[2]["id"]})
+    assert _parse_sse_events(caught_up.get_data(as_text=True)) == []
+
+
+def test_report_event_stream_resets_when_client_buffer_overflows(tmp_path, monkeypatch):
+    client = _build_client_with_temp_db(tmp_path, monkeypatch)
+    monkeypatch.setattr(survey_app, "REPORT_EVENT_CLIENT_BUFFER", 2)
+    _login_report_user(client, "guest", "guest", "zh-TW")
+
+    for index in range(3):
+        answers = _sample_answers("登入主功能操作送出")
+        answers["person_name"] = f"人員{index}"
+        survey_app.upsert_response(answers)
+
+    response = client.get("/admin/report/events", headers={"Last-Event-ID": "0"})
+    assert [event["event"] for event in _parse_sse_events(response.get_data(as_text=True))] == ["reset"]
+    assert client.get("/admin/report/events").status_code == 200
+
+    anonymous = survey_app.app.test_client()
+    assert anonymous.get("/admin/report/events").status_code == 403
+
+
+def test_report_event_requests_are_served_from_the_shared_hub_without_sqlite(tmp_path, monkeypatch):
+    client = _build_client_with_temp_db(tmp_path, monkeypatch)
+    _login_report_user(client, "guest", "guest", "zh-TW")
+    hub = survey_app.ReportEventHub(3)
+    monkeypatch.setattr(survey_app, "REPORT_EVENT_HUB", hub)
+    for index in range(2):
+        survey_app.upsert_response({**_sample_answers("登入主功能操作送出"), "person_name": f"人員{index}"})
+    hub.refresh()
+    hub.background = True
+
+    def no_sqlite():
+        raise AssertionError("event request touched SQLite")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(survey_app, "connect_db", no_sqlite)
+        for _ in range(20):
+            ready = _parse_sse_events(client.get("/admin/report/events").get_data(as_text=True))
+            assert [event["event"] for event in ready] == ["ready"]
+        caught_up = client.get("/admin/report/events", headers={"Last-Event-ID": ready[0]["id"]})
+        assert _parse_sse_events(caught_up.get_data(as_text=True)) == []
+
+    # The notifier pulls new rows in; a client older than the window resets.
+    for index in range(2, 5):
+        survey_app.upsert_response({**_sample_answers("登入主功能操作送出"), "person_name": f"人員{index}"})
+    hub.refresh()
+    assert [event[0] for event in hub.events] == [3, 4, 5] and hub.floor_id == 2
+    latest = client.get("/admin/report/events", headers={"Last-Event-ID": "4"}).get_data(as_text=True)
+    assert [event["event"] for event in _parse_sse_events(latest)] == ["created", "summary"]
+    stale = client.get("/admin/report/events", headers={"Last-Event-ID": "1"}).get_data(as_text=True)
+    assert [event["event"] for event in _parse_sse_events(stale)] == ["reset"]
+
+
+def test_report_record_fragment_respects_current_filters(tmp_path, monkeypatch):
+    client = _build_client_with_temp_db(tmp_path, monkeypatch)
+    monkeypatch.setattr(survey_app, "now", lambda: datetime(2026, 2, 17, 9, 0, 1))
+    survey_app.upsert_response(_sample_answers("登入主功能操作送出"))
+    [record] = survey_app.get_report_records()
+    _login_report_user(client, "manager", "manager-pass", "zh-TW")
+
+    fragment = client.get(f"/admin/report/records/{record['id']}/fragment?lang=zh-TW&date=2026-02-17")
+    html = fragment.get_data(as_text=True)
+    assert fragment.status_code == 200
+    assert f'data-record-id="{record["id"]}"' in html
+    assert f'id="record-detail-template-{record["id"]}"' in html
+
+    assert client.get(f"/admin/report/records/{record['id']}/fragment?date=2026-02-16").status_code == 204
+    assert client.get(f"/admin/report/records/{record['id']}/fragment?date=2026-02-17&q=不存在").status_code == 204
+
+    page = client.get("/admin/report?lang=zh-TW&date=2026-02-17").get_data(as_text=True)
+    assert 'data-events-url="/admin/report/events?lang=zh-TW&amp;date_from=2026-02-17&amp;date_to=2026-02-17"' in page
+    assert 'data-record-fragment-url="/admin/report/records/__id__/fragment?' in page
+    assert 'data-summary-field="total_submissions"' in page
+
+
+def test_api_batch_ingest_validates_items_and_reports_per_item_results(tmp_path, monkeypatch):
+    client = _build_client_with_temp_db(tmp_path, monkeypatch)
+    monkeypatch.setattr(survey_app, "now", lambda: datetime(2026, 2, 17, 9, 0, 1))
+    auth = {"Authorization": "Basic " + base64.b64encode(b"manager:manager-pass").decode("ascii")}
+    items = [
+        {**_sample_answers("登入→主功能操作→送出"), "submitted_at": "2026-02-16T08:30:00"},
+        {**_sample_answers("查詢→檢視→匯出"), "notes": "第二次送出"},
+        {"department_name": "財務部", "core_flows": ["不存在的流程"], "favourite_color": "blue"},
+        ["not", "an", "object"],
+    ]
+
+    response = client.post("/api/responses:batch", json=items, headers=auth)
+    payload = response.get_json()
+
+    assert response.status_code == 200
+    assert (payload["created"], payload["updated"], payload["invalid"], payload["total"]) == (1, 1, 2, 4)
+    assert [result["status"] for result in payload["results"]] == ["created", "updated", "invalid", "invalid"]
+    assert payload["results"][0]["id"] == payload["results"][1]["id"]
+    assert any("person_name: required" == error for error in payload["results"][2]["errors"])
+    assert any("unknown option" in error for error in payload["results"][2]["errors"])
+    assert any("favourite_color" in error for error in payload["results"][2]["errors"])
+
+    [record] = survey_app.get_report_records()
+    assert record["answers"]["core_flows"] == ["查詢→檢視→匯出"]
+    assert record["answers"]["notes"] == "第二次送出"
+
+    ndjson = "\n".join(json.dumps({"department_name": "品保部", "person_name": f"員{i}"}) for i in range(3))
+    ndjson_response = client.post("/api/responses:batch", data=ndjson, content_type="application/x-ndjson", headers=auth)
+    assert ndjson_response.get_json()["created"] == 3
+
+    assert client.post("/api/responses:batch", json=items).status_code == 403
+    assert client.post("/api/responses:batch", data="[", content_type="application/json", headers=auth).status_code == 400
+    assert client.post("/api/responses:batch", data="x", content_type="text/plain", headers=auth).status_code == 415
+
+
+def test_api_batch_ingest_replays_idempotent_retries(tmp_path, monkeypatch):
+    client = _build_client_with_temp_db(tmp_path, monkeypatch)
+    _login_report_user(client, "manager", "manager-pass", "zh-TW")
+    items = [{"department_name": "研發部", "person_name": "王小明", "notes": "第一版"}]
+
+    first = client.post("/api/responses:batch", json=items, headers={"Idempotency-Key": "offline-batch-1"})
+    items[0]["notes"] = "第二版"
+    survey_app.upsert_response(items[0])
+    retry = client.post(
+        "/api/responses:batch",
+        json=[{"department_name": "研發部", "person_name": "王小明", "notes": "第一版"}],
+        headers={"Idempotency-Key": "offline-batch-1"},
+    )
+    conflict = client.post("/api/responses:batch", json=items, headers={"Idempotency-Key": "offline-batch-1"})
+
+    assert first.get_json()["created"] == 1
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert retry.get_json() == first.get_json()
+    assert conflict.status_code == 409
+    [record] = survey_app.get_report_records()
+    assert record["answers"]["notes"] == "第二版"
+
+
+def test_ndjson_export_streams_raw_answers_with_date_push_down(tmp_path, monkeypatch):
+    client = _build_client_with_temp_db(tmp_path, monkeypatch)
+    monkeypatch.setattr(survey_app, "now", lambda: datetime(2026, 2, 17, 9, 0, 1))
+    survey_app.save_response_record(_sample_answers("登入→主功能操作→送出"), "2026-02-16T10:00:00")
+    other = _sample_answers("查詢→檢視→匯出")
+    other["person_name"] = "陳小華"
+    survey_app.save_response_record(other, "2026-02-17T08:00:00")
+    _login_report_user(client, "guest", "guest", "zh-TW")
+
+    response = client.get("/admin/report/export.ndjson?date_from=2026-02-17&date_to=2026-02-17")
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+    assert response.mimetype == "application/x-ndjson"
+    assert [line["answers"]["person_name"] for line in lines] == ["陳小華"]
+    assert lines[0]["answers"]["core_flows"] == ["查詢→檢視→匯出"]
+    assert lines[0]["submitted_at"] == "2026-02-17T08:00:00"
+    assert len(client.get("/admin/report/export.ndjson").get_data(as_text=True).splitlines()) == 2
+
+
+def test_parquet_export_has_one_boolean_column_per_option(tmp_path, monkeypatch):
+    client = _build_client_with_temp_db(tmp_path, monkeypatch)
+    survey_app.save_response_record(_sample_answers("登入主功能操作送出"), "2026-02-16T10:00:00")
+    _login_report_user(client, "guest", "guest", "zh-TW")
+
+    [batch] = survey_app.iter_columnar_export_batches()
+    columns = {column["name"]: column for column in batch}
+    assert columns["core_flows.登入→主功能操作→送出"] == {"name": "core_flows.登入→主功能操作→送出", "type": "bool", "values": [True]}
+    assert columns["core_flows.查詢→檢視→匯出"]["values"] == [False]
+    assert columns["submitted_at"]["values"] == [1_771_236_000_000]
+    assert columns["department_name"]["values"] == ["研發部"]
+
+    monkeypatch.setattr(survey_app, "pyarrow_parquet", None)
+    response = client.get("/admin/report/export.parquet")
+    assert response.status_code == 501 and "export.ndjson" in response.get_data(as_text=True)
+    assert survey_app.app.test_client().get("/admin/report/export.parquet").status_code == 403
+
+
+def test_parquet_export_streams_one_row_group_per_batch(tmp_path, monkeypatch):
+    pyarrow_parquet = pytest.importorskip("pyarrow.parquet")
+    client = _build_client_with_temp_db(tmp_path, monkeypatch)
+    monkeypatch.setattr(survey_app, "PARQUET_ROW_GROUP_ROWS", 2)
+    for index in range(5):
+        answers = {**_sample_answers("登入主功能操作送出"), "person_name": f"人員{index}"}
+        survey_app.save_response_record(answers, f"2026-02-16T10:0{index}:00")
+    _login_report_user(client, "guest", "guest", "zh-TW")
+
+    response = client.get("/admin/report/export.parquet?date_from=2026-02-16")
+    assert response.headers["Content-Type"] == "application/vnd.apache.parquet"
+    parquet_file = pyarrow_parquet.ParquetFile(io.BytesIO(response.get_data()))
+    assert parquet_file.metadata.num_row_groups == 3
+    table = parquet_file.read()
+    assert table.column("person_name").to_pylist() == [f"人員{index}" for index in range(4, -1, -1)]
+    assert table.column("core_flows.登入→主功能操作→送出").to_pylist() == [True] * 5
+    assert table.column("submitted_at").to_pylist()[0] == datetime(2026, 2, 16, 10, 4)
+
+
+def test_date_range_filter_ignores_only_the_malformed_bound():
+    assert survey_app.build_date_range_filter("2026-02-16", "2026-02-17") == (
+        " AND submitted_at >= ? AND submitted_at < ?",
+        ["2026-02-16", "2026-02-18"],
+    )
+    assert survey_app.build_date_range_filter("2026-02-16", "2026-02-30") == (" AND submitted_at >= ?", ["2026-02-16"])
+    assert survey_app.build_date_range_filter("16/02/2026", "2026-02-28") == (" AND submitted_at < ?", ["2026-03-01"])
+    assert survey_app.build_date_range_filter("bad", "") == ("", [])
+
+
+def test_csv_and_pdf_exports_apply_date_department_and_search_filters(tmp_path, monkeypatch):
+    client = _build_client_with_temp_db(tmp_path, monkeypatch)
+    monkeypatch.setattr(survey_app, "now", lambda: datetime(2026, 2, 17, 9, 0, 1))
+    for department, person, submitted_at, notes in [
+        ("研發部", "王小明", "2026-02-15T09:00:00", "需要 OTP"),
+        ("研發部", "李大同", "2026-02-16T09:00:00", "需要 OTP"),
+        ("品保部", "陳小華", "2026-02-16T10:00:00", "需要 OTP"),
+        ("研發部", "林小美", "2026-02-17T09:00:00", "匯出報表"),
+    ]:
+        answers = _sample_answers("登入主功能操作送出")
+        answers.update({"department_name": department, "person_name": person, "notes": notes})
+        survey_app.save_response_record(answers, submitted_at)
+    _login_report_user(client, "manager", "manager-pass", "zh-TW")
+
+    csv_text = client.get(
+        "/admin/report/export.csv?date_from=2026-02-16&date_to=2026-02-17&department=研發部"
+    ).get_data(as_text=True)
+    assert "李大同" in csv_text and "林小美" in csv_text
+    assert "王小明" not in csv_text and "陳小華" not in csv_text
+
+    searched = client.get("/admin/report/export.csv?date_to=2026-02-16&q=OTP").get_data(as_text=True)
+    assert all(name in searched for name in ["王小明", "李大同", "陳小華"])
+    assert "林小美" not in searched
+
+    pdf_response = client.get("/admin/report/export.pdf?date_from=2026-02-16&date_to=2026-02-16")
+    pdf_text = _pdf_text(pdf_response.get_data())
+    assert pdf_response.status_code == 200
+    assert "李大同" in pdf_text and "陳小華" in pdf_text
+    assert "王小明" not in pdf_text and "林小美" not in pdf_text
+    assert "提交總筆數：2" in pdf_text
+
+    page = client.get("/admin/report?lang=zh-TW&date=2026-02-16&q=OTP").get_data(as_text=True)
+    assert 'href="/admin/report/export.csv?lang=zh-TW&amp;date_from=2026-02-16&amp;date_to=2026-02-16&amp;q=OTP"' in page
+    assert 'href="/admin/report/export.pdf?lang=zh-TW&amp;date_from=2026-02-16&amp;date_to=2026-02-16&amp;q=OTP"' in page
+
+
+def test_pdf_wrap_text_breaks_cjk_without_truncating_or_leading_punctuation():
+    import pdf_report
+
+    text = "希望可以整合既有的 CI 流程，並且支援 OTP 簡訊驗證。" * 12
+    lines = pdf_report.wrap_text(text, 200, 10)
+
+    assert len(lines) > 5
+    assert all(pdf_report.text_width(line, 10) <= 200 + pdf_report.text_width("，", 10) for line in lines)
+    assert not any(line[:1] in pdf_report.NO_LINE_START for line in lines)
+    assert "".join(lines).replace(" ", "") == text.replace(" ", "")
+    assert pdf_report.wrap_text("Jenkins pipeline", 1000, 10) == ["Jenkins pipeline"]
+
+
+def test_pdf_summary_with_many_options_continues_on_further_pages():
+    import pdf_report
+
+    rows = [(f"選項{index:03d}", index) for index in range(120)]
+    stream = io.BytesIO()
+    writer = pdf_report.ReportPdfWriter(stream, "問卷")
+    page_count = writer.finish(["概要"], [{"label": "1. 多選題", "answered": 10, "total": 10, "rows": rows}])
+    pdf_text = _pdf_text(stream.getvalue())
+
+    assert page_count > 3
+    assert all(f"選項{index:03d}" in pdf_text for index in range(120))
+    assert "1. 多選題（續）" in pdf_text
+    # The TOC still lists the question once, pointing at its first page.
+    assert pdf_text.count("1. 多選題") == 2 + (page_count - 3)
+
+
+def test_pdf_export_is_streamed_with_toc_summaries_and_full_values(tmp_path, monkeypatch):
+    client = _build_client_with_temp_db(tmp_path, monkeypatch)
+    long_note = "這是一段很長的補充說明，用來確認內容不會被截斷。" * 8 + "結尾標記"
+    for index in range(30):
+        answers = _sample_answers("登入主功能操作送出")
+        answers.update({"person_name": f"人員{index:02d}", "notes": long_note if index == 0 else ""})
+        survey_app.save_response_record(answers, f"2026-02-{16 + index % 2}T09:{index:02d}:00")
+    _login_report_user(client, "guest", "guest", "zh-TW")
+
+    response = client.get("/admin/report/export.pdf")
+    payload = response.get_data()
+    pdf_text = _pdf_text(payload)
+
+    assert response.headers["Content-Length"] == str(len(payload))
+    assert payload.startswith(b"%PDF-1.4") and payload.rstrip().endswith(b"%%EOF")
+    assert "目錄" in pdf_text and "填答紀錄：2026-02-17" in pdf_text and "填答紀錄：2026-02-16" in pdf_text
+    assert "作答人數：30 / 30" in pdf_text
+    assert "登入→主功能操作→送出" in pdf_text and "30（100.0%）" in pdf_text
+    assert "結尾標記" in pdf_text
+    page_count, kids = re.search(rb"/Type /Pages /Count (\d+) /Kids \[([^\]]*)\]", payload).groups()
+    page_ids = [int(page_id) for page_id in re.findall(rb"(\d+) 0 R", kids)]
+    assert len(page_ids) == int(page_count) == len(re.findall(rb"/Type /Page ", payload))
+    # Front matter is written after the records but listed first in the page tree.
+    assert page_ids[0] > page_ids[-1]
+    assert f"{int(page_count)} / {int(page_count)}" in pdf_text
+    assert _assert_pdf_structure(payload) == int(page_count)
+
+
+def test_pdf_export_opens_in_an_independent_reader(tmp_path, monkeypatch):
+    pypdf = pytest.importorskip("pypdf")
+    _build_client_with_temp_db(tmp_path, monkeypatch)
+    for index in range(12):
+        answers = {**_sample_answers("登入主功能操作送出"), "person_name": f"人員{index:02d}", "notes": "補充" * 200}
+        survey_app.save_response_record(answers, f"2026-02-{16 + index % 2}T09:{index:02d}:00")
+    monkeypatch.setattr(survey_app, "PDF_RENDER_RANGE_RECORDS", 5)
+
+    for workers in (1, 2):
+        buffer = io.BytesIO()
+        page_count = survey_app.write_report_pdf(buffer, workers=workers)
+        reader = pypdf.PdfReader(io.BytesIO(buffer.getvalue()), strict=True)
+        assert len(reader.pages) == page_count == _assert_pdf_structure(buffer.getvalue())
+        titles = [item.title for item in reader.outline]
+        assert titles[0] == "概要" and titles[-2:] == ["填答紀錄：2026-02-17", "填答紀錄：2026-02-16"]
+        assert reader.get_destination_page_number(reader.outline[-1]) < page_count
+        assert reader.metadata.title == survey_app.get_active_survey()["title"]
+
+
+def test_parallel_pdf_render_matches_sequential_records_and_summaries(tmp_path, monkeypatch):
+    _build_client_with_temp_db(tmp_path, monkeypatch)
+    for index in range(25):
+        answers = _sample_answers("登入主功能操作送出")
+        answers["person_name"] = f"人員{index:02d}"
+        survey_app.save_response_record(answers, f"2026-02-{16 + index % 3}T09:00:00")
+    monkeypatch.setattr(survey_app, "PDF_RENDER_RANGE_RECORDS", 7)
+
+    ranges = survey_app.plan_pdf_render_ranges(None, 7)
+    assert [render_range["first_index"] for render_range in ranges] == [1, 8, 15, 22]
+    assert ranges[0]["current_section"] is None and ranges[1]["current_section"] == "2026-02-18"
+    assert ranges[-1]["end_key"] is None
+
+    sequential, parallel = io.BytesIO(), io.BytesIO()
+    survey_app.write_report_pdf(sequential, workers=1)
+    survey_app.write_report_pdf(parallel, workers=2)
+    sequential_text, parallel_text = _pdf_text(sequential.getvalue()), _pdf_text(parallel.getvalue())
+
+    for index in range(25):
+        assert f"人員{index:02d}" in parallel_text
+    for text in (sequential_text, parallel_text):
+        assert "提交總筆數：25" in text and "作答人數：25 / 25" in text
+    record_order = re.findall(r"\[(\d+)\] \d{4}", sequential_text)
+    assert record_order and re.findall(r"\[(\d+)\] \d{4}", parallel_text) == record_order
+
+
+def test_parallel_pdf_ranges_start_new_pages_and_keep_record_order_at_boundaries(tmp_path, monkeypatch):
+    _build_client_with_temp_db(tmp_path, monkeypatch)
+    for index in range(21):
+        answers = _sample_answers("登入主功能操作送出")
+        answers["person_name"] = f"人員{index:02d}"
+        survey_app.save_response_record(answers, f"2026-02-16T09:{index:02d}:00")
+    monkeypatch.setattr(survey_app, "PDF_RENDER_RANGE_RECORDS", 7)
+    # 21 rows split exactly: no empty trailing range.
+    assert [render_range["first_index"] for render_range in survey_app.plan_pdf_render_ranges(None, 7)] == [1, 8, 15]
+
+    def record_pages(payload: bytes) -> list[list[int]]:
+        pages = []
+        for matched in re.finditer(rb"<< /Length (\d+) /Filter /FlateDecode >>\nstream\n", payload):
+            content = zlib.decompress(payload[matched.end():matched.end() + int(matched.group(1))])
+            text = "".join(bytes.fromhex(hex_text.decode()).decode("utf-16-be") for hex_text in re.findall(rb"<([0-9a-f]*)> Tj", content))
+            if indexes := [int(index) for index in re.findall(r"\[(\d+)\] \d{4}", text)]:
+                pages.append(indexes)
+        return pages
+
+    sequential, parallel = io.BytesIO(), io.BytesIO()
+    sequential_pages = survey_app.write_report_pdf(sequential, workers=1)
+    parallel_pages = survey_app.write_report_pdf(parallel, workers=2)
+    sequential_records, parallel_records = record_pages(sequential.getvalue()), record_pages(parallel.getvalue())
+
+    assert [index for page in parallel_records for index in page] == list(range(1, 22))
+    assert [index for page in sequential_records for index in page] == list(range(1, 22))
+    # Every range opens a page of its own and no page mixes two ranges.
+    assert {page[0] for page in parallel_records} >= {8, 15}
+    assert all((page[0] - 1) // 7 == (page[-1] - 1) // 7 for page in parallel_records)
+    # Front matter is identical, so the difference is the forced breaks: at
+    # most one page per range boundary.
+    assert 0 <= parallel_pages - sequential_pages <= 2
+    assert _assert_pdf_structure(parallel.getvalue()) == parallel_pages
+
+
+def test_report_records_read_write_time_renders_and_rebuild_on_definition_change(tmp_path, monkeypatch):
+    _build_client_with_temp_db(tmp_path, monkeypatch)
+    answers = _sample_answers("登入主功能操作送出")
+    survey_app.save_response_record(answers, "2026-02-16T09:00:00")
+    expected = {lang: survey_app.get_report_records(lang)[0] for lang in ("zh-TW", "en")}
+
+    definition_hash = survey_app.get_survey("at")["definition_hash"]
+    with survey_app.connect_db() as conn:
+        renders = conn.execute("SELECT lang, definition_hash FROM response_renders ORDER BY lang").fetchall()
+    assert renders == [("en", definition_hash), ("zh-TW", definition_hash)]
+
+    with monkeypatch.context() as patch:
+        patch.setattr(survey_app, "build_report_values", lambda *_: pytest.fail("render payload not used"))
+        assert survey_app.get_report_records("en")[0] == expected["en"]
+
+    monkeypatch.setitem(survey_app.get_survey("at"), "definition_hash", "changed")
+    assert survey_app.get_report_records("zh-TW")[0] == expected["zh-TW"]
+    survey_app.init_db()
+    with survey_app.connect_db() as conn:
+        hashes = {row[0] for row in conn.execute("SELECT definition_hash FROM response_renders")}
+    assert hashes == {"changed"}
+
+    # Only rows with a stale render are rewritten, a batch per transaction.
+    for index in range(3):
+        survey_app.save_response_record({**answers, "person_name": f"人員{index}"}, f"2026-02-16T10:0{index}:00")
+    with survey_app.connect_db() as conn:
+        conn.execute("UPDATE response_renders SET definition_hash = 'stale' WHERE response_id > 2 AND lang = 'en'")
+        conn.commit()
+        statements = []
+        conn.set_trace_callback(statements.append)
+        assert survey_app.refresh_stale_report_renders(conn, batch_size=1) == 2
+        assert statements.count("BEGIN IMMEDIATE") == 3
+        assert conn.execute("SELECT COUNT(*) FROM response_renders WHERE definition_hash != 'changed'").fetchone()[0] == 0
+        assert survey_app.refresh_stale_report_renders(conn) == 0
+
+
+def test_record_fragment_cache_reuses_cards_and_drops_them_on_write(tmp_path, monkeypatch):
+    client = _build_client_with_temp_db(tmp_path, monkeypatch)
+    monkeypatch.setattr(survey_app, "RECORD_FRAGMENT_CACHE", survey_app.RecordFragmentCache(50, 1024 * 1024))
+    monkeypatch.setattr(survey_app, "now", lambda: datetime(2026, 2, 16, 12, 0, 0))
+    for index in range(3):
+        answers = _sample_answers("登入主功能操作送出")
+        answers["person_name"] = f"人員{index}"
+        survey_app.save_response_record(answers, f"2026-02-16T09:0{index}:00")
+    _login_report_user(client, "manager", "manager-pass", "zh-TW")
+
+    client.get("/admin/report?lang=zh-TW")
+    client.get("/admin/report?lang=zh-TW")
+    stats = client.get("/admin/report/fragment-cache").get_json()
+    assert (stats["entries"], stats["hits"], stats["misses"]) == (3, 3, 3)
+    assert stats["hit_ratio"] == 0.5 and stats["bytes"] > 0
+
+    answers = _sample_answers("登入主功能操作送出")
+    answers.update({"person_name": "人員1", "main_system": "新系統XYZ"})
+    survey_app.save_response_record(answers, "2026-02-16T09:01:00")
+    html = client.get("/admin/report?lang=zh-TW").get_data(as_text=True)
+    assert "新系統XYZ" in html
+    assert client.get("/admin/report/fragment-cache").get_json()["misses"] == 4
+
+    _login_report_user(client, "guest", "guest", "zh-TW")
+    assert client.get("/admin/report/fragment-cache").status_code == 403
+
+
+def test_record_fragment_cache_evicts_least_recently_used_within_bounds():
+    cache = survey_app.RecordFragmentCache(2, 1024 * 1024)
+    for record_id in (1, 2):
+        cache.put((record_id, "t", "en", "admin", "h"), survey_app.Markup(f"<p>{record_id}</p>"))
+    assert cache.get((1, "t", "en", "admin", "h")) is not None
+    cache.put((3, "t", "en", "admin", "h"), survey_app.Markup("<p>3</p>"))
+    assert cache.get((2, "t", "en", "admin", "h")) is None
+    cache.invalidate_record(1)
+    assert cache.stats()["entries"] == 1 and cache.keys_by_record == {3: {(3, "t", "en", "admin", "h")}}
+
+
+def test_backup_database_copies_a_consistent_snapshot_in_paced_steps(tmp_path, monkeypatch):
+    _build_client_with_temp_db(tmp_path, monkeypatch)
+    for index in range(40):
+        answers = _sample_answers("登入主功能操作送出")
+        answers.update({"person_name": f"人員{index:02d}", "notes": "備註" * 400})
+        survey_app.save_response_record(answers, f"2026-02-16T09:{index:02d}:00")
+
+    result = survey_app.backup_database(tmp_path / "copy.db", pages_per_step=2, pause_seconds=0)
+    assert result["steps"] > 1 and result["restarts"] == 0
+    with survey_app.sqlite3.connect(tmp_path / "copy.db") as copy:
+        assert copy.execute("SELECT COUNT(*) FROM responses").fetchone()[0] == 40
+        assert copy.execute("PRAGMA journal_mode").fetchone()[0] == "delete"
+
+    writes = []
+
+    def write_between_steps(_seconds):
+        answers = _sample_answers("登入主功能操作送出")
+        answers["person_name"] = f"並行寫入{len(writes)}"
+        survey_app.save_response_record(answers, "2026-02-17T09:00:00")
+        writes.append(answers["person_name"])
+
+    monkeypatch.setattr(survey_app, "sleep", write_between_steps)
+    result = survey_app.backup_database(tmp_path / "busy.db", pages_per_step=2, pause_seconds=0.01)
+    assert writes and result["restarts"] == 0
+    with survey_app.sqlite3.connect(tmp_path / "busy.db") as copy:
+        assert copy.execute("SELECT COUNT(*) FROM responses").fetchone()[0] == 40
+    with survey_app.connect_db() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0] == 40 + len(writes)
+    assert not list(tmp_path.glob("*.partial"))
+
+
+def test_exports_read_report_snapshot_and_admin_backup_endpoint(tmp_path, monkeypatch):
+    client = _build_client_with_temp_db(tmp_path, monkeypatch)
+    monkeypatch.setattr(survey_app, "REPORT_SNAPSHOT_INTERVAL_SECONDS", 60)
+    monkeypatch.setattr(survey_app, "BACKUP_DIR", tmp_path / "backups")
+    survey_app.save_response_record(_sample_answers("登入主功能操作送出"), "2026-02-16T09:00:00")
+    assert survey_app.refresh_report_snapshot() is True
+    assert survey_app.refresh_report_snapshot() is False
+
+    late = _sample_answers("登入主功能操作送出")
+    late["person_name"] = "快照後填答"
+    survey_app.save_response_record(late, "2026-02-16T10:00:00")
+    _login_report_user(client, "manager", "manager-pass", "zh-TW")
+
+    assert "快照後填答" not in client.get("/admin/report/export.csv").get_data(as_text=True)
+    assert "快照後填答" not in client.get("/admin/report/export.ndjson").get_data(as_text=True)
+    assert "快照後填答" in client.get("/admin/report?lang=zh-TW&date=2026-02-16").get_data(as_text=True)
+    # Another process holding the lease is already copying; this one skips.
+    holder = survey_app.claim_maintenance_lease("report-snapshot", 60)
+    assert survey_app.refresh_report_snapshot(force=True) is False
+    survey_app.release_maintenance_lease("report-snapshot", holder)
+    assert survey_app.refresh_report_snapshot(force=True) is True
+    assert "快照後填答" in client.get("/admin/report/export.csv").get_data(as_text=True)
+
+    response = client.post("/admin/backup")
+    assert response.status_code == 200
+    assert (tmp_path / "backups" / response.get_json()["path"]).exists()
+    _login_report_user(client, "guest", "guest", "zh-TW")
+    assert client.post("/admin/backup").status_code == 403
+
+
+def test_survey_registry_serves_extra_surveys_scoped_by_slug(tmp_path, monkeypatch):
+    client = _build_client_with_temp_db(tmp_path, monkeypatch)
+    surveys_dir = tmp_path / "surveys"
+    surveys_dir.mkdir()
+    (surveys_dir / "demo.json").write_text(
+        json.dumps(
+            {
+                "title": "第二份問卷",
+                "open_start_at": "2026-02-01 09:00",
+                "open_end_at": "2026-02-28 18:00",
+                "form_definition": [
+                    {
+                        "section": "basic",
+                        "type": "text_pair",
+                        "name": "department_person_pair",
+                        "label": "部門/人員",
+                        "left": {"name": "department_name", "label": "部門", "placeholder": ""},
+                        "right": {"name": "person_name", "label": "人員", "placeholder": ""},
+                    },
+                    {"type": "text", "name": "favorite_tool", "label": "1. 最常用的工具", "placeholder": ""},
+                ],
+            },
+            ensure_ascii=False,
+        ),
+        encoding="utf-8",
+    )
+    monkeypatch.setattr(survey_config, "SURVEYS_DIR", surveys_dir)
+    monkeypatch.setattr(survey_app, "COMPILED_SURVEYS", survey_app.OrderedDict())
+    monkeypatch.setattr(survey_app, "MISSING_SURVEYS", survey_app.OrderedDict())
+    monkeypatch.setattr(survey_app, "COMPILED_SURVEY_CACHE_SIZE", 1)
+    monkeypatch.setattr(survey_app, "now", lambda: datetime(2026, 2, 16, 12, 0, 0))
+    survey_app.save_response_record(_sample_answers("登入主功能操作送出"), "2026-02-16T09:00:00")
+
+    assert "最常用的工具" in client.get("/q/demo?lang=zh-TW").get_data(as_text=True)
+    assert list(survey_app.COMPILED_SURVEYS) == ["demo"]
+    assert client.get("/q/missing").status_code == 404
+    response = client.post(
+        "/q/demo?lang=zh-TW",
+        data={"department_name": "品保部", "person_name": "第二份填答者", "favorite_tool": "pytest"},
+    )
+    assert response.status_code == 200
+    with survey_app.connect_db() as conn:
+        assert conn.execute("SELECT survey_slug, person_name FROM responses ORDER BY id").fetchall() == [
+            ("at", "王小明"),
+            ("demo", "第二份填答者"),
+        ]
+
+    _login_report_user(client, "manager", "manager-pass", "zh-TW")
+    demo_report = client.get("/admin/report?lang=zh-TW&date=2026-02-16&survey=demo").get_data(as_text=True)
+    default_report = client.get("/admin/report?lang=zh-TW&date=2026-02-16").get_data(as_text=True)
+    assert "第二份填答者" in demo_report and "pytest" in demo_report and "王小明" not in demo_report
+    assert "survey=demo" in demo_report and "第二份問卷" in demo_report
+    assert "王小明" in default_report and "第二份填答者" not in default_report
+    assert "第二份填答者" in client.get("/admin/report/export.csv?survey=demo").get_data(as_text=True)
+    assert "第二份填答者" in client.get("/admin/report/export.ndjson?survey=demo").get_data(as_text=True)
+    assert survey_app.get_active_survey()["slug"] == "at"
+    assert client.get("/admin/report?survey=missing").status_code == 404
+
+    # Misses are cached until the watcher sees a source file appear.
+    assert list(survey_app.MISSING_SURVEYS) == ["missing"]
+    with monkeypatch.context() as patch:
+        patch.setattr(survey_app, "load_survey_source", lambda slug: pytest.fail(f"reloaded {slug}"))
+        assert client.get("/q/missing").status_code == 404
+    (surveys_dir / "missing.json").write_text((surveys_dir / "demo.json").read_text(encoding="utf-8"), encoding="utf-8")
+    assert client.get("/q/missing").status_code == 404
+    survey_app.reload_changed_surveys()
+    assert client.get("/q/missing?lang=zh-TW").status_code == 200
+
+
+def test_survey_config_reload_keeps_last_good_survey_when_an_edit_is_invalid(tmp_path, monkeypatch, capsys):
+    client = _build_client_with_temp_db(tmp_path, monkeypatch)
+    surveys_dir = tmp_path / "surveys"
+    surveys_dir.mkdir()
+    demo_path = surveys_dir / "demo.json"
+    definition = {
+        "title": "第二份問卷",
+        "open_start_at": "2026-02-01 09:00",
+        "open_end_at": "2026-02-28 18:00",
+        "form_definition": [{"type": "text", "name": "favorite_tool", "label": "1. 最常用的工具", "placeholder": ""}],
+    }
+    demo_path.write_text(json.dumps(definition, ensure_ascii=False), encoding="utf-8")
+    monkeypatch.setattr(survey_config, "SURVEYS_DIR", surveys_dir)
+    monkeypatch.setattr(survey_app, "COMPILED_SURVEYS", survey_app.OrderedDict())
+    monkeypatch.setattr(survey_app, "MISSING_SURVEYS", survey_app.OrderedDict())
+    monkeypatch.setattr(survey_app, "now", lambda: datetime(2026, 2, 16, 12, 0, 0))
+    assert "最常用的工具" in client.get("/q/demo?lang=zh-TW").get_data(as_text=True)
+
+    def edit(text: str) -> None:
+        stat = demo_path.stat()
+        demo_path.write_text(text, encoding="utf-8")
+        survey_app.os.utime(demo_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    no_type = {**definition, "form_definition": [{"name": "favorite_tool", "label": "改壞的題目"}]}
+    for broken in (json.dumps(no_type, ensure_ascii=False), '{"title": "寫到一半'):
+        edit(broken)
+        assert survey_app.reload_changed_surveys() == []
+        assert "keeping the previous definition" in capsys.readouterr().out
+        assert "最常用的工具" in client.get("/q/demo?lang=zh-TW").get_data(as_text=True)
+        # The failed edit is not retried until the file changes again.
+        assert survey_app.reload_changed_surveys() == []
+        assert capsys.readouterr().out == ""
+
+    (surveys_dir / "broken.json").write_text(json.dumps(no_type, ensure_ascii=False), encoding="utf-8")
+    assert client.get("/q/broken").status_code == 404
+    assert "survey broken is invalid" in capsys.readouterr().out
+
+    edit(json.dumps({**definition, "title": "修正後的問卷"}, ensure_ascii=False))
+    assert survey_app.reload_changed_surveys() == ["demo"]
+    assert "修正後的問卷" in client.get("/q/demo?lang=zh-TW").get_data(as_text=True)
+    demo_path.unlink()
+    assert survey_app.reload_changed_surveys() == ["demo"]
+    assert client.get("/q/demo").status_code == 404
+
+
+def test_survey_config_reload_swaps_in_edited_window_and_definition(tmp_path, monkeypatch):
+    client = _build_client_with_temp_db(tmp_path, monkeypatch)
+    window_path = tmp_path / "survey_window.json"
+    window_path.write_text(
+        json.dumps({"open_start_at": "2026-02-16 09:00", "open_end_at": "2026-02-20 18:00"}),
+        encoding="utf-8",
+    )
+    monkeypatch.setattr(survey_config, "WINDOW_CONFIG_PATH", window_path)
+    monkeypatch.setattr(survey_app, "COMPILED_SURVEYS", survey_app.OrderedDict())
+    monkeypatch.setattr(survey_app, "MISSING_SURVEYS", survey_app.OrderedDict())
+    monkeypatch.setattr(survey_app, "now", lambda: datetime(2026, 3, 2, 12, 0, 0))
+    survey_app.save_response_record(_sample_answers("登入主功能操作送出"), "2026-02-16T09:00:00")
+
+    assert client.get("/q/at?lang=zh-TW").status_code == 410
+    assert survey_app.reload_changed_surveys() == []
+
+    window_path.write_text(
+        json.dumps({"open_start_at": "2026-03-01 09:00", "open_end_at": "2026-03-05 18:00"}),
+        encoding="utf-8",
+    )
+    stat = window_path.stat()
+    survey_app.os.utime(window_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    # Requests keep the compiled survey until the watcher swaps it.
+    assert client.get("/q/at?lang=zh-TW").status_code == 410
+    with survey_app.app.test_request_context("/q/at"):
+        survey_app.bind_active_survey()
+        assert survey_app.is_survey_open() is False
+
+    assert survey_app.reload_changed_surveys() == ["at"]
+    assert client.get("/q/at?lang=zh-TW").status_code == 200
+    with survey_app.app.test_request_context("/q/at"):
+        survey_app.bind_active_survey()
+        assert survey_app.is_survey_open() is True
+
+    monkeypatch.setitem(survey_app.COMPILED_SURVEYS["at"], "source_mtime", None)
+    monkeypatch.setitem(survey_app.COMPILED_SURVEYS["at"], "definition_hash", "stale")
+    with survey_app.connect_db() as conn:
+        conn.execute("UPDATE response_renders SET definition_hash = 'stale'")
+        conn.commit()
+    assert survey_app.reload_changed_surveys() == ["at"]
+    # The watcher leaves stale renders to the live fallback; startup refreshes them.
+    with survey_app.connect_db() as conn:
+        assert {row[0] for row in conn.execute("SELECT definition_hash FROM response_renders")} == {"stale"}
+    _login_report_user(client, "manager", "manager-pass", "zh-TW")
+    assert "王小明" in client.get("/admin/report?lang=zh-TW&date=2026-02-16").get_data(as_text=True)
+    survey_app.init_db()
+    fresh_hash = survey_app.get_survey("at")["definition_hash"]
+    with survey_app.connect_db() as conn:
+        assert {row[0] for row in conn.execute("SELECT definition_hash FROM response_renders")} == {fresh_hash}
+
+
+def test_submission_admission_rate_limits_clients_and_sheds_when_writer_is_saturated(tmp_path, monkeypatch):
+    client = _build_client_with_temp_db(tmp_path, monkeypatch)
+    monkeypatch.setattr(survey_app, "is_survey_open", lambda: True)
+    admission = survey_app.SubmissionAdmission(rate_per_minute=6, burst=2, max_concurrent=1, max_queue_seconds=0.05)
+    monkeypatch.setattr(survey_app, "SUBMISSION_ADMISSION", admission)
+    form = {"department_name": "研發部", "person_name": "王小明"}
+
+    assert client.post("/q/at?lang=en", data=form).status_code == 200
+    assert client.post("/q/at?lang=en", data=form).status_code == 200
+    limited = client.post("/q/at?lang=en", data={**form, "notes": "保留這段"})
+    assert limited.status_code == 429
+    assert limited.headers["Retry-After"] in {"9", "10"}
+    limited_html = limited.get_data(as_text=True)
+    assert "Too many submissions. Please submit again in " in limited_html
+    assert 'value="王小明"' in limited_html and "保留這段" in limited_html
+
+    other_client = {"REMOTE_ADDR": "10.0.0.2"}
+    assert admission.acquire_slot()
+    try:
+        shed = client.post("/q/at?lang=en", data=form, environ_base=other_client)
+    finally:
+        admission.release_slot()
+    assert shed.status_code == 503
+    assert shed.headers["Retry-After"] == "1"
+    assert "The system is busy" in shed.get_data(as_text=True) and 'value="王小明"' in shed.get_data(as_text=True)
+    assert client.post("/q/at?lang=en", data=form, environ_base=other_client).status_code == 200
+
+    assert client.get("/admin/submissions/admission").status_code == 403
+    _login_report_user(client, "manager", "manager-pass")
+    stats = client.get("/admin/submissions/admission").get_json()
+    assert stats["admitted"] == 4 and stats["rate_limited"] == 1 and stats["shed"] == 1
+    assert stats["in_flight"] == 0 and stats["tracked_clients"] == 2
+
+
+def test_submission_admission_keys_on_forwarded_client_only_behind_trusted_proxy(tmp_path, monkeypatch):
+    client = _build_client_with_temp_db(tmp_path, monkeypatch)
+    monkeypatch.setattr(survey_app, "is_survey_open", lambda: True)
+    form = {"department_name": "研發部", "person_name": "王小明"}
+
+    def submit_from(forwarded_for: str) -> int:
+        return client.post("/q/at?lang=en", data=form, headers={"X-Forwarded-For": forwarded_for}).status_code
+
+    monkeypatch.setattr(survey_app, "SUBMISSION_ADMISSION", survey_app.SubmissionAdmission(6, 1, 1, 0.05))
+    assert submit_from("203.0.113.1") == 200
+    assert submit_from("203.0.113.2") == 429
+
+    monkeypatch.setattr(survey_app, "SUBMISSION_ADMISSION", survey_app.SubmissionAdmission(6, 1, 1, 0.05))
+    monkeypatch.setattr(survey_app.app, "wsgi_app", survey_app.ProxyFix(survey_app.app.wsgi_app, x_for=1))
+    assert submit_from("203.0.113.1") == 200
+    assert submit_from("203.0.113.2") == 200
+    assert submit_from("198.51.100.9, 203.0.113.1") == 429
+    assert survey_app.SUBMISSION_ADMISSION.stats()["tracked_clients"] == 2
+
+
+def test_identical_resubmission_is_detected_by_answers_hash_and_writes_nothing(tmp_path, monkeypatch):
+    client = _build_client_with_temp_db(tmp_path, monkeypatch)
+    monkeypatch.setattr(survey_app, "is_survey_open", lambda: True)
+    current_time = {"value": datetime(2026, 2, 17, 9, 0, 0)}
+    monkeypatch.setattr(survey_app, "now", lambda: current_time["value"])
+    form = {"department_name": "研發部", "person_name": "王小明", "core_flows": ["查詢→檢視→匯出"], "notes": "備註"}
+
+    assert client.post("/q/at?lang=zh-TW", data=form).status_code == 200
+    current_time["value"] = datetime(2026, 2, 17, 9, 5, 0)
+    assert client.post("/q/at?lang=zh-TW", data=form).status_code == 200
+
+    [record] = survey_app.get_report_records()
+    assert record["submitted_at"] == "2026/02/17 09:00:00"
+    with survey_app.connect_db() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM report_events").fetchone()[0] == 1
+        answers = json.loads(conn.execute("SELECT answers_json FROM responses").fetchone()[0])
+        changes_before = conn.total_changes
+        assert survey_app.persist_response(conn, answers, "2026-02-17T09:10:00") == (record["id"], "unchanged")
+        assert conn.total_changes == changes_before and not conn.in_transaction
+
+    # The unchanged path never waits for the write lock another writer holds.
+    writer = survey_app.sqlite3.connect(survey_app.DB_PATH)
+    writer.execute("BEGIN IMMEDIATE")
+    try:
+        with survey_app.sqlite3.connect(survey_app.DB_PATH, timeout=0) as conn:
+            assert survey_app.persist_response(conn, answers, "2026-02-17T09:10:00") == (record["id"], "unchanged")
+    finally:
+        writer.close()
+
+    reordered = dict(reversed(list(answers.items())))
+    assert survey_app.save_response_record(reordered) == "unchanged"
+    assert survey_app.save_response_record({**answers, "notes": "改過"}) == "updated"
+
+
+def test_migrations_upgrade_legacy_database_in_resumable_batches(tmp_path, monkeypatch):
+    db_path = tmp_path / "legacy.db"
+    monkeypatch.setattr(survey_app, "DB_PATH", db_path)
+    with survey_app.connect_db() as conn:
+        conn.execute(
+            """
+            CREATE TABLE responses (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                survey_slug TEXT NOT NULL,
+                department_name TEXT NOT NULL,
+                person_name TEXT NOT NULL,
+                answers_json TEXT NOT NULL,
+                submitted_at TEXT NOT NULL,
+                legacy_flag TEXT,
+                UNIQUE(survey_slug, department_name, person_name)
+            )
+            """
+        )
+        for index in range(5):
+            answers = _sample_answers("登入主功能操作送出")
+            answers["person_name"] = f"填答者{index}"
+            conn.execute(
+                "INSERT INTO responses (survey_slug, department_name, person_name, answers_json, submitted_at, legacy_flag) VALUES (?, ?, ?, ?, ?, ?)",
+                ("at", "研發部", answers["person_name"], json.dumps(answers, ensure_ascii=False), "2026-02-16T09:00:00", "keep"),
+            )
+        conn.commit()
+
+    plan = survey_app.migrate_database(dry_run=True)
+    assert [step["version"] for step in plan] == [step["version"] for step in survey_app.SCHEMA_MIGRATIONS]
+    assert {step["pending_rows"] for step in plan if step["kind"] == "backfill"} == {5}
+    with survey_app.connect_db() as conn:
+        assert survey_app.get_schema_version(conn) == 0
+
+    original_steps = survey_app.SCHEMA_MIGRATIONS
+    calls = {"count": 0}
+
+    def interrupted_backfill(conn, after_id, batch_size):
+        calls["count"] += 1
+        if calls["count"] == 2:
+            raise RuntimeError("interrupted")
+        return survey_app.backfill_answers_hash(conn, after_id, batch_size)
+
+    monkeypatch.setattr(
+        survey_app,
+        "SCHEMA_MIGRATIONS",
+        tuple({**step, "backfill": interrupted_backfill} if step["version"] == 7 else step for step in original_steps),
+    )
+    with pytest.raises(RuntimeError):
+        survey_app.migrate_database(batch_size=2, pause_seconds=0)
+    with survey_app.connect_db() as conn:
+        assert survey_app.get_schema_version(conn) == 6
+        assert conn.execute("SELECT last_id, rows_done FROM schema_migration_progress WHERE version = 7").fetchone() == (2, 2)
+        assert conn.execute("SELECT COUNT(*) FROM responses WHERE answers_hash IS NOT NULL").fetchone()[0] == 2
+
+    monkeypatch.setattr(survey_app, "SCHEMA_MIGRATIONS", original_steps)
+    results = survey_app.migrate_database(batch_size=2, pause_seconds=0)
+    assert [(step["version"], step.get("rows")) for step in results[:3]] == [(7, 5), (8, None), (9, 5)]
+    assert [step["version"] for step in results] == [step["version"] for step in original_steps[6:]]
+    assert results[0]["batches"] == 2 and results[2]["batches"] == 3
+    assert all(step["status"] == "applied" and step["seconds"] >= 0 for step in results)
+    assert survey_app.migrate_database() == []
+
+    survey_app.init_db()
+    with survey_app.connect_db() as conn:
+        assert survey_app.get_schema_version(conn) == survey_app.SCHEMA_MIGRATIONS[-1]["version"]
+        assert conn.execute("SELECT COUNT(*) FROM schema_migration_progress").fetchone()[0] == 0
+        assert conn.execute("SELECT COUNT(*) FROM responses WHERE legacy_flag = 'keep'").fetchone()[0] == 5
+        assert conn.execute("SELECT COUNT(*) FROM response_versions").fetchone()[0] == 5
+        # Search documents and report renders are backfilled by numbered steps too.
+        assert conn.execute("SELECT COUNT(DISTINCT response_id) FROM response_renders").fetchone()[0] == 5
+        if survey_app.FTS5_AVAILABLE:
+            assert conn.execute("SELECT COUNT(*) FROM response_search").fetchone()[0] == 5
+    # Backfilled hashes match what a fresh submission computes.
+    answers = _sample_answers("登入主功能操作送出")
+    answers["person_name"] = "填答者4"
+    assert survey_app.save_response_record(answers) == "unchanged"
+    assert len(survey_app.get_report_records()) == 5
+
+
+def test_draft_autosave_prefills_form_and_never_touches_responses_until_submit(tmp_path, monkeypatch):
+    client = _build_client_with_temp_db(tmp_path, monkeypatch)
+    monkeypatch.setattr(survey_app, "is_survey_open", lambda: True)
+    current_time = {"value": datetime(2026, 2, 17, 9, 0, 0)}
+    monkeypatch.setattr(survey_app, "now", lambda: current_time["value"])
+    partial = {"department_name": "研發部", "person_name": "", "notes": "寫到一半的備註"}
+
+    page = client.get("/q/at?lang=zh-TW").get_data(as_text=True)
+    assert 'data-draft-url="/q/at/draft?lang=zh-TW"' in page
+    saved = client.post("/q/at/draft?lang=zh-TW", data=partial)
+    assert saved.status_code == 204
+    assert "survey_draft=" in saved.headers["Set-Cookie"] and "Path=/q/at" in saved.headers["Set-Cookie"]
+    assert client.post("/q/at/draft?lang=zh-TW", data=partial).status_code == 204
+    assert client.post("/q/at/draft", data={"notes": "x" * survey_app.DRAFT_MAX_BYTES}).status_code == 413
+
+    assert "寫到一半的備註" in client.get("/q/at?lang=zh-TW").get_data(as_text=True)
+    assert survey_app.get_report_records() == []
+    draft_key = client.get_cookie("survey_draft", path="/q/at").value
+    with survey_app.app.test_request_context("/q/at"):
+        survey_app.bind_active_survey()
+        assert survey_app.save_draft(draft_key, survey_app.load_draft(draft_key)) is False
+
+    submitted = client.post("/q/at?lang=zh-TW", data={**partial, "person_name": "王小明"})
+    assert submitted.status_code == 200
+    assert [record["person_name"] for record in survey_app.get_report_records()] == ["王小明"]
+    with survey_app.connect_draft_db() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM response_drafts").fetchone()[0] == 0
+
+    other = survey_app.app.test_client()
+    other.post("/q/at/draft?lang=zh-TW", data=partial)
+    current_time["value"] = datetime(2026, 2, 17, 9, 0, 0) + survey_app.timedelta(hours=survey_app.DRAFT_TTL_HOURS, seconds=1)
+    assert "寫到一半的備註" not in other.get("/q/at?lang=zh-TW").get_data(as_text=True)
+    assert survey_app.purge_expired_drafts() == 1
+
+
+def test_draft_autosave_is_rate_limited_and_capped_per_client(tmp_path, monkeypatch):
+    client = _build_client_with_temp_db(tmp_path, monkeypatch)
+    monkeypatch.setattr(survey_app, "is_survey_open", lambda: True)
+    monkeypatch.setattr(survey_app, "DRAFT_ADMISSION", survey_app.SubmissionAdmission(6, 3, 1, 0))
+    monkeypatch.setattr(survey_app, "DRAFT_MAX_PER_CLIENT", 2)
+    partial = {"department_name": "研發部", "notes": "草稿"}
+
+    assert [client.post("/q/at/draft", data=partial).status_code for _ in range(3)] == [204, 204, 204]
+    limited = client.post("/q/at/draft", data=partial)
+    assert limited.status_code == 429 and limited.headers["Retry-After"] in {"9", "10"}
+    # A submit is admitted from its own bucket.
+    assert survey_app.SUBMISSION_ADMISSION.take_token("127.0.0.1") == 0
+
+    # New keys, whether minted or forged, stop at the per-client cap.
+    monkeypatch.setattr(survey_app, "DRAFT_ADMISSION", survey_app.SubmissionAdmission(60, 20, 1, 0))
+    fresh = survey_app.app.test_client()
+    assert fresh.post("/q/at/draft", data=partial).status_code == 204
+    forged = survey_app.app.test_client()
+    forged.set_cookie("survey_draft", "f" * 32, path="/q/at")
+    assert forged.post("/q/at/draft", data=partial).status_code == 429
+    assert fresh.post("/q/at/draft", data={**partial, "notes": "續寫"}).status_code == 204
+    other_client = {"REMOTE_ADDR": "10.0.0.2"}
+    assert survey_app.app.test_client().post("/q/at/draft", data=partial, environ_base=other_client).status_code == 204
+    with survey_app.connect_draft_db() as conn:
+        assert conn.execute("SELECT client_key, COUNT(*) FROM response_drafts GROUP BY client_key ORDER BY client_key").fetchall() == [
+            ("10.0.0.2", 1),
+            ("127.0.0.1", 2),
+        ]
+
+
+def test_response_versions_keep_history_and_compaction_archives_old_versions(tmp_path, monkeypatch):
+    client = _build_client_with_temp_db(tmp_path, monkeypatch)
+    monkeypatch.setattr(survey_app, "now", lambda: datetime(2026, 2, 17, 9, 0, 1))
+    survey_app.save_response_record(_sample_answers("登入主功能操作送出"), "2026-02-17T09:00:00")
+    survey_app.save_response_record(_sample_answers("查詢檢視匯出"), "2026-02-17T09:10:00")
+    survey_app.save_response_record(_sample_answers("查詢檢視匯出"), "2026-02-17T09:15:00")
+    survey_app.save_response_record({**_sample_answers("查詢檢視匯出"), "notes": "第三版"}, "2026-02-17T09:20:00")
+    survey_app.save_response_record({**_sample_answers("查詢檢視匯出"), "person_name": "李小華"}, "2026-02-17T09:30:00")
+    [latest, record] = survey_app.get_report_records()
+
+    _login_report_user(client, "guest", "guest", "zh-TW")
+    assert client.get(f"/admin/report/records/{record['id']}/history").status_code == 403
+    assert "history-link" not in client.get("/admin/report?lang=zh-TW&date=2026-02-17").get_data(as_text=True)
+
+    _login_report_user(client, "manager", "manager-pass", "zh-TW")
+    assert f"/admin/report/records/{record['id']}/history" in client.get("/admin/report?lang=zh-TW&date=2026-02-17").get_data(as_text=True)
+    history = client.get(f"/admin/report/records/{record['id']}/history?lang=zh-TW").get_data(as_text=True)
+    assert history.count("detail-section history-version") == 3 and "第三版" in history and "已變更" in history
+    assert client.get("/admin/report/records/999/history").status_code == 404
+    versions = survey_app.get_response_versions(record["id"])
+    assert [version["submitted_at"] for version in versions] == [
+        "2026/02/17 09:20:00",
+        "2026/02/17 09:10:00",
+        "2026/02/17 09:00:00",
+    ]
+
+    client.post(f"/admin/report/delete/{latest['id']}")
+    holder = survey_app.claim_maintenance_lease("history-compaction", 60)
+    assert survey_app.compact_response_versions(keep_versions=2)["skipped"] is True
+    survey_app.release_maintenance_lease("history-compaction", holder)
+
+    # The archive is written without the write lock; deletes follow in batches.
+    monkeypatch.setattr(survey_app, "HISTORY_DELETE_BATCH_SIZE", 1)
+    open_archive = gzip.open
+    write_lock_free = []
+
+    def open_archive_probing_lock(*args, **kwargs):
+        probe = survey_app.sqlite3.connect(survey_app.DB_PATH, timeout=0)
+        try:
+            probe.execute("BEGIN IMMEDIATE")
+            write_lock_free.append(True)
+        finally:
+            probe.close()
+        return open_archive(*args, **kwargs)
+
+    monkeypatch.setattr(survey_app.gzip, "open", open_archive_probing_lock)
+    result = survey_app.compact_response_versions(keep_versions=2)
+    monkeypatch.setattr(survey_app.gzip, "open", open_archive)
+    assert write_lock_free == [True]
+    assert result["archived"] == 2 and result["skipped"] is False
+    with gzip.open(result["path"], "rt", encoding="utf-8") as archive:
+        archived = [json.loads(line) for line in archive]
+    assert [(item["response_id"], item["submitted_at"]) for item in archived] == [
+        (record["id"], "2026-02-17T09:00:00"),
+        (latest["id"], "2026-02-17T09:30:00"),
+    ]
+    assert archived[1]["answers"]["person_name"] == "李小華"
+    assert len(survey_app.get_response_versions(record["id"])) == 2
+    assert survey_app.compact_response_versions(keep_versions=2)["archived"] == 0
+
+
+def test_ui_catalogs_are_shared_read_only_and_fall_back_per_key(tmp_path, monkeypatch):
+    admin_ui = survey_app.build_admin_ui_texts("en")
+    assert admin_ui is survey_app.build_admin_ui_texts("en")
+    assert admin_ui["page_title"] == "Admin Report"
+    with pytest.raises(TypeError):
+        admin_ui["page_title"] = "changed"
+    assert survey_app.tr("找不到問卷", "en") == "Survey not found"
+    assert survey_app.tr("找不到問卷", "zh-TW") == "找不到問卷"
+    assert survey_app.get_html_lang("zh-TW") == "zh-Hant"
+    assert survey_app.normalize_lang("en-US") == "en"
+    assert survey_app.normalize_lang("fr") == "zh-TW"
+
+    locales_dir = tmp_path / "locales"
+    locales_dir.mkdir()
+    for lang in ("zh-TW", "en"):
+        (locales_dir / f"{lang}.json").write_text((ui_catalog.LOCALES_DIR / f"{lang}.json").read_text(encoding="utf-8"), encoding="utf-8")
+    (locales_dir / "ja.json").write_text(
+        json.dumps(
+            {
+                "html_lang": "ja",
+                "lang_label": "日本語",
+                "date_format": "%Y年%m月%d日",
+                "messages": {"找不到問卷": "アンケートが見つかりません"},
+                "ui": {"submit_button": "送信"},
+            }
+        ),
+        encoding="utf-8",
+    )
+    monkeypatch.setattr(ui_catalog, "LOCALES_DIR", locales_dir)
+    monkeypatch.setattr(ui_catalog, "_CATALOGS", {})
+    assert ui_catalog.list_catalog_langs() == ["en", "ja", "zh-TW"]
+    catalog = ui_catalog.load_catalog("ja")
+    assert catalog["ui"]["submit_button"] == "送信"
+    assert catalog["ui"]["basic_title"] == "基本資料"
+    assert catalog["admin_ui"]["page_title"] == "管理者報表"
+    assert catalog["messages"]["找不到問卷"] == "アンケートが見つかりません"
+
+    # A third catalog file is enough for the switcher, dates and pages; these
+    # module values are normally built from the catalogs at startup.
+    client = _build_client_with_temp_db(tmp_path, monkeypatch)
+    monkeypatch.setattr(survey_app, "SUPPORTED_LANGS", {"zh-TW", "en", "ja"})
+    monkeypatch.setattr(survey_app, "SWITCHER_LANGS", ["zh-TW", "en", "ja"])
+    monkeypatch.setitem(survey_app.app.jinja_env.globals, "lang_labels", {"zh-TW": "中文", "en": "EN", "ja": "日本語"})
+    monkeypatch.setattr(survey_app, "COMPILED_SURVEYS", survey_app.OrderedDict())
+    monkeypatch.setattr(survey_app, "is_survey_open", lambda: True)
+    assert survey_app.format_date_by_lang(datetime(2026, 2, 16), "ja") == "2026年02月16日"
+    html = client.get("/q/at?lang=ja").get_data(as_text=True)
+    assert '<html lang="ja"' in html and "送信" in html
+    assert re.search(r'class="lang-btn active" href="/q/at\?lang=ja">日本語</a>', html)
+    assert [label for label in re.findall(r'class="lang-btn[^"]*" href="[^"]*">([^<]+)</a>', html)] == ["中文", "EN", "日本語"]
+
+
+def test_submission_rollups_follow_overwrites_and_deletes(tmp_path, monkeypatch):
+    client = _build_client_with_temp_db(tmp_path, monkeypatch)
+    current_time = {"value": datetime(2026, 2, 16, 9, 10, 0)}
+    monkeypatch.setattr(survey_app, "now", lambda: current_time["value"])
+    first = _sample_answers("登入主功能操作送出")
+    first["department_name"] = "QA"
+    first["person_name"] = "小花"
+    second = _sample_answers("登入主功能操作送出")
+    second["department_name"] = "研發"
+    second["person_name"] = "阿明"
+
+    survey_app.upsert_response(first)
+    current_time["value"] = datetime(2026, 2, 16, 9, 40, 0)
+    survey_app.upsert_response(second)
+    current_time["value"] = datetime(2026, 2, 17, 14, 5, 0)
+    survey_app.upsert_response({**first, "notes": "改到隔天"})
+
+    def rollups():
+        with survey_app.connect_db() as conn:
+            return {
+                table: conn.execute(f"SELECT bucket, department_name, submissions FROM {table} ORDER BY 1, 2").fetchall()
+                for table, *_ in survey_app.RESPONSE_ROLLUPS.values()
+            }
+
+    assert rollups() == {
+        "response_rollups_hourly": [("2026-02-16T09", "研發", 1), ("2026-02-17T14", "QA", 1)],
+        "response_rollups_daily": [("2026-02-16", "研發", 1), ("2026-02-17", "QA", 1)],
+    }
+
+    assert _login_report_user(client, "manager", "manager-pass", "zh-TW").status_code == 302
+    report_html = client.get("/admin/report?lang=zh-TW").get_data(as_text=True)
+    assert 'data-trend-option="hour"' in report_html and "提交趨勢" in report_html
+    record = next(item for item in survey_app.get_report_records() if item["person_name"] == "阿明")
+    client.post(f"/admin/report/delete/{record['id']}")
+    maintained = rollups()
+    assert maintained["response_rollups_daily"] == [("2026-02-17", "QA", 1)]
+    with survey_app.connect_db() as conn:
+        survey_app.rebuild_response_rollups(conn)
+        conn.commit()
+    assert rollups() == maintained
+
+    trend = client.get("/admin/report/trend?granularity=hour").get_json()
+    assert trend["total"] == 1 and trend["peak"] == 1
+    assert trend["buckets"][-1] == {"bucket": "2026-02-17T14", "total": 1, "departments": {"QA": 1}}
+    assert len(trend["buckets"]) <= survey_app.TREND_MAX_BUCKETS
+    hours = [datetime.strptime(bucket["bucket"], "%Y-%m-%dT%H") for bucket in trend["buckets"]]
+    assert all(later - earlier == timedelta(hours=1) for earlier, later in zip(hours, hours[1:]))
+    assert client.get("/admin/report/trend?granularity=day&department=研發").get_json()["total"] == 0
+    assert client.get("/admin/report/trend?granularity=week").status_code == 400
+
+
+def test_report_facets_count_each_value_under_the_other_filters_and_page(tmp_path, monkeypatch):
+    client = _build_client_with_temp_db(tmp_path, monkeypatch)
+    current_time = {"value": datetime(2026, 2, 16, 9, 0, 0)}
+    monkeypatch.setattr(survey_app, "now", lambda: current_time["value"])
+    rows = [
+        ("研發部", "甲", "ERP", "審核者", datetime(2026, 2, 16, 9, 0, 0)),
+        ("研發部", "乙", "ERP", "一般使用者", datetime(2026, 2, 16, 10, 0, 0)),
+        ("研發部", "丙", "CRM", "審核者", datetime(2026, 2, 17, 9, 0, 0)),
+        ("財務部", "丁", "ERP", "審核者", datetime(2026, 2, 17, 10, 0, 0)),
+    ]
+    for department, person, system, role, submitted in rows:
+        current_time["value"] = submitted
+        survey_app.upsert_response(
+            {**_sample_answers("登入主功能操作送出"), "department_name": department, "person_name": person, "main_system": system, "main_role": role}
+        )
+
+    with survey_app.app.test_request_context("/admin/report?survey=at"):
+        facets = survey_app.get_report_facets(
+            survey_app.get_report_filter_args({"date_from": "", "date_to": "", "department": "研發部", "system": "ERP"})
+        )
+    assert facets["total"] == 2 and facets["department_count"] == 1
+    assert facets["latest_submitted_at"] == "2026-02-16T10:00:00"
+    assert facets["facets"]["department_name"] == [{"value": "研發部", "count": 2}, {"value": "財務部", "count": 1}]
+    assert facets["facets"]["main_system"] == [{"value": "ERP", "count": 2}, {"value": "CRM", "count": 1}]
+    assert facets["facets"]["main_role"] == [{"value": "一般使用者", "count": 1}, {"value": "審核者", "count": 1}]
+    assert facets["dates"] == [{"value": "2026-02-16", "count": 2}]
+
+    _login_report_user(client, "manager", "manager-pass", "zh-TW")
+    html = client.get("/admin/report?lang=zh-TW&date_from=&date_to=&role=審核者&per_page=10").get_data(as_text=True)
+    assert '<option value="審核者" selected>審核者 (3)</option>' in html
+    assert '<option value="研發部" >研發部 (2)</option>' in html
+    assert 'data-summary-field="total_submissions">3<' in html
+    assert "📇 乙" not in html and "📇 甲" in html and "📇 丁" in html
+    assert "/admin/report/export.csv?lang=zh-TW&amp;date_from=&amp;date_to=&amp;role=" in html
+    assert "2026/02/17 <span class=\"facet-count\">2</span>" in html
+
+    csv_text = client.get("/admin/report/export.csv?system=CRM").get_data(as_text=True)
+    assert "丙" in csv_text and "甲" not in csv_text
+
+    clamped = client.get("/admin/report?lang=zh-TW&date_from=&date_to=&per_page=10&page=2").get_data(as_text=True)
+    assert '<div class="pager-info">頁次 1 / 1</div>' in clamped
+    assert clamped.count('<article class="record-card"') == 4
+    narrowed = client.get("/admin/report?lang=zh-TW&date=2026-02-17&department=財務部").get_data(as_text=True)
+    assert narrowed.count('<article class="record-card"') == 1 and "📇 丁" in narrowed
+    assert "更早日期" not in clamped
+
+    # Every system stays selectable; only the day chips are capped, with a
+    # marker pointing at the date range inputs.
+    monkeypatch.setattr(survey_app, "REPORT_DATE_FACET_CHIPS", 1)
+    for index in range(25):
+        current_time["value"] = datetime(2026, 2, 18, 9, index, 0)
+        survey_app.upsert_response({**_sample_answers("登入主功能操作送出"), "person_name": f"系統{index}", "main_system": f"SYS{index:02d}"})
+    _login_report_user(client, "manager", "manager-pass", "zh-TW")
+    many = client.get("/admin/report?lang=zh-TW&date_from=&date_to=").get_data(as_text=True)
+    assert all(f'<option value="SYS{index:02d}" >' in many for index in range(25))
+    assert many.count('<a class="facet-chip') == 2
+    assert '<label class="facet-chip facet-more" for="date-from-filter">更早日期… <span class="facet-count">2</span>' in many
+
+
+def _connect_db_pausing_before(monkeypatch, statement_prefix: str, seconds: float = 0.05):
+    # Widens the gap between persist_response's row lookup and its upsert so
+    # concurrent submits overlap there.
+    connect = survey_app.connect_db
+
+    def connect_db_with_pause():
+        conn = connect()
+        conn.set_trace_callback(lambda sql: sleep(seconds) if sql.lstrip().startswith(statement_prefix) else None)
+        return conn
+
+    monkeypatch.setattr(survey_app, "connect_db", connect_db_with_pause)
+
+
+def test_concurrent_submits_for_one_respondent_keep_rollups_equal_to_rows(tmp_path, monkeypatch):
+    _build_client_with_temp_db(tmp_path, monkeypatch)
+    _connect_db_pausing_before(monkeypatch, "INSERT INTO responses")
+    statuses = []
+
+    def submit(day: int) -> None:
+        answers = {**_sample_answers("登入主功能操作送出"), "notes": f"第 {day} 次"}
+        statuses.append(survey_app.save_response_record(answers, f"2026-02-{day:02d}T09:00:00"))
+
+    threads = [threading.Thread(target=submit, args=(day,)) for day in range(16, 20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(statuses) == ["created", "updated", "updated", "updated"]
+    with survey_app.connect_db() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0] == 1
+        for table, *_ in survey_app.RESPONSE_ROLLUPS.values():
+            assert conn.execute(f"SELECT COALESCE(SUM(submissions), 0) FROM {table}").fetchone()[0] == 1
+        assert conn.execute("SELECT COUNT(*) FROM report_events WHERE kind = 'created'").fetchone()[0] == 1
+
+
+def test_concurrent_identical_submits_create_once_and_report_the_rest_unchanged(tmp_path, monkeypatch):
+    _build_client_with_temp_db(tmp_path, monkeypatch)
+    _connect_db_pausing_before(monkeypatch, "INSERT INTO responses")
+    answers = _sample_answers("登入主功能操作送出")
+    statuses = []
+    threads = [
+        threading.Thread(target=lambda: statuses.append(survey_app.save_response_record(answers, "2026-02-16T09:00:00")))
+        for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(statuses) == ["created", "unchanged", "unchanged", "unchanged"]
+    with survey_app.connect_db() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM response_versions").fetchone()[0] == 1
+        assert conn.execute("SELECT COUNT(*) FROM report_events").fetchone()[0] == 1
@@ -0,0 +1,56 @@
+import json
+import threading
+from pathlib import Path
+from types import MappingProxyType
+
+LOCALES_DIR = Path(__file__).parent / "locales"
+FALLBACK_LANG = "zh-TW"
+
+_CATALOGS: dict[str, MappingProxyType] = {}
+_CATALOGS_LOCK = threading.Lock()
+
+
+def list_catalog_langs() -> list[str]:
+    return sorted(path.stem for path in LOCALES_DIR.glob("*.json"))
+
+
+def read_catalog_file(lang: str) -> dict:
+    with (LOCALES_DIR / f"{lang}.json").open("r", encoding="utf-8") as file:
+        return json.load(file)
+
+
+def build_catalog(lang: str) -> MappingProxyType:
+    """Read one language file into a read-only catalog.
+
+    ``messages`` maps source (zh-TW) strings to this language; ``ui`` and
+    ``admin_ui`` hold the page texts by key; ``lang_label`` names the
+    language in the switcher and ``date_format`` is its strftime pattern. Keys missing from a language
+    fall back to the zh-TW file, so a new language can be added piece by
+    piece.
+    """
+    payload = read_catalog_file(lang)
+    fallback = read_catalog_file(FALLBACK_LANG) if lang != FALLBACK_LANG else {}
+    return MappingProxyType(
+        {
+            "lang": lang,
+            "html_lang": payload.get("html_lang", lang),
+            "lang_label": payload.get("lang_label", lang),
+            "date_format": payload.get("date_format", fallback.get("date_format", "%Y-%m-%d")),
+            "messages": MappingProxyType(dict(payload.get("messages", {}))),
+            "ui": MappingProxyType({**fallback.get("ui", {}), **payload.get("ui", {})}),
+            "admin_ui": MappingProxyType({**fallback.get("admin_ui", {}), **payload.get("admin_ui", {})}),
+        }
+    )
+
+
+def load_catalog(lang: str) -> MappingProxyType:
+    # Built on first use and shared by every request afterwards; callers only
+    # ever get read-only views, so nothing needs copying per request.
+    catalog = _CATALOGS.get(lang)
+    if catalog is None:
+        with _CATALOGS_LOCK:
+            catalog = _CATALOGS.get(lang)
+            if catalog is None:
+                catalog = build_catalog(lang)
+                _CATALOGS[lang] = catalog
+    return catalog